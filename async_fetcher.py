@@ -0,0 +1,386 @@
+"""Asynchronous, batched account-info fetcher.
+
+Looks up many users concurrently: for each user the about.json request and
+both Photon last-activity searches are issued together, and up to
+`concurrency` users are in flight at once over one pooled session. The HTTP
+calls reuse the blocking helpers from reddit_api on a thread pool sized to
+the connection pool, so results (and cache entries) are identical to
+get_account_info, and pacing is governed by the same per-host limiters.
+
+When refreshing users whose account id is already cached, status and
+creation date come from /api/user_data_by_account_ids, one request per
+ACCOUNT_BATCH_SIZE users, instead of one about.json request per user.
+
+Cached fields past their TTL are still served immediately and handed to
+REFRESHER, which revalidates them on a background thread with low-priority
+requests. A user already being fetched elsewhere (another tab, get_account_info
+on a worker thread) is not fetched twice: the later lookup waits for the
+in-flight one through reddit_api.ACCOUNT_FLIGHTS.
+"""
+
+import asyncio
+import threading
+import collections
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import SESSION, REDDIT_BASE_URL, PHOTON_BASE_URL, FETCH_CONCURRENCY, STATUS_CODES, ACCOUNT_BATCH_SIZE, REFRESH_CONCURRENCY
+from cache import CACHE
+from reddit_api import (
+    ACCOUNT_FIELDS,
+    ACCOUNT_FLIGHTS,
+    PHOTON_KINDS,
+    RequestCancelled,
+    _account_id,
+    _count_lookup,
+    _fetch_about_json,
+    _fetch_photon_date,
+    _fetch_user_data_by_ids,
+    _combine_photon_dates,
+    _is_transient,
+    _kinds_with_activity,
+    _missing_fields,
+    _resolve_about,
+    _resolve_user_data,
+    _entry_to_info,
+    _store_account_info,
+    stale_fields,
+)
+
+# Requests a single user can have outstanding at once (about.json + two Photon searches)
+REQUESTS_PER_USER = 3
+
+
+def create_pooled_session(pool_size: int, low_priority: bool = False, cancel=None,
+                          reddit_base_url: str = REDDIT_BASE_URL, photon_base_url: str = PHOTON_BASE_URL
+                          ) -> requests.Session:
+    """Create a session whose per-host connection pool holds `pool_size` keep-alive connections.
+
+    Requests made through a low_priority session only use spare rate-limit
+    capacity (see rate_limit.HostLimiter.slot). Once the threading.Event
+    `cancel` is set, requests not yet sent raise RequestCancelled. The base
+    URLs are where the session sends Reddit and Photon requests, e.g. a
+    local stub server in tests. The session's `lookup_stats` count the
+    users looked up and requests made through it.
+    """
+    session = requests.Session()
+    session.lookup_stats = {'users': 0, 'requests': 0}
+    session.low_priority = low_priority
+    session.cancel = cancel
+    session.reddit_base_url = reddit_base_url
+    session.photon_base_url = photon_base_url
+    session.headers.update(SESSION.headers)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class AsyncAccountFetcher:
+    """Fetch account info for many users with bounded concurrency.
+
+    reddit_base_url and photon_base_url point an owned session at other
+    servers (a given `session` carries its own, see create_pooled_session).
+    `stats` counts the lookups made through this fetcher's session only.
+    """
+
+    def __init__(self, concurrency: int = FETCH_CONCURRENCY, session: requests.Session | None = None,
+                 low_priority: bool = False, cancel=None, reddit_base_url: str = REDDIT_BASE_URL,
+                 photon_base_url: str = PHOTON_BASE_URL):
+        self.concurrency = max(1, concurrency)
+        pool_size = self.concurrency * REQUESTS_PER_USER
+        self._owns_session = session is None
+        self.session = session or create_pooled_session(pool_size, low_priority, cancel, reddit_base_url,
+                                                        photon_base_url)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='account-fetch')
+        # Bounds per-user lookups started outside fetch_many's workers (batch fallbacks)
+        self._user_slots = asyncio.Semaphore(self.concurrency)
+        self._coalesced = 0
+
+    @property
+    def stats(self) -> dict:
+        """Return {'users', 'requests', 'requests_per_user', 'coalesced'} like reddit_api.lookup_stats.
+
+        Only lookups made through this fetcher's session count, so
+        concurrent prefetches or refreshes don't inflate the figures.
+        coalesced counts users this fetcher took from another in-flight
+        lookup instead of fetching them.
+        """
+        stats = dict(getattr(self.session, 'lookup_stats', None) or {'users': 0, 'requests': 0})
+        stats['coalesced'] = self._coalesced
+        stats['requests_per_user'] = stats['requests'] / stats['users'] if stats['users'] else 0.0
+        return stats
+
+    async def _call(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args, self.session)
+
+    async def _latest_activity(self, author: str):
+        """Return the descending (date, complete) Photon result per PHOTON_KINDS."""
+        return await asyncio.gather(*(self._call(_fetch_photon_date, author, kind, 'desc') for kind in PHOTON_KINDS))
+
+    async def _about(self, author: str):
+        """Return ((status_code, birth_date, source, complete), account_id) from about.json."""
+        data, status_code_raw = await self._call(_fetch_about_json, author)
+        return (*_resolve_about(data, status_code_raw), not _is_transient(status_code_raw)), _account_id(data)
+
+    async def _finish(self, author, fields, about, latest_results, account_id):
+        """Estimate a missing birth date from Photon, then cache and return the info tuple."""
+        earliest = None
+        if 'birth' in fields and about[1] == 'Unknown':
+            kinds = _kinds_with_activity(latest_results) if latest_results is not None else PHOTON_KINDS
+            earliest = _combine_photon_dates(await asyncio.gather(
+                *(self._call(_fetch_photon_date, author, kind, 'asc') for kind in kinds)
+            ), 'asc')
+        latest = _combine_photon_dates(latest_results, 'desc') if latest_results is not None else None
+        return _store_account_info(author, about, earliest, latest, account_id)
+
+    async def fetch_one(self, author: str, fields=ACCOUNT_FIELDS):
+        """Fetch the given fields for one user; cache them and return (status_code, birth_date, last_activity, source)."""
+        key = author.lower()
+        future, leader = ACCOUNT_FLIGHTS.claim(key, fields)
+        if not leader:
+            self._coalesced += 1
+            try:
+                return await asyncio.wrap_future(future)
+            except RequestCancelled:
+                # Joined a prefetch that was cancelled; look the user up ourselves
+                return await self.fetch_one(author, fields)
+        try:
+            info = await self._fetch_one(author, fields)
+        except BaseException as exc:
+            ACCOUNT_FLIGHTS.finish(key, future, error=exc)
+            raise
+        ACCOUNT_FLIGHTS.finish(key, future, info)
+        return info
+
+    async def _fetch_one(self, author: str, fields):
+        _count_lookup(users=1, session=self.session)
+        fields = set(fields)
+        about = account_id = latest_results = None
+        if fields & {'status', 'birth'} and 'last_activity' in fields:
+            (about, account_id), latest_results = await asyncio.gather(
+                self._about(author), self._latest_activity(author))
+        elif fields & {'status', 'birth'}:
+            about, account_id = await self._about(author)
+        elif 'last_activity' in fields:
+            latest_results = await self._latest_activity(author)
+        return await self._finish(author, fields, about, latest_results, account_id)
+
+    async def fetch_batch(self, users, fields=ACCOUNT_FIELDS):
+        """Fetch info for [(username, account_id), ...] with one account-data request for all of them.
+
+        Status and birth date come from the batched request; last activity
+        (if in fields) still takes per-user Photon searches. Returns
+        {username: info}. If the batched request fails transiently, the
+        users are looked up individually instead, up to `concurrency` at once.
+        """
+        flights = {}
+        for u, _ in users:
+            if u not in flights:
+                flights[u] = ACCOUNT_FLIGHTS.claim(u.lower(), fields)
+        leading = list({u: account_id for u, account_id in users if flights[u][1]}.items())
+        self._coalesced += len(flights) - len(leading)
+        try:
+            infos = await self._fetch_batch(leading, fields) if leading else {}
+        except BaseException as exc:
+            for u, _ in leading:
+                ACCOUNT_FLIGHTS.finish(u.lower(), flights[u][0], error=exc)
+            raise
+        for u, _ in leading:
+            ACCOUNT_FLIGHTS.finish(u.lower(), flights[u][0], infos[u])
+        for u, _ in users:
+            if u not in infos:
+                try:
+                    infos[u] = await asyncio.wrap_future(flights[u][0])
+                except RequestCancelled:
+                    infos[u] = await self.fetch_one(u, fields)
+        return infos
+
+    async def _fetch_batch(self, users, fields):
+        fields = set(fields)
+
+        async def no_activity():
+            return [None] * len(users)
+
+        (found, complete), latest = await asyncio.gather(
+            self._call(_fetch_user_data_by_ids, [account_id for _, account_id in users]),
+            asyncio.gather(*(self._latest_activity(u) for u, _ in users))
+            if 'last_activity' in fields else no_activity(),
+        )
+        if not complete:
+            async def fetch_one(u):
+                async with self._user_slots:
+                    return await self._fetch_one(u, fields)
+
+            infos = await asyncio.gather(*(fetch_one(u) for u, _ in users))
+            return {u: info for (u, _), info in zip(users, infos)}
+        _count_lookup(users=len(users), session=self.session)
+        results = await asyncio.gather(*(
+            self._finish(u, fields, (*_resolve_user_data(found.get(account_id)), True), latest_results, account_id)
+            for (u, account_id), latest_results in zip(users, latest)
+        ))
+        return {u: info for (u, _), info in zip(users, results)}
+
+    async def fetch_many(self, usernames, on_result=None, refresh=False, fields=ACCOUNT_FIELDS, cancel=None) -> dict:
+        """Look up all usernames, serving cached entries first.
+
+        on_result(username, info, from_cache) is called as each result becomes
+        available (from the event loop's thread). Returns {username: info}.
+        Only the requested fields (see get_account_info) that are not cached
+        are fetched; cached fields past their TTL are served and queued on
+        REFRESHER. With refresh=True they are fetched again even if cached;
+        users whose entry carries an account id are then batched through
+        fetch_batch. Once the threading.Event `cancel` is set no new lookups
+        are started; the returned dict then only holds the users finished so
+        far.
+        """
+        usernames = list(usernames)
+        fields = tuple(fields)
+        results = {}
+        cached = CACHE.get_many(u.lower() for u in usernames)
+        pending = []
+        batched = []
+        for u in usernames:
+            entry = cached.get(u.lower())
+            need = set(fields) if refresh else _missing_fields(entry, fields)
+            if not need:
+                results[u] = _entry_to_info(entry)
+                if on_result:
+                    on_result(u, results[u], True)
+                stale = stale_fields(entry, fields)
+                if stale and not refresh:
+                    REFRESHER.enqueue(u, stale)
+            elif refresh and entry and entry.get('account_id') and need & {'status', 'birth'}:
+                batched.append((u, entry['account_id']))
+            else:
+                pending.append((u, need))
+
+        def deliver(u, info):
+            results[u] = info
+            if on_result:
+                on_result(u, info, False)
+
+        queue = iter(pending)
+        batches = iter([batched[i:i + ACCOUNT_BATCH_SIZE] for i in range(0, len(batched), ACCOUNT_BATCH_SIZE)])
+
+        async def worker():
+            # Workers share one iterator, so at most `concurrency` users are in flight
+            for u, need in queue:
+                if cancel is not None and cancel.is_set():
+                    return
+                try:
+                    info = await self.fetch_one(u, need)
+                except Exception:
+                    info = (STATUS_CODES['active'], 'Unknown', 'Unknown', 'Unknown')
+                deliver(u, info)
+
+        async def batch_worker():
+            for batch in batches:
+                if cancel is not None and cancel.is_set():
+                    return
+                try:
+                    infos = await self.fetch_batch(batch, fields)
+                except Exception:
+                    infos = {u: (STATUS_CODES['active'], 'Unknown', 'Unknown', 'Unknown') for u, _ in batch}
+                for u, info in infos.items():
+                    deliver(u, info)
+
+        n_batches = -(-len(batched) // ACCOUNT_BATCH_SIZE)
+        await asyncio.gather(
+            *(worker() for _ in range(min(self.concurrency, len(pending)))),
+            # A batch already puts ACCOUNT_BATCH_SIZE users' Photon searches in flight
+            *(batch_worker() for _ in range(min(2, n_batches))),
+        )
+        return results
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._owns_session:
+            self.session.close()
+
+
+def fetch_account_infos(usernames, on_result=None, concurrency: int = FETCH_CONCURRENCY, refresh=False,
+                        fields=ACCOUNT_FIELDS, low_priority=False, cancel=None, stats=None) -> dict:
+    """Blocking wrapper around AsyncAccountFetcher.fetch_many for use from worker threads.
+
+    For low_priority lookups, setting `cancel` also abandons requests that
+    are waiting for the rate limiter, so they give their capacity back to
+    interactive lookups at once. A `stats` dict is updated with this call's
+    lookup counts (see AsyncAccountFetcher.stats).
+    """
+    fetcher = AsyncAccountFetcher(concurrency, low_priority=low_priority, cancel=cancel if low_priority else None)
+    try:
+        return asyncio.run(fetcher.fetch_many(usernames, on_result, refresh, fields, cancel))
+    finally:
+        fetcher.close()
+        if stats is not None:
+            stats.update(fetcher.stats)
+
+
+class AccountRefresher:
+    """Background thread revalidating stale cache fields at low priority.
+
+    Usernames are queued with the fields to refresh; the thread drains the
+    queue in batches of up to ACCOUNT_BATCH_SIZE users with
+    fetch_account_infos(refresh=True, low_priority=True), so refreshes
+    share the per-host limiters but only use capacity interactive lookups
+    leave unused. The thread is started on the first enqueue.
+    """
+
+    def __init__(self, concurrency: int = REFRESH_CONCURRENCY, batch_size: int = ACCOUNT_BATCH_SIZE):
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.stats = {'queued': 0, 'refreshed': 0}
+        self._pending = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def enqueue(self, username: str, fields):
+        with self._lock:
+            key = username.lower()
+            if key not in self._pending:
+                self.stats['queued'] += 1
+            self._pending.setdefault(key, (username, set()))[1].update(fields)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='cache-refresher', daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def _take_batch(self):
+        with self._lock:
+            batch = []
+            while self._pending and len(batch) < self.batch_size:
+                batch.append(self._pending.popitem(last=False)[1])
+            if not self._pending:
+                self._wake.clear()
+            return batch
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            batch = self._take_batch()
+            if not batch:
+                continue
+            by_fields = collections.defaultdict(list)
+            for username, fields in batch:
+                by_fields[tuple(sorted(fields))].append(username)
+            for fields, usernames in by_fields.items():
+                try:
+                    fetch_account_infos(usernames, concurrency=self.concurrency, refresh=True,
+                                        fields=fields, low_priority=True)
+                except Exception:
+                    pass
+                with self._lock:
+                    self.stats['refreshed'] += len(usernames)
+
+
+REFRESHER = AccountRefresher()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Benchmark JSONL ingestion throughput.
+
+Usage:
+    python benchmarks/bench_ingest.py POSTS.jsonl COMMENTS.jsonl
+    python benchmarks/bench_ingest.py --generate 2000   # synthetic ~2000 MB dump
+    python benchmarks/bench_ingest.py --generate 2000 --workers 8
+    python benchmarks/bench_ingest.py --generate 500 --decoder json
+
+By default every installed JSON decoder (stdlib json, orjson, msgspec) is
+measured, slowest first, so the output shows lines/s before and after.
+
+With --generate, Pushshift-style posts and comments files of roughly the
+requested total size are written to a temporary directory first (comment
+bodies and selftext dominate the bytes, as in real dumps).
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+try:
+    import resource  # Unix only; peak RSS is not reported elsewhere
+except ImportError:
+    resource = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from ingest import available_decoders, ingest_files  # noqa: E402
+
+WORDS = ('the quick brown fox jumps over lazy dog reddit comment thread post '
+         'moderator upvote karma subreddit archive dump analysis').split()
+
+
+def _text(rng, n_words):
+    return ' '.join(rng.choice(WORDS) for _ in range(n_words))
+
+
+def generate_dump(directory, total_mb, subreddit='AskHistorians', seed=0):
+    """Write synthetic posts/comments JSONL files (~10% posts by size) and return their paths."""
+    rng = random.Random(seed)
+    authors = [f'user_{i}' for i in range(50000)] + ['[deleted]', 'AutoModerator']
+    start = 1262304000  # 2010-01-01
+    span = 14 * 365 * 86400
+    paths = []
+    for kind, share in (('post', 0.1), ('comment', 0.9)):
+        path = os.path.join(directory, f'{subreddit}_{kind}s.jsonl')
+        budget = int(total_mb * share * 1024 * 1024)
+        written = 0
+        with open(path, 'w', encoding='utf-8') as f:
+            while written < budget:
+                obj = {
+                    'author': rng.choice(authors),
+                    'subreddit': subreddit,
+                    'subreddit_name_prefixed': f'r/{subreddit}',
+                    'created_utc': start + rng.randrange(span),
+                    'score': rng.randrange(-10, 5000),
+                    'id': f'{rng.getrandbits(40):x}',
+                }
+                if kind == 'post':
+                    obj.update(title=_text(rng, 12), selftext=_text(rng, rng.randrange(20, 400)), is_self=True)
+                else:
+                    obj.update(body=_text(rng, rng.randrange(5, 250)), link_id=f't3_{rng.getrandbits(32):x}')
+                line = json.dumps(obj) + '\n'
+                f.write(line)
+                written += len(line)
+        paths.append((path, kind))
+    return paths
+
+
+def run(sources, identity_field, workers, decoder):
+    size = sum(os.path.getsize(p) for p, _ in sources)
+    start = time.perf_counter()
+    aggregates = ingest_files(sources, identity_field, workers=workers, decoder=decoder)
+    elapsed = time.perf_counter() - start
+    records = sum(a.total for a in aggregates)
+    line = (f'[{decoder}] {records:,} records, {size / 1e6:,.1f} MB in {elapsed:.2f}s: '
+            f'{records / elapsed:,.0f} lines/s, {size / 1e6 / elapsed:,.1f} MB/s')
+    if resource is not None:
+        line += f', peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:,.0f} MB'
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('files', nargs='*', help='posts JSONL then comments JSONL')
+    parser.add_argument('--generate', type=float, metavar='MB', help='generate a synthetic dump of about MB megabytes')
+    parser.add_argument('--identity', choices=('subreddit', 'author'), default='subreddit')
+    parser.add_argument('--workers', type=int, default=1, help='processes for files above PARALLEL_MIN_BYTES')
+    parser.add_argument('--decoder', default='all', choices=['all', 'auto'] + available_decoders(),
+                        help="JSON backend to measure ('all' compares every installed one)")
+    args = parser.parse_args()
+
+    decoders = available_decoders() if args.decoder == 'all' else [args.decoder]
+
+    def run_all(sources):
+        for decoder in reversed(decoders):
+            run(sources, args.identity, args.workers, decoder)
+
+    if args.generate:
+        with tempfile.TemporaryDirectory() as tmp:
+            run_all(generate_dump(tmp, args.generate))
+    elif len(args.files) == 2:
+        run_all([(args.files[0], 'post'), (args.files[1], 'comment')])
+    else:
+        parser.error('pass a posts and a comments file, or --generate MB')
+
+
+if __name__ == '__main__':
+    main()
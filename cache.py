@@ -1,17 +1,23 @@
 """Cache management for Reddit account information."""
 
 import os
+import abc
 import json
+import queue
+import collections
+import atexit
+import sqlite3
+import logging
 import threading
-from config import CACHE_FILE
+import time
+from config import (CACHE_FILE, CACHE_BACKEND, CACHE_DB_FILE, CACHE_HOT_SIZE, CACHE_WRITE_RETRIES,
+                    CACHE_WRITE_RETRY_DELAY)
 
-# Global cache and lock
-CACHE = {}
-CACHE_LOCK = threading.Lock()
+logger = logging.getLogger(__name__)
 
 
 def load_persistent_cache(path=CACHE_FILE):
-    """Load cache from disk."""
+    """Load legacy JSON cache from disk."""
     if os.path.isfile(path):
         try:
             with open(path, 'r', encoding='utf-8') as f:
@@ -23,15 +29,272 @@ def load_persistent_cache(path=CACHE_FILE):
     return {}
 
 
-def save_persistent_cache(cache, path=CACHE_FILE):
-    """Save cache to disk."""
-    try:
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(cache, f)
-    except Exception:
+class CacheBackend(abc.ABC):
+    """Persistent storage for account cache entries.
+
+    Backends store one JSON-serializable dict per lowercase username.
+    `put_many` is called from the cache's writer thread only; `get_many`
+    may be called from any thread.
+    """
+
+    @abc.abstractmethod
+    def get_many(self, keys) -> dict:
+        """Return {key: entry} for the given keys that are stored."""
+
+    @abc.abstractmethod
+    def put_many(self, items):
+        """Store (key, entry) pairs, replacing existing entries."""
+
+    def close(self):
         pass
 
 
-# Initialize cache on import
-CACHE.update(load_persistent_cache())
+class SQLiteCacheBackend(CacheBackend):
+    """SQLite (WAL mode) backend indexed by username.
+
+    The database is opened lazily on first use, so importing the module
+    costs nothing regardless of how many accounts are stored.
+    """
+
+    # SQLite's default limit on host parameters per statement is 999
+    _QUERY_CHUNK = 900
+
+    def __init__(self, path=CACHE_DB_FILE, legacy_json_path=CACHE_FILE):
+        self.path = path
+        self.legacy_json_path = legacy_json_path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    conn.execute('CREATE TABLE IF NOT EXISTS accounts (username TEXT PRIMARY KEY, data TEXT NOT NULL)')
+                    conn.commit()
+                    self._import_legacy_json(conn)
+                    self._initialized = True
+        return conn
+
+    def _import_legacy_json(self, conn):
+        """One-time migration of an existing creation_cache.json into the database."""
+        if not self.legacy_json_path or not os.path.isfile(self.legacy_json_path):
+            return
+        if conn.execute('SELECT 1 FROM accounts LIMIT 1').fetchone():
+            return
+        legacy = load_persistent_cache(self.legacy_json_path)
+        if legacy:
+            conn.executemany(
+                'INSERT OR IGNORE INTO accounts (username, data) VALUES (?, ?)',
+                ((k, json.dumps(v)) for k, v in legacy.items() if isinstance(v, dict))
+            )
+            conn.commit()
+
+    def get_many(self, keys) -> dict:
+        conn = self._connect()
+        keys = list(keys)
+        result = {}
+        for i in range(0, len(keys), self._QUERY_CHUNK):
+            chunk = keys[i:i + self._QUERY_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            rows = conn.execute(f'SELECT username, data FROM accounts WHERE username IN ({placeholders})', chunk)
+            for username, data in rows:
+                try:
+                    result[username] = json.loads(data)
+                except ValueError:
+                    continue
+        return result
+
+    def put_many(self, items):
+        conn = self._connect()
+        conn.executemany(
+            'INSERT OR REPLACE INTO accounts (username, data) VALUES (?, ?)',
+            ((k, json.dumps(v)) for k, v in items)
+        )
+        conn.commit()
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class JsonCacheBackend(CacheBackend):
+    """Legacy single-file JSON backend.
+
+    The file is parsed on first lookup (not at import) and rewritten in
+    full on every flush, so it only suits small caches.
+    """
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        self._data = None
+        self._lock = threading.Lock()
+
+    def _loaded(self):
+        with self._lock:
+            if self._data is None:
+                self._data = load_persistent_cache(self.path)
+            return self._data
+
+    def get_many(self, keys) -> dict:
+        data = self._loaded()
+        return {k: data[k] for k in keys if k in data}
+
+    def put_many(self, items):
+        with self._lock:
+            if self._data is None:
+                self._data = load_persistent_cache(self.path)
+            self._data.update(items)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self._data, f)
+
+
+BACKENDS = {
+    'sqlite': SQLiteCacheBackend,
+    'json': JsonCacheBackend,
+}
+
+
+def create_backend(name=CACHE_BACKEND) -> CacheBackend:
+    """Instantiate the configured cache backend (JSON if the name is unknown)."""
+    return BACKENDS.get(name, JsonCacheBackend)()
+
+
+class AccountCache:
+    """Dict-like account cache over a persistent backend.
+
+    Lookups go to a bounded LRU hot set first, then to the backend's
+    on-disk index, so only the usernames actually requested are ever
+    loaded. Assigning an entry updates the hot set immediately and queues
+    a single-row write; a background thread drains the queue in small
+    batches so callers never wait on disk I/O.
+    """
+
+    def __init__(self, backend: CacheBackend, hot_size=CACHE_HOT_SIZE):
+        self._backend = backend
+        self._hot_size = hot_size
+        self._hot = collections.OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        # Serializes read-modify-write updates (see update)
+        self._update_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name='cache-writer', daemon=True)
+        self._writer.start()
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __getitem__(self, key):
+        entry = self.get(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry
+
+    def __setitem__(self, key, entry):
+        with self._lock:
+            self._remember(key, entry)
+            self._pending[key] = entry
+        self._queue.put((key, entry))
+
+    def get(self, key, default=None):
+        return self.get_many([key]).get(key, default)
+
+    def update(self, key, fn):
+        """Replace `key`'s entry with fn(current entry or None) and return the new entry.
+
+        Updates are applied one at a time, so concurrent updates of the same
+        entry each see the previous one's result instead of overwriting it.
+        `fn` must not modify the entry it is given.
+        """
+        with self._update_lock:
+            entry = fn(self.get(key))
+            self[key] = entry
+        return entry
+
+    def get_many(self, keys) -> dict:
+        """Return {key: entry} for the given keys that are cached."""
+        found = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                entry = self._hot.get(key)
+                if entry is None:
+                    entry = self._pending.get(key)
+                if entry is not None:
+                    self._hot[key] = entry
+                    self._hot.move_to_end(key)
+                    found[key] = entry
+                else:
+                    missing.append(key)
+        if missing:
+            try:
+                loaded = self._backend.get_many(missing)
+            except Exception:
+                loaded = {}
+            with self._lock:
+                for key, entry in loaded.items():
+                    # A concurrent write wins over what was read from disk
+                    entry = self._pending.get(key, entry)
+                    self._remember(key, entry)
+                    found[key] = entry
+        self._trim()
+        return found
+
+    def _remember(self, key, entry):
+        self._hot[key] = entry
+        self._hot.move_to_end(key)
+
+    def _trim(self):
+        with self._lock:
+            while len(self._hot) > self._hot_size:
+                self._hot.popitem(last=False)
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 500:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._put_with_retries(batch)
+            finally:
+                with self._lock:
+                    for key, entry in batch:
+                        if self._pending.get(key) is entry:
+                            del self._pending[key]
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _put_with_retries(self, batch):
+        # Entries stay in _pending (and readable) while a failed write is retried
+        for attempt in range(CACHE_WRITE_RETRIES + 1):
+            try:
+                self._backend.put_many(batch)
+                return
+            except Exception:
+                if attempt == CACHE_WRITE_RETRIES:
+                    logger.exception('Dropping %d cache writes after %d failed attempts',
+                                     len(batch), attempt + 1)
+                    return
+                time.sleep(CACHE_WRITE_RETRY_DELAY * 2 ** attempt)
+
+    def flush(self):
+        """Block until all queued writes have reached the backend."""
+        self._queue.join()
+
+
+# Global cache
+CACHE = AccountCache(create_backend())
 
+atexit.register(CACHE.flush)
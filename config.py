@@ -1,17 +1,51 @@
 """Configuration constants for the Reddit Analyzer application."""
 
+import os
 import requests
 
 # Network configuration
 SESSION = requests.Session()
 SESSION.headers.update({'User-Agent': 'AuthorTools/0.1'})
 REQUEST_TIMEOUT = 6
-MAX_WORKERS = 12
+FETCH_CONCURRENCY = 32  # users looked up concurrently by the async fetcher
+REDDIT_BASE_URL = 'https://www.reddit.com'
+PHOTON_BASE_URL = 'https://arctic-shift.photon-reddit.com'
+
+# Rate limiting per host: (requests/second, burst, max concurrent requests)
+RATE_LIMITS = {
+    'www.reddit.com': (1.0, 10, 8),
+    'arctic-shift.photon-reddit.com': (8.0, 20, 16),
+}
+DEFAULT_RATE_LIMIT = (10.0, 20, 16)
+ACCOUNT_BATCH_SIZE = 100  # account ids per /api/user_data_by_account_ids request
+MAX_RETRIES = 3  # retries of a throttled (429) request
+THROTTLE_BACKOFF = 10  # seconds to pause a host after a 429 without Retry-After
 
 # Application configuration
 PAGE_SIZE = 1000
+PREFETCH_PAGES = 2  # pages after the visible one looked up in the background
+PREFETCH_CONCURRENCY = 2  # users prefetched at once, so prefetching never crowds the host window
 CACHE_FILE = 'creation_cache.json'
+CACHE_DB_FILE = 'creation_cache.db'
+CACHE_BACKEND = 'sqlite'  # 'sqlite' or 'json'
+CACHE_HOT_SIZE = 50000  # max account entries kept in memory
+CACHE_WRITE_RETRIES = 3  # retries of a failed cache write before it is logged and dropped
+CACHE_WRITE_RETRY_DELAY = 0.5  # seconds before the first retry, doubled for each later one
+CACHE_TTL_POSITIVE = 30 * 86400  # active accounts / found activity: status can change
+CACHE_TTL_NEGATIVE = 90 * 86400  # deleted/suspended accounts, nothing found
+CACHE_TTL_TRANSIENT = 15 * 60  # failed lookups (timeouts, 5xx, 429) before retrying
+REFRESH_CONCURRENCY = 2  # users revalidated at once by the background refresher
+JOBS_DIR = 'lookup_jobs'  # checkpoints of resumable lookup runs
+JOB_CHECKPOINT_INTERVAL = 5.0  # seconds between checkpoints of a running job
 SKIP_LIST_FILE = 'skip_list.txt'
+INGEST_WORKERS = os.cpu_count() or 1  # processes used to parse large JSONL files
+AGGREGATE_CACHE_DIR = 'aggregate_cache'  # per-file aggregates of analyzed JSONL files
+INGEST_POLL_MS = 200  # how often the analysis tabs refresh load progress
+INGEST_SNAPSHOT_INTERVAL = 1.0  # seconds between partial results shown while loading
+TOP_CONTRIBUTORS = 20  # rows in the Subreddit Analysis top contributors list
+# Top contributors are exact, except in sketch mode, where they come from space-saving counters
+# (each count at most N / (50 * TOP_CONTRIBUTORS) too high for N records) and no per-user counts are kept
+INGEST_SKETCH_MODE = False  # default of Subreddit Analysis' sketch mode (estimated unique users, no username list)
 
 # Status codes
 STATUS_CODES = {'deleted': 0, 'active': 1, 'suspended': 2}
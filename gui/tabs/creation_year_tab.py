@@ -6,12 +6,22 @@ import datetime
 import webbrowser
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from config import PAGE_SIZE, MAX_WORKERS, STATUS_LABELS, STATUS_CODES
-from cache import CACHE, CACHE_LOCK
+from config import (
+    PAGE_SIZE, PREFETCH_PAGES, PREFETCH_CONCURRENCY, STATUS_LABELS, STATUS_CODES, INGEST_POLL_MS, JOBS_DIR,
+    JOB_CHECKPOINT_INTERVAL,
+)
+from cache import CACHE
 from skip_list import DEFAULT_SKIPS
-from reddit_api import get_account_info
+from async_fetcher import REFRESHER, fetch_account_infos
+from reddit_api import fetched_account_fields, has_account_fields, stale_fields
+from jobs import LookupJob, describe_job, fingerprint_usernames, list_jobs
+from gui.widgets import ColumnTable, VirtualTreeview
+
+DETAIL_COLUMNS = ('Username', 'Creation Date', 'Status')
+
+# Account fields shown by this tab; last activity is never fetched
+CREATION_FIELDS = ('status', 'birth')
 
 
 class CreationYearTab(ttk.Frame):
@@ -27,6 +37,14 @@ class CreationYearTab(ttk.Frame):
         self._user_pages = []
         self._current_usernames = []
         self._all_results = []
+        # Typed columns behind detail_tree, with the current sort column/direction
+        self._detail_table = self._build_detail_table([])
+        self._detail_sort = None
+        self._detail_reverse = False
+        self._prefetch_cancel = None
+        # Whole-file mode: running year histogram shared with the streaming thread
+        self._stream_cancel = None
+        self._stream_state = None
 
         self._build_ui()
 
@@ -45,6 +63,11 @@ class CreationYearTab(ttk.Frame):
         self.prev_btn.pack(side='left', padx=4)
         self.next_btn = ttk.Button(ctrl, text='Next', state='disabled', command=self._next_page)
         self.next_btn.pack(side='left', padx=4)
+        self.whole_file_btn = ttk.Button(ctrl, text='Whole File', command=self._start_stream)
+        self.whole_file_btn.pack(side='left', padx=4)
+        self.pause_btn = ttk.Button(ctrl, text='Pause', state='disabled', command=self._pause_stream)
+        self.pause_btn.pack(side='left', padx=4)
+        ttk.Button(ctrl, text='Jobs', command=self._show_jobs).pack(side='left', padx=4)
 
         self.progress = ttk.Progressbar(ctrl, mode='determinate', length=260)
         self.progress.pack(side='left', padx=8)
@@ -57,7 +80,8 @@ class CreationYearTab(ttk.Frame):
 
         left = ttk.Frame(mid)
         left.pack(side='left', fill='both', expand=True)
-        ttk.Label(left, text='Year Distribution (current page only)').pack(anchor='w')
+        self.dist_label = ttk.Label(left, text='Year Distribution (current page only)')
+        self.dist_label.pack(anchor='w')
         self.dist_tree = ttk.Treeview(left, columns=('Year', 'Count'), show='headings', height=14)
         for c in ('Year', 'Count'):
             self.dist_tree.heading(c, text=c)
@@ -76,13 +100,12 @@ class CreationYearTab(ttk.Frame):
         ttk.Button(filter_frame, text='Export Filtered', command=self._export_filtered).pack(side='left', padx=6)
 
         ttk.Label(right, text='Usernames (filtered)').pack(anchor='w', pady=(6, 0))
-        detail_cols = ('Username', 'Creation Date', 'Status')
-        self.detail_tree = ttk.Treeview(right, columns=detail_cols, show='headings', height=14)
-        for c in detail_cols:
+        self.detail_tree = VirtualTreeview(right, columns=DETAIL_COLUMNS, height=14)
+        for c in DETAIL_COLUMNS:
             self.detail_tree.heading(c, text=c, command=lambda col=c: self._sort_detail_tree(col, False))
             self.detail_tree.column(c, anchor='w')
         self.detail_tree.pack(fill='both', expand=True)
-        self.detail_tree.bind('<Double-1>', self._on_double_click_user)
+        self.detail_tree.bind_rows('<Double-1>', self._on_double_click_user)
 
         self.page_label = ttk.Label(self, text='Page: 0 / 0')
         self.page_label.pack(anchor='e')
@@ -92,27 +115,34 @@ class CreationYearTab(ttk.Frame):
         if path:
             self.creation_txt_path.set(path)
 
+    @staticmethod
+    def _iter_usernames(path: str, skip_bots: bool):
+        """Yield the usernames in a file, one per line, minus the skipped ones."""
+        skip_set = set(DEFAULT_SKIPS)
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                u = line.strip()
+                if not u:
+                    continue
+                if skip_bots and u.lower().endswith('bot'):
+                    continue
+                if u.lower() in skip_set:
+                    continue
+                yield u
+
     def _init_pages_from_file(self, path: str):
         pages = []
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                lines = [line.strip() for line in f if line.strip()]
+            filtered = list(self._iter_usernames(path, self.skip_bots_var.get()))
         except Exception as e:
             messagebox.showerror('Error', f'Failed to read file: {e}')
             return []
-        skip_set = set(DEFAULT_SKIPS)
-        filtered = []
-        for u in lines:
-            if self.skip_bots_var.get() and u.lower().endswith('bot'):
-                continue
-            if u.lower() in skip_set:
-                continue
-            filtered.append(u)
         for i in range(0, len(filtered), self._page_size):
             pages.append(filtered[i:i + self._page_size])
         return pages
 
     def _start_analyze(self):
+        self._cancel_prefetch()
         path = self.creation_txt_path.get()
         if not path or not os.path.isfile(path):
             messagebox.showerror('Missing file', 'Select a valid .txt file containing usernames.')
@@ -122,6 +152,7 @@ class CreationYearTab(ttk.Frame):
         if not self._user_pages:
             messagebox.showinfo('No users', 'No usernames found after applying skip rules.')
             return
+        self.dist_label.config(text='Year Distribution (current page only)')
         self._update_nav_buttons()
         self._load_page(self._page_index)
 
@@ -144,8 +175,11 @@ class CreationYearTab(ttk.Frame):
             self._load_page(self._page_index)
 
     def _load_page(self, page_index: int):
+        # The visible page takes precedence; prefetching resumes once it is shown
+        self._cancel_prefetch()
         self._current_usernames = list(self._user_pages[page_index])
         self.analyze_btn.config(state='disabled')
+        self.whole_file_btn.config(state='disabled')
         self.progress.config(maximum=len(self._current_usernames), value=0)
         self.cache_hits_label.config(text='Cache hits: 0')
         self._all_results.clear()
@@ -155,35 +189,36 @@ class CreationYearTab(ttk.Frame):
         results = []
         cache_hits = 0
         users_to_fetch = []
-        with CACHE_LOCK:
-            for u in usernames:
-                lower = u.lower()
-                if lower in CACHE:
-                    entry = CACHE[lower]
-                    results.append({
-                        'username': u,
-                        'date': entry.get('birth_date', 'Unknown'),
-                        'year': int(entry['birth_date'].split('-')[0]) if entry.get('birth_date') and entry['birth_date'] != 'Unknown' else 'Unknown',
-                        'status': STATUS_LABELS.get(entry.get('status_code', STATUS_CODES['active']), 'active'),
-                        'source': entry.get('source', 'Unknown')
-                    })
-                    cache_hits += 1
-                else:
-                    users_to_fetch.append(u)
+        cached = CACHE.get_many(u.lower() for u in usernames)
+        for u in usernames:
+            entry = cached.get(u.lower())
+            if has_account_fields(entry, CREATION_FIELDS):
+                results.append({
+                    'username': u,
+                    'date': entry.get('birth_date', 'Unknown'),
+                    'year': int(entry['birth_date'].split('-')[0]) if entry.get('birth_date') and entry['birth_date'] != 'Unknown' else 'Unknown',
+                    'status': STATUS_LABELS.get(entry.get('status_code', STATUS_CODES['active']), 'active'),
+                    'source': entry.get('source', 'Unknown')
+                })
+                cache_hits += 1
+                stale = stale_fields(entry, CREATION_FIELDS)
+                if stale:
+                    REFRESHER.enqueue(u, stale)
+            else:
+                users_to_fetch.append(u)
         self.after(0, lambda: self.cache_hits_label.config(text=f'Cache hits: {cache_hits}'))
         if users_to_fetch:
-            with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, max(1, len(users_to_fetch)))) as ex:
-                fut_map = {ex.submit(self._fetch_single_user_record, u): u for u in users_to_fetch}
-                completed = 0
-                for fut in as_completed(fut_map):
-                    u = fut_map[fut]
-                    try:
-                        rec = fut.result()
-                    except Exception:
-                        rec = {'username': u, 'date': 'Unknown', 'year': 'Unknown', 'status': 'active', 'source': 'Unknown'}
-                    results.append(rec)
-                    completed += 1
-                    self.after(0, lambda c=completed + cache_hits: self.progress.config(value=c))
+            def on_result(username, info, _from_cache):
+                results.append(self._make_user_record(username, info))
+                self.after(0, lambda c=len(results): self.progress.config(value=c))
+            # Counted for this page's lookups only, not concurrent refreshes or prefetches
+            stats = {}
+            fetch_account_infos(users_to_fetch, on_result=on_result, fields=CREATION_FIELDS, stats=stats)
+            if stats['users']:
+                text = f"Cache hits: {cache_hits} | {stats['requests_per_user']:.1f} requests/user"
+                if stats['coalesced']:
+                    text += f" | {stats['coalesced']} shared with other lookups"
+                self.after(0, lambda: self.cache_hits_label.config(text=text))
         normalized = []
         for r in results:
             y = r.get('year', 'Unknown')
@@ -198,8 +233,31 @@ class CreationYearTab(ttk.Frame):
         self._all_results = normalized
         self.after(0, self._on_page_results_ready)
 
-    def _fetch_single_user_record(self, username: str) -> dict:
-        status_code, birth, last, source = get_account_info(username)
+    def _start_prefetch(self):
+        """Warm the cache for the next PREFETCH_PAGES pages with low-priority lookups."""
+        upcoming = self._user_pages[self._page_index + 1:self._page_index + 1 + PREFETCH_PAGES]
+        usernames = [u for page in upcoming for u in page]
+        if not usernames:
+            return
+        cancel = threading.Event()
+        self._prefetch_cancel = cancel
+        threading.Thread(target=self._prefetch_thread, args=(usernames, cancel), daemon=True).start()
+
+    def _cancel_prefetch(self):
+        if self._prefetch_cancel is not None:
+            self._prefetch_cancel.set()
+            self._prefetch_cancel = None
+
+    def _prefetch_thread(self, usernames, cancel):
+        try:
+            fetch_account_infos(usernames, concurrency=PREFETCH_CONCURRENCY, fields=CREATION_FIELDS,
+                                low_priority=True, cancel=cancel)
+        except Exception:
+            # Prefetching only warms the cache; the page load will retry
+            pass
+
+    def _make_user_record(self, username: str, info) -> dict:
+        status_code, birth, last, source = info
         status_label = STATUS_LABELS.get(status_code, 'active')
         year = 'Unknown'
         if birth and birth != 'Unknown':
@@ -211,6 +269,7 @@ class CreationYearTab(ttk.Frame):
 
     def _on_page_results_ready(self):
         self.analyze_btn.config(state='normal')
+        self.whole_file_btn.config(state='normal')
         self.progress.config(value=0)
         dist = {}
         for r in self._all_results:
@@ -219,55 +278,223 @@ class CreationYearTab(ttk.Frame):
                 dist[y] = dist.get(y, 0) + 1
             else:
                 dist['Unknown'] = dist.get('Unknown', 0) + 1
+        years_sorted = self._show_distribution(dist)
+        dropdown_values = ['All'] + [str(y) for y in years_sorted]
+        if 'Unknown' in dist:
+            dropdown_values.append('Unknown')
+        self.year_dropdown.config(values=dropdown_values)
+        self._detail_table = self._build_detail_table(self._all_results)
+        self._detail_sort = None
+        self.year_dropdown.set('All')
+        self._refresh_detail_tree()
+        self._start_prefetch()
+
+    def _show_distribution(self, dist):
+        """Fill the distribution table from {year or 'Unknown': count}; returns the sorted years."""
         self.dist_tree.delete(*self.dist_tree.get_children())
         years_sorted = sorted([k for k in dist.keys() if k != 'Unknown'])
         for y in years_sorted:
             self.dist_tree.insert('', 'end', values=(y, dist[y]))
         if 'Unknown' in dist:
             self.dist_tree.insert('', 'end', values=('Unknown', dist['Unknown']))
-        dropdown_values = ['All'] + [str(y) for y in years_sorted]
-        if 'Unknown' in dist:
-            dropdown_values.append('Unknown')
-        self.year_dropdown.config(values=dropdown_values)
+        return years_sorted
+
+    def _start_stream(self):
+        """Compute the year distribution of the whole file, streaming it through the fetcher.
+
+        The run is a persistent LookupJob: only its completion bitmap and
+        year histogram are kept (no per-user rows), so memory does not grow
+        with the file, and running the same file again after Pause, closing
+        the app or a crash resumes where the last checkpoint left off.
+        """
+        path = self.creation_txt_path.get()
+        if not path or not os.path.isfile(path):
+            messagebox.showerror('Missing file', 'Select a valid .txt file containing usernames.')
+            return
+        self._cancel_prefetch()
+        self._user_pages = []
+        self._all_results = []
+        self._detail_table = self._build_detail_table([])
+        self.page_label.config(text='Page: 0 / 0')
+        for btn in (self.analyze_btn, self.whole_file_btn, self.prev_btn, self.next_btn):
+            btn.config(state='disabled')
+        self.pause_btn.config(state='normal')
+        self.dist_label.config(text='Year Distribution (whole file)')
+        self.dist_tree.delete(*self.dist_tree.get_children())
+        self.detail_tree.set_rows([])
+        self.year_dropdown.config(values=['All'])
         self.year_dropdown.set('All')
-        self._populate_detail_tree(self._all_results)
+        self.progress.config(maximum=1, value=0)
+        self.cache_hits_label.config(text='Reading usernames...')
+        self._stream_cancel = threading.Event()
+        self._stream_state = {'job': None, 'resumed': 0, 'cache_hits': 0, 'failed': 0, 'finished': False,
+                              'error': None}
+        threading.Thread(target=self._stream_thread,
+                         args=(path, self.skip_bots_var.get(), self._stream_state, self._stream_cancel),
+                         daemon=True).start()
+        self.after(INGEST_POLL_MS, self._poll_stream)
+
+    def _pause_stream(self):
+        if self._stream_cancel is not None:
+            self._stream_cancel.set()
+            self.pause_btn.config(state='disabled')
+            self.cache_hits_label.config(text='Pausing...')
+
+    def _show_jobs(self):
+        jobs = list_jobs(JOBS_DIR)
+        if not jobs:
+            messagebox.showinfo('Saved jobs', 'No saved lookup jobs.')
+            return
+        messagebox.showinfo('Saved jobs', '\n'.join(f"[{job['kind']}] {describe_job(job)}" for job in jobs[:20]))
 
-    def _populate_detail_tree(self, rows):
-        self.detail_tree.delete(*self.detail_tree.get_children())
-        for r in rows:
+    @staticmethod
+    def _year_key(birth) -> str:
+        if birth and birth != 'Unknown':
+            try:
+                return str(int(birth.split('-')[0]))
+            except Exception:
+                pass
+        return 'Unknown'
+
+    def _stream_thread(self, path, skip_bots, state, cancel):
+        job = None
+        try:
+            fingerprint, total = fingerprint_usernames(self._iter_usernames(path, skip_bots))
+            job = LookupJob.open(JOBS_DIR, 'creation_year', os.path.abspath(path), fingerprint, total,
+                                 CREATION_FIELDS, JOB_CHECKPOINT_INTERVAL)
+            state['resumed'] = job.done_count
+            state['job'] = job
+            chunk = []
+            for index, u in enumerate(self._iter_usernames(path, skip_bots)):
+                if cancel.is_set():
+                    break
+                if job.is_done(index):
+                    continue
+                chunk.append((index, u))
+                if len(chunk) >= self._page_size:
+                    self._stream_chunk(chunk, job, state, cancel)
+                    chunk = []
+            if chunk and not cancel.is_set():
+                self._stream_chunk(chunk, job, state, cancel)
+        except Exception as e:
+            state['error'] = e
+        finally:
+            if job is not None:
+                if job.done_count == job.total:
+                    job.finish()
+                else:
+                    job.pause()
+            state['finished'] = True
+
+    def _stream_chunk(self, chunk, job, state, cancel):
+        """Look up [(index, username), ...], marking each done in the job as its result arrives.
+
+        Users whose lookup failed (or failed recently and is not retried
+        yet) are left pending, so resuming the job looks them up again.
+        """
+        pending = {}
+        cached = CACHE.get_many(u.lower() for _, u in chunk)
+        for index, u in chunk:
+            entry = cached.get(u.lower())
+            if not has_account_fields(entry, CREATION_FIELDS):
+                pending.setdefault(u, []).append(index)
+            elif fetched_account_fields(entry, CREATION_FIELDS):
+                job.mark_done(index, self._year_key(entry.get('birth_date')))
+                state['cache_hits'] += 1
+                stale = stale_fields(entry, CREATION_FIELDS)
+                if stale:
+                    REFRESHER.enqueue(u, stale)
+            else:
+                state['failed'] += 1
+        job.checkpoint()
+
+        def on_result(u, info, _from_cache):
+            # Failure placeholders are not cached; only a stored result finishes the user
+            if not fetched_account_fields(CACHE.get(u.lower()), CREATION_FIELDS):
+                state['failed'] += len(pending[u])
+                return
+            for index in pending[u]:
+                job.mark_done(index, self._year_key(info[1]))
+            job.checkpoint()
+
+        if pending:
+            fetch_account_infos(list(pending), fields=CREATION_FIELDS, cancel=cancel, on_result=on_result)
+
+    def _poll_stream(self):
+        state = self._stream_state
+        job = state['job']
+        if job is not None:
+            dist = {int(k) if k.isdigit() else k: v for k, v in job.summary().items()}
+            self._show_distribution(dist)
+            done, total = job.done_count, job.total
+            self.progress.config(maximum=max(total, 1), value=done)
+            text = f"Processed {done:,} / {total:,} | Cache hits: {state['cache_hits']:,}"
+            if state['resumed']:
+                text += f" | resumed at {state['resumed']:,}"
+            if state['failed']:
+                text += f" | Failed: {state['failed']:,} (retried on resume)"
+            self.cache_hits_label.config(text=text)
+        if not state['finished']:
+            self.after(INGEST_POLL_MS, self._poll_stream)
+            return
+        self._stream_cancel = None
+        self.analyze_btn.config(state='normal')
+        self.whole_file_btn.config(state='normal')
+        self.pause_btn.config(state='disabled')
+        self.progress.config(value=0)
+        if state['error'] is not None:
+            messagebox.showerror('Error', f"Failed to process file: {state['error']}")
+        elif job is not None and job.done_count < job.total:
+            failed = f" ({state['failed']:,} lookups failed)" if state['failed'] else ''
+            messagebox.showinfo('Paused', f'Processed {job.done_count:,} of {job.total:,} users{failed}. '
+                                'Run Whole File on the same file again to resume.')
+
+    @staticmethod
+    def _build_detail_table(results) -> ColumnTable:
+        usernames, dates, statuses, years, date_keys = [], [], [], [], []
+        for r in results:
             date_val = r.get('date', 'Unknown')
             if date_val and date_val != 'Unknown' and r.get('source') != 'True':
                 date_display = f"{date_val} (estimated)"
             else:
                 date_display = date_val
-            self.detail_tree.insert('', 'end', values=(r['username'], date_display, r['status']))
+            try:
+                # ISO dates sort correctly as text; unparseable ones first
+                date_key = datetime.date.fromisoformat(date_val).isoformat()
+            except (TypeError, ValueError):
+                date_key = ''
+            usernames.append(r['username'])
+            dates.append(date_display)
+            statuses.append(r['status'])
+            years.append(r['year'])
+            date_keys.append(date_key)
+        return ColumnTable(
+            DETAIL_COLUMNS,
+            {'Username': usernames, 'Creation Date': dates, 'Status': statuses, 'Year': years},
+            sort_keys={'Username': [u.lower() for u in usernames], 'Creation Date': date_keys,
+                       'Status': [st.lower() for st in statuses]},
+        )
 
-    def _apply_year_filter(self):
+    def _year_filter(self):
+        """Return the detail table filter for the selected year, or None for all rows."""
         sel = self.year_var.get()
         if sel == 'All':
-            filtered = self._all_results
-        elif sel == 'Unknown':
-            filtered = [r for r in self._all_results if r['year'] == 'Unknown']
-        else:
-            try:
-                y = int(sel)
-                filtered = [r for r in self._all_results if r['year'] == y]
-            except Exception:
-                filtered = self._all_results
-        self._populate_detail_tree(filtered)
+            return None
+        if sel == 'Unknown':
+            return ('Year', 'Unknown')
+        try:
+            return ('Year', int(sel))
+        except Exception:
+            return None
+
+    def _refresh_detail_tree(self):
+        self.detail_tree.set_rows(self._detail_table.view(self._detail_sort, self._detail_reverse, self._year_filter()))
+
+    def _apply_year_filter(self):
+        self._refresh_detail_tree()
 
     def _export_filtered(self):
-        sel = self.year_var.get()
-        if sel == 'All':
-            filtered = self._all_results
-        elif sel == 'Unknown':
-            filtered = [r for r in self._all_results if r['year'] == 'Unknown']
-        else:
-            try:
-                y = int(sel)
-                filtered = [r for r in self._all_results if r['year'] == y]
-            except Exception:
-                filtered = self._all_results
+        filtered = self._detail_table.view(where=self._year_filter())
         if not filtered:
             messagebox.showinfo('No data', 'No usernames to export for the selected year.')
             return
@@ -277,36 +504,19 @@ class CreationYearTab(ttk.Frame):
         try:
             with open(path, 'w', encoding='utf-8') as f:
                 for r in filtered:
-                    f.write(r['username'] + '\n')
+                    f.write(r[0] + '\n')
             messagebox.showinfo('Saved', f'Exported {len(filtered)} usernames to {path}')
         except Exception as e:
             messagebox.showerror('Error', f'Failed to save file: {e}')
 
     def _sort_detail_tree(self, col, reverse):
-        items = self.detail_tree.get_children('')
-        data_list = []
-        for it in items:
-            val = self.detail_tree.set(it, col)
-            if col == 'Creation Date':
-                v = val.split(' ')[0] if val else ''
-                try:
-                    key = datetime.datetime.strptime(v, '%Y-%m-%d') if v and v != 'Unknown' else datetime.datetime.min
-                except Exception:
-                    key = datetime.datetime.min
-            else:
-                key = val.lower() if isinstance(val, str) else val
-            data_list.append((key, it))
-        data_list.sort(reverse=reverse, key=lambda t: t[0])
-        for index, (_, it) in enumerate(data_list):
-            self.detail_tree.move(it, '', index)
+        self._detail_sort = col
+        self._detail_reverse = reverse
+        self._refresh_detail_tree()
         self.detail_tree.heading(col, command=lambda: self._sort_detail_tree(col, not reverse))
 
-    def _on_double_click_user(self, event):
-        sel = self.detail_tree.selection()
-        if not sel:
-            return
-        item = sel[0]
-        username = self.detail_tree.item(item, 'values')[0]
+    def _on_double_click_user(self, row):
+        username = row[0]
         if username:
             webbrowser.open(f'https://reddit.com/user/{username}')
 
@@ -5,11 +5,18 @@ import threading
 import webbrowser
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from config import MAX_WORKERS, STATUS_LABELS
+from config import STATUS_LABELS, STATUS_CODES, JOBS_DIR, JOB_CHECKPOINT_INTERVAL
+from cache import CACHE
 from skip_list import DEFAULT_SKIPS
-from reddit_api import get_account_info
+from async_fetcher import fetch_account_infos
+from reddit_api import fetched_account_fields, has_account_fields
+from jobs import LookupJob, fingerprint_usernames
+from gui.widgets import ColumnTable, VirtualTreeview
+
+# Account fields shown by this tab
+OVERLAP_FIELDS = ('status', 'birth')
+COLUMNS = ('Username', 'Count', 'Creation Date', 'Year', 'Status')
 
 
 class OverlappingUsersTab(ttk.Frame):
@@ -20,6 +27,11 @@ class OverlappingUsersTab(ttk.Frame):
         self.file_paths = [tk.StringVar() for _ in range(5)]
         self.year_var = tk.StringVar(value='All')
         self.results = []
+        # Typed columns behind the table, with the current sort column/direction
+        self._table = self._build_table([])
+        self._sort = None
+        self._reverse = False
+        self._cancel = None
         self._build_ui()
 
     def _build_ui(self):
@@ -29,7 +41,10 @@ class OverlappingUsersTab(ttk.Frame):
             ttk.Entry(self, textvariable=self.file_paths[i], width=50).grid(row=i+1, column=1)
             ttk.Button(self, text='Browse...', command=lambda v=self.file_paths[i]: self._browse(v)).grid(row=i+1, column=2)
 
-        ttk.Button(self, text='Find Overlapping Users', command=self._start_analyze).grid(row=6, column=0, pady=10)
+        self.find_btn = ttk.Button(self, text='Find Overlapping Users', command=self._start_analyze)
+        self.find_btn.grid(row=6, column=0, pady=10)
+        self.pause_btn = ttk.Button(self, text='Pause', state='disabled', command=self._pause)
+        self.pause_btn.grid(row=6, column=1, sticky='w', pady=10)
 
         progress_frame = ttk.Frame(self)
         progress_frame.grid(row=7, column=0, columnspan=3, sticky='w', pady=(4, 4))
@@ -47,13 +62,12 @@ class OverlappingUsersTab(ttk.Frame):
         ttk.Button(filter_frame, text='Apply Filter', command=self._apply_year_filter).pack(side='left', padx=6)
         ttk.Button(filter_frame, text='Export Filtered', command=self._export_filtered).pack(side='left', padx=6)
 
-        columns = ('Username', 'Count', 'Creation Date', 'Year', 'Status')
-        self.tree = ttk.Treeview(self, columns=columns, show='headings')
-        for c in columns:
+        self.tree = VirtualTreeview(self, columns=COLUMNS)
+        for c in COLUMNS:
             self.tree.heading(c, text=c, command=lambda col=c: self._sort_tree(col, False))
             self.tree.column(c, anchor='w', width=150)
         self.tree.grid(row=9, column=0, columnspan=3, sticky='nsew')
-        self.tree.bind('<Double-1>', self._on_double_click_user)
+        self.tree.bind_rows('<Double-1>', self._on_double_click_user)
 
         self.rowconfigure(9, weight=1)
         self.columnconfigure(1, weight=1)
@@ -103,40 +117,98 @@ class OverlappingUsersTab(ttk.Frame):
 
         # Create overlap_counts dict with all users having count = num_files
         overlap_counts = {u: num_files for u in overlapping}
-        overlapping = list(overlapping)
+        # Sorted, so the same files always give the same (resumable) job
+        overlapping = sorted(overlapping)
+        source = ' + '.join(os.path.basename(p) for p in valid_paths)
 
         self.progress.config(maximum=len(overlapping), value=0)
         self.status_label.config(text=f'Fetching creation dates for {len(overlapping)} users in all {num_files} files...')
-        threading.Thread(target=self._fetch_creation_dates, args=(overlapping, overlap_counts), daemon=True).start()
+        self._cancel = threading.Event()
+        self.find_btn.config(state='disabled')
+        self.pause_btn.config(state='normal')
+        threading.Thread(target=self._fetch_creation_dates, args=(overlapping, overlap_counts, source, self._cancel),
+                         daemon=True).start()
+
+    def _pause(self):
+        if self._cancel is not None:
+            self._cancel.set()
+            self.pause_btn.config(state='disabled')
+            self.status_label.config(text='Pausing...')
+
+    def _make_row(self, username, count, status_code, birth):
+        year = 'Unknown'
+        if birth and birth != 'Unknown':
+            try:
+                year = int(birth.split('-')[0])
+            except Exception:
+                pass
+        status_label = STATUS_LABELS.get(status_code, 'active')
+        return {'username': username, 'count': count, 'date': birth, 'year': year, 'status': status_label}
 
-    def _fetch_creation_dates(self, usernames, overlap_counts):
+    def _fetch_creation_dates(self, usernames, overlap_counts, source, cancel):
+        """Look up the users as a resumable LookupJob; users finished by an earlier run are read from the cache.
+
+        Errors are reported once the controls are restored; the rows fetched
+        so far are still shown.
+        """
         results = []
         total = len(usernames)
-        completed = 0
-
-        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(usernames))) as ex:
-            futures = {ex.submit(get_account_info, u): u for u in usernames}
-            for fut in as_completed(futures):
-                u = futures[fut]
-                try:
-                    status_code, birth, _, _ = fut.result()
-                    year = 'Unknown'
-                    if birth and birth != 'Unknown':
-                        try:
-                            year = int(birth.split('-')[0])
-                        except Exception:
-                            pass
-                    status_label = STATUS_LABELS.get(status_code, 'active')
-                    results.append({'username': u, 'count': overlap_counts[u], 'date': birth, 'year': year, 'status': status_label})
-                except Exception:
-                    results.append({'username': u, 'count': overlap_counts[u], 'date': 'Unknown', 'year': 'Unknown', 'status': 'active'})
-
-                completed += 1
-                self.after(0, lambda c=completed: self._update_progress(c, total))
-
-        results.sort(key=lambda x: (x['year'] if isinstance(x['year'], int) else 9999, x['username'].lower()))
-        self.results = results
-        self.after(0, self._populate_table)
+        job = error = None
+        try:
+            fingerprint, _ = fingerprint_usernames(usernames)
+            job = LookupJob.open(JOBS_DIR, 'overlap', source, fingerprint, total, OVERLAP_FIELDS,
+                                 JOB_CHECKPOINT_INTERVAL)
+            index_of = {u: i for i, u in enumerate(usernames)}
+
+            pending = []
+            cached = CACHE.get_many(u.lower() for i, u in enumerate(usernames) if job.is_done(i))
+            for i, u in enumerate(usernames):
+                entry = cached.get(u.lower())
+                if job.is_done(i) and has_account_fields(entry, OVERLAP_FIELDS):
+                    results.append(self._make_row(u, overlap_counts[u],
+                                                  entry.get('status_code', STATUS_CODES['active']),
+                                                  entry.get('birth_date', 'Unknown')))
+                else:
+                    pending.append(u)
+            if results:
+                self.after(0, lambda c=len(results): self.status_label.config(
+                    text=f'Resuming saved job: {c}/{total} already done'))
+
+            def on_result(u, info, _from_cache):
+                status_code, birth, _, _ = info
+                results.append(self._make_row(u, overlap_counts[u], status_code, birth))
+                # Failed lookups are shown as Unknown but left pending, so resuming retries them
+                if fetched_account_fields(CACHE.get(u.lower()), OVERLAP_FIELDS):
+                    job.mark_done(index_of[u])
+                    job.checkpoint()
+                self.after(0, lambda c=len(results): self._update_progress(c, total))
+
+            fetch_account_infos(pending, on_result=on_result, fields=OVERLAP_FIELDS, cancel=cancel)
+        except Exception as e:
+            error = e
+        finally:
+            if job is not None:
+                if job.done_count == total:
+                    job.finish()
+                else:
+                    job.pause()
+            results.sort(key=lambda x: (x['year'] if isinstance(x['year'], int) else 9999, x['username'].lower()))
+            self.results = results
+            done = job.done_count if job is not None else 0
+            self.after(0, self._populate_table)
+            self.after(0, lambda: self._on_fetch_finished(done, total, max(0, len(results) - done)))
+            if error is not None:
+                self.after(0, lambda: messagebox.showerror('Error', f'Failed to fetch creation dates: {error}'))
+
+    def _on_fetch_finished(self, completed, total, failed=0):
+        self._cancel = None
+        self.find_btn.config(state='normal')
+        self.pause_btn.config(state='disabled')
+        self._update_progress(completed, total)
+        if failed:
+            self.status_label.config(text=f'{completed}/{total} done, {failed} lookups failed; run again to retry them')
+        elif completed < total:
+            self.status_label.config(text=f'Paused at {completed}/{total}; run again to resume')
 
     def _update_progress(self, completed, total):
         self.progress.config(value=completed)
@@ -145,37 +217,49 @@ class OverlappingUsersTab(ttk.Frame):
             self.status_label.config(text='Completed')
 
     def _populate_table(self):
-        for row in self.tree.get_children():
-            self.tree.delete(row)
-
-        years = set()
-        for r in self.results:
-            years.add(str(r['year']))
-            self.tree.insert('', 'end', values=(r['username'], r['count'], r['date'], r['year'], r['status']))
-
+        years = {str(r['year']) for r in self.results}
         dropdown_values = ['All'] + sorted([y for y in years if y != 'Unknown'])
         if 'Unknown' in years:
             dropdown_values.append('Unknown')
         self.year_dropdown.config(values=dropdown_values)
         self.year_dropdown.set('All')
 
-    def _apply_year_filter(self):
+        self._table = self._build_table(self.results)
+        self._sort = None
+        self._refresh_table()
+
+    @staticmethod
+    def _build_table(results) -> ColumnTable:
+        columns = {c: [] for c in COLUMNS}
+        for r in results:
+            columns['Username'].append(r['username'])
+            columns['Count'].append(r['count'])
+            columns['Creation Date'].append(r['date'])
+            columns['Year'].append(r['year'])
+            columns['Status'].append(r['status'])
+        return ColumnTable(
+            COLUMNS,
+            {**columns, 'Year Label': [str(y) for y in columns['Year']]},
+            sort_keys={
+                'Username': [u.lower() for u in columns['Username']],
+                'Creation Date': [str(d).lower() for d in columns['Creation Date']],
+                'Year': [y if isinstance(y, int) else 9999 for y in columns['Year']],
+                'Status': [st.lower() for st in columns['Status']],
+            },
+        )
+
+    def _year_filter(self):
         sel = self.year_var.get()
-        for row in self.tree.get_children():
-            self.tree.delete(row)
-        if sel == 'All':
-            data = self.results
-        else:
-            data = [r for r in self.results if str(r['year']) == sel]
-        for r in data:
-            self.tree.insert('', 'end', values=(r['username'], r['count'], r['date'], r['year'], r['status']))
+        return None if sel == 'All' else ('Year Label', sel)
+
+    def _refresh_table(self):
+        self.tree.set_rows(self._table.view(self._sort, self._reverse, self._year_filter()))
+
+    def _apply_year_filter(self):
+        self._refresh_table()
 
     def _export_filtered(self):
-        sel = self.year_var.get()
-        if sel == 'All':
-            data = self.results
-        else:
-            data = [r for r in self.results if str(r['year']) == sel]
+        data = self._table.view(where=self._year_filter())
         if not data:
             messagebox.showinfo('No data', 'No usernames to export for the selected year.')
             return
@@ -184,30 +268,20 @@ class OverlappingUsersTab(ttk.Frame):
             return
         try:
             with open(path, 'w', encoding='utf-8') as f:
-                for r in data:
-                    f.write(f"{r['username']}\t{r['count']}\t{r['date']}\t{r['year']}\t{r['status']}\n")
+                for username, count, date, year, status in data:
+                    f.write(f"{username}\t{count}\t{date}\t{year}\t{status}\n")
             messagebox.showinfo('Saved', f'Exported {len(data)} usernames to {path}')
         except Exception as e:
             messagebox.showerror('Error', f'Failed to save file: {e}')
 
-    def _on_double_click_user(self, event):
-        sel = self.tree.selection()
-        if not sel:
-            return
-        item = sel[0]
-        username = self.tree.item(item, 'values')[0]
+    def _on_double_click_user(self, row):
+        username = row[0]
         if username:
             webbrowser.open(f'https://www.reddit.com/user/{username}')
 
     def _sort_tree(self, col, reverse):
-        data = [(self.tree.set(k, col), k) for k in self.tree.get_children('')]
-        if col == 'Count':
-            data.sort(key=lambda x: int(x[0]) if x[0].isdigit() else 0, reverse=reverse)
-        elif col == 'Year':
-            data.sort(key=lambda x: int(x[0]) if x[0].isdigit() else 9999, reverse=reverse)
-        else:
-            data.sort(key=lambda x: x[0].lower(), reverse=reverse)
-        for index, (_, k) in enumerate(data):
-            self.tree.move(k, '', index)
+        self._sort = col
+        self._reverse = reverse
+        self._refresh_table()
         self.tree.heading(col, command=lambda: self._sort_tree(col, not reverse))
 
@@ -1,13 +1,17 @@
 """Subreddit Analysis Tab."""
 
-import os
-import json
-import datetime
-import collections
+import webbrowser
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import pytz
 
+from config import (
+    AGGREGATE_CACHE_DIR, INGEST_SKETCH_MODE, INGEST_WORKERS, INGEST_POLL_MS, INGEST_SNAPSHOT_INTERVAL,
+    TOP_CONTRIBUTORS,
+)
+from ingest import ActivityAggregate, AggregateStore, IngestCancelled, IngestWorker, ValidationError
+from gui.widgets import ActivityCalendar, ColumnTable, HourHeatmap, VirtualTreeview
+
 
 class SubredditAnalysisTab(ttk.Frame):
     """Tab for analyzing subreddits with comprehensive dashboard."""
@@ -16,15 +20,18 @@ class SubredditAnalysisTab(ttk.Frame):
         super().__init__(parent, padding=10)
         self.file1_path = tk.StringVar()
         self.file2_path = tk.StringVar()
-        self.subreddit_counts = collections.defaultdict(int)
-        self.usernames = set()
-        self.user_contributions = collections.defaultdict(int)  # {username: count}
-        self.activity_by_date = collections.defaultdict(int)
-        self.activity_by_hour_day = collections.defaultdict(lambda: collections.defaultdict(int))
-        self.raw_timestamps = []
+        self.sketch_var = tk.BooleanVar(value=INGEST_SKETCH_MODE)
+        self.subreddit_counts = {}
+        self.user_contributions = {}  # {username: count}
+        self.activity_by_date = {}
+        self.aggregate = None
         self.selected_timezone = pytz.UTC
         self.total_posts = 0
         self.date_range = None
+        self._worker = None
+        self._snapshot_version = 0
+        self._username_table = ColumnTable(('Username',), {'Username': []})
+        self._contributors_table = ColumnTable(('Username', 'Posts/Comments'), {'Username': [], 'Posts/Comments': []})
         self._build_ui()
 
     def _build_ui(self):
@@ -44,7 +51,18 @@ class SubredditAnalysisTab(ttk.Frame):
         ttk.Entry(input_frame, textvariable=self.file2_path, width=50).grid(row=1, column=1, padx=(0, 5), pady=(5, 0))
         ttk.Button(input_frame, text='Browse...', command=lambda: self._browse(self.file2_path)).grid(row=1, column=2, pady=(5, 0))
 
-        ttk.Button(input_frame, text='Analyze', command=self._analyze).grid(row=2, column=0, pady=10)
+        self.analyze_button = ttk.Button(input_frame, text='Analyze', command=self._analyze)
+        self.analyze_button.grid(row=2, column=0, pady=10)
+        self.cancel_button = ttk.Button(input_frame, text='Cancel', command=self._cancel_analysis, state='disabled')
+        self.cancel_button.grid(row=2, column=1, sticky='w', pady=10)
+        # Bounded memory for very large dumps: estimated unique users, approximate top contributors
+        ttk.Checkbutton(input_frame, text='Sketch mode (large dumps)', variable=self.sketch_var).grid(
+            row=2, column=1, sticky='e', pady=10)
+
+        self.load_progress = ttk.Progressbar(input_frame, mode='determinate', maximum=100, length=300)
+        self.load_progress.grid(row=3, column=0, columnspan=2, sticky='w')
+        self.load_status_label = ttk.Label(input_frame, text='Idle')
+        self.load_status_label.grid(row=4, column=0, columnspan=3, sticky='w', pady=(2, 0))
 
         # Right side: Stats panel
         stats_frame = ttk.LabelFrame(top_frame, text='Exploratory Stats', padding=5)
@@ -65,7 +83,7 @@ class SubredditAnalysisTab(ttk.Frame):
         self._build_username_view(username_frame)
 
         # Top contributors panel
-        contributors_frame = ttk.LabelFrame(left_frame, text='Top 20 Contributors', padding=5)
+        contributors_frame = ttk.LabelFrame(left_frame, text=f'Top {TOP_CONTRIBUTORS} Contributors', padding=5)
         contributors_frame.pack(fill='both', expand=True)
         self._build_contributors_view(contributors_frame)
 
@@ -96,34 +114,23 @@ class SubredditAnalysisTab(ttk.Frame):
 
     def _build_username_view(self, parent):
         # Username list with export
-        list_frame = ttk.Frame(parent)
-        list_frame.pack(fill='both', expand=True)
-        
-        self.username_tree = ttk.Treeview(list_frame, columns=('Username',), show='headings', height=8)
-        self.username_tree.heading('Username', text='Username', command=lambda: self._sort_username_tree())
+        # Virtualized: subreddits can have millions of unique usernames
+        self.username_tree = VirtualTreeview(parent, columns=('Username',), height=8)
+        self.username_tree.heading('Username', text='Username', command=lambda: self._sort_username_tree(True))
         self.username_tree.column('Username', anchor='w')
-        
-        scrollbar = ttk.Scrollbar(list_frame, orient='vertical', command=self.username_tree.yview)
-        self.username_tree.configure(yscrollcommand=scrollbar.set)
-        
-        self.username_tree.pack(side='left', fill='both', expand=True)
-        scrollbar.pack(side='right', fill='y')
+        self.username_tree.pack(fill='both', expand=True)
+        self.username_tree.bind_rows('<Double-1>', self._on_double_click_user)
         
         ttk.Button(parent, text='Export Usernames as TXT', command=self._export_usernames).pack(pady=5)
 
     def _build_contributors_view(self, parent):
         # Top contributors list
-        self.contributors_tree = ttk.Treeview(parent, columns=('Username', 'Posts/Comments'), show='headings', height=8)
+        self.contributors_tree = VirtualTreeview(parent, columns=('Username', 'Posts/Comments'), height=8)
         self.contributors_tree.heading('Username', text='Username')
         self.contributors_tree.heading('Posts/Comments', text='Posts/Comments', command=lambda: self._sort_contributors_tree('Posts/Comments', False))
         self.contributors_tree.column('Username', anchor='w', width=200)
         self.contributors_tree.column('Posts/Comments', anchor='center', width=120)
-        
-        scrollbar = ttk.Scrollbar(parent, orient='vertical', command=self.contributors_tree.yview)
-        self.contributors_tree.configure(yscrollcommand=scrollbar.set)
-        
-        self.contributors_tree.pack(side='left', fill='both', expand=True)
-        scrollbar.pack(side='right', fill='y')
+        self.contributors_tree.pack(fill='both', expand=True)
 
     def _build_activity_tracker_view(self, parent):
         # Year filter
@@ -139,7 +146,7 @@ class SubredditAnalysisTab(ttk.Frame):
         canvas_frame = ttk.Frame(parent)
         canvas_frame.pack(fill='both', expand=True)
         
-        self.activity_canvas = tk.Canvas(canvas_frame, bg='white', height=175)
+        self.activity_canvas = ActivityCalendar(canvas_frame, on_click=self._show_date_info, bg='white', height=175)
         scrollbar_activity_h = ttk.Scrollbar(canvas_frame, orient='horizontal', command=self.activity_canvas.xview)
         scrollbar_activity_v = ttk.Scrollbar(canvas_frame, orient='vertical', command=self.activity_canvas.yview)
         self.activity_canvas.configure(xscrollcommand=scrollbar_activity_h.set, yscrollcommand=scrollbar_activity_v.set)
@@ -176,220 +183,14 @@ class SubredditAnalysisTab(ttk.Frame):
         self.timezone_var.trace('w', lambda *args: self._on_timezone_changed())
         
         # Canvas for hour heatmap
-        self.hour_canvas = tk.Canvas(parent, bg='white', height=250)
+        self.hour_canvas = HourHeatmap(parent, on_click=self._show_hour_day_info, bg='white', height=250)
         self.hour_canvas.pack(fill='both', expand=True)
 
     def _browse(self, var):
-        path = filedialog.askopenfilename(filetypes=[('JSONL files', '*.jsonl')])
+        path = filedialog.askopenfilename(filetypes=[('JSONL files', '*.jsonl *.zst *.gz *.bz2'), ('All files', '*.*')])
         if path:
             var.set(path)
 
-    def _parse_timestamp(self, ts):
-        """Parse timestamp from various formats."""
-        if ts is None:
-            return None
-        if isinstance(ts, (int, float)):
-            try:
-                return datetime.datetime.fromtimestamp(ts)
-            except Exception:
-                return None
-        if isinstance(ts, str):
-            try:
-                return datetime.datetime.fromisoformat(ts.rstrip('Z'))
-            except Exception:
-                return None
-        return None
-
-    def _validate_jsonl_structure(self, filepath, expected_type):
-        """Validate that JSONL file has the expected structure.
-        
-        Args:
-            filepath: Path to JSONL file
-            expected_type: 'post' or 'comment'
-        
-        Returns:
-            (is_valid, error_message, subreddit_name) tuple
-        """
-        if not os.path.isfile(filepath):
-            return False, f'File not found: {filepath}', None
-        
-        try:
-            sample_count = 0
-            subreddit_name = None
-            with open(filepath, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        obj = json.loads(line)
-                    except json.JSONDecodeError:
-                        continue
-                    
-                    sample_count += 1
-                    
-                    # Extract subreddit name
-                    subreddit = obj.get('subreddit')
-                    if not subreddit:
-                        subreddit_prefixed = obj.get('subreddit_name_prefixed', '')
-                        if subreddit_prefixed.startswith('r/'):
-                            subreddit = subreddit_prefixed[2:]
-                        else:
-                            subreddit = subreddit_prefixed
-                    
-                    if subreddit:
-                        if subreddit_name is None:
-                            subreddit_name = subreddit
-                        elif subreddit_name.lower() != subreddit.lower():
-                            return False, f'File is not a valid subreddit JSONL file', None
-                    
-                    if sample_count > 10:  # Check first 10 valid lines
-                        break
-                    
-                    # Check required fields
-                    if not obj.get('subreddit') and not obj.get('subreddit_name_prefixed'):
-                        return False, f'Missing subreddit field in {filepath}', None
-                    
-                    if not obj.get('author'):
-                        # Author can be missing for deleted posts, but should exist in structure
-                        pass
-                    
-                    if not obj.get('created_utc') and not obj.get('created'):
-                        return False, f'Missing timestamp field in {filepath}', None
-                    
-                    # Check type-specific fields
-                    if expected_type == 'post':
-                        # Posts should have 'title' or 'selftext' or 'is_self'
-                        if 'title' not in obj and 'is_self' not in obj:
-                            return False, f'File {filepath} does not appear to be a posts file (missing post-specific fields)', None
-                    
-                    elif expected_type == 'comment':
-                        # Comments should have 'body' and 'link_id'
-                        if 'body' not in obj or 'link_id' not in obj:
-                            return False, f'File {filepath} does not appear to be a comments file (missing comment-specific fields)', None
-            
-            if sample_count == 0:
-                return False, f'No valid JSON lines found in {filepath}', None
-            
-            if subreddit_name is None:
-                return False, f'Could not determine subreddit from {filepath}', None
-            
-            return True, None, subreddit_name
-        except Exception as e:
-            return False, f'Error reading {filepath}: {e}', None
-
-    def _load_jsonl_files(self):
-        """Load and parse JSONL files with structure validation."""
-        self.subreddit_counts = collections.defaultdict(int)
-        self.usernames = set()
-        self.user_contributions = collections.defaultdict(int)
-        self.activity_by_date = collections.defaultdict(int)
-        self.activity_by_hour_day = collections.defaultdict(lambda: collections.defaultdict(int))
-        self.raw_timestamps = []
-        self.total_posts = 0
-        dates_list = []
-        
-        file1 = self.file1_path.get()
-        file2 = self.file2_path.get()
-        
-        if not file1 or not file2:
-            return False
-        
-        # Validate file structures and extract subreddits
-        subreddit1 = None
-        subreddit2 = None
-        
-        if file1:
-            is_valid, error_msg, subreddit = self._validate_jsonl_structure(file1, 'post')
-            if not is_valid:
-                messagebox.showerror('Validation Error', f'File A (Posts) validation failed:\n{error_msg}')
-                return False
-            subreddit1 = subreddit
-        
-        if file2:
-            is_valid, error_msg, subreddit = self._validate_jsonl_structure(file2, 'comment')
-            if not is_valid:
-                messagebox.showerror('Validation Error', f'File B (Comments) validation failed:\n{error_msg}')
-                return False
-            subreddit2 = subreddit
-        
-        # Validate that both files are from the same subreddit
-        if file1 and file2 and subreddit1 and subreddit2:
-            if subreddit1.lower() != subreddit2.lower():
-                messagebox.showerror('Validation Error', 
-                    f'Subreddit mismatch:\n'
-                    f'File A (Posts) is from: r/{subreddit1}\n'
-                    f'File B (Comments) is from: r/{subreddit2}\n\n'
-                    f'Both files must be from the same subreddit.')
-                return False
-        
-        # Process files
-        files_to_process = []
-        if file1:
-            files_to_process.append((file1, 'post'))
-        if file2:
-            files_to_process.append((file2, 'comment'))
-        
-        for filepath, file_type in files_to_process:
-            if not os.path.isfile(filepath):
-                continue
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        line = line.strip()
-                        if not line:
-                            continue
-                        try:
-                            obj = json.loads(line)
-                        except json.JSONDecodeError:
-                            continue
-                        
-                        self.total_posts += 1
-                        
-                        # Extract subreddit
-                        subreddit = obj.get('subreddit')
-                        if not subreddit:
-                            subreddit_prefixed = obj.get('subreddit_name_prefixed', '')
-                            if subreddit_prefixed.startswith('r/'):
-                                subreddit = subreddit_prefixed[2:]
-                            else:
-                                subreddit = subreddit_prefixed
-                        if subreddit:
-                            self.subreddit_counts[subreddit] += 1
-                        
-                        # Extract username
-                        author = obj.get('author')
-                        if author and author.lower() not in ('[deleted]', 'automoderator'):
-                            self.usernames.add(author)
-                            self.user_contributions[author] += 1
-                        
-                        # Extract timestamp
-                        ts = obj.get('created_utc') or obj.get('created') or obj.get('timestamp')
-                        dt = self._parse_timestamp(ts)
-                        if dt:
-                            # Store raw timestamp (assume UTC if it's a Unix timestamp)
-                            if isinstance(ts, (int, float)):
-                                dt_utc = datetime.datetime.utcfromtimestamp(ts)
-                                dt_utc = pytz.UTC.localize(dt_utc)
-                            else:
-                                if dt.tzinfo is None:
-                                    dt_utc = pytz.UTC.localize(dt)
-                                else:
-                                    dt_utc = dt.astimezone(pytz.UTC)
-                            
-                            self.raw_timestamps.append(dt_utc)
-                            date_key = dt_utc.date()
-                            self.activity_by_date[date_key] += 1
-                            dates_list.append(date_key)
-            except Exception as e:
-                messagebox.showerror('Error', f'Failed to read {filepath}: {e}')
-                return False
-        
-        if dates_list:
-            self.date_range = (min(dates_list), max(dates_list))
-        
-        return True
-
     def _analyze(self):
         p1 = self.file1_path.get()
         p2 = self.file2_path.get()
@@ -397,20 +198,114 @@ class SubredditAnalysisTab(ttk.Frame):
         if not p1 or not p2:
             messagebox.showerror('Error', 'Both JSONL files are required.\nFile A (Posts) and File B (Comments) must be provided.')
             return
-        
-        if not self._load_jsonl_files():
+        if self._worker is not None:
+            return
+
+        # Load on a background thread; _poll_ingest shows progress and partial results
+        self._worker = IngestWorker([(p1, 'post'), (p2, 'comment')], 'subreddit', workers=INGEST_WORKERS,
+                                    snapshot_interval=INGEST_SNAPSHOT_INTERVAL,
+                                    store=AggregateStore(AGGREGATE_CACHE_DIR), top_k=TOP_CONTRIBUTORS,
+                                    sketch=self.sketch_var.get()).start()
+        self._snapshot_version = 0
+        self.analyze_button.config(state='disabled')
+        self.cancel_button.config(state='normal')
+        self.load_progress.config(value=0)
+        self.load_status_label.config(text='Reading files...')
+        self.after(INGEST_POLL_MS, self._poll_ingest)
+
+    def _cancel_analysis(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            self.load_status_label.config(text='Cancelling...')
+
+    def _poll_ingest(self):
+        worker = self._worker
+        if worker is None:
+            return
+        stats = worker.progress.stats()
+        if stats['total_bytes']:
+            self.load_progress.config(value=min(100, stats['bytes'] * 100 / stats['total_bytes']))
+        if not worker.progress.cancelled:
+            self.load_status_label.config(text=worker.progress.describe())
+
+        # Validate that both files are from the same subreddit as soon as both heads were read
+        identities = worker.progress.identities
+        if identities and not worker.progress.cancelled and identities[0].lower() != identities[1].lower():
+            worker.cancel()
+            self._worker = None
+            self._reset_load_controls('Idle')
+            messagebox.showerror('Validation Error', 
+                f'Subreddit mismatch:\n'
+                f'File A (Posts) is from: r/{identities[0]}\n'
+                f'File B (Comments) is from: r/{identities[1]}\n\n'
+                f'Both files must be from the same subreddit.')
             messagebox.showerror('Error', 'Failed to read JSONL files.')
             return
-        
-        # Update all views
+
+        if worker.done:
+            self._worker = None
+            self._finish_analysis(worker)
+            return
+
+        version, partial = worker.progress.snapshot()
+        if partial is not None and version != self._snapshot_version:
+            self._snapshot_version = version
+            self._apply_aggregate(partial)
+            self._update_stats()
+            self._update_contributors_view()
+        self.after(INGEST_POLL_MS, self._poll_ingest)
+
+    def _reset_load_controls(self, status):
+        self.analyze_button.config(state='normal')
+        self.cancel_button.config(state='disabled')
+        self.load_status_label.config(text=status)
+
+    def _finish_analysis(self, worker):
+        error = worker.error
+        if isinstance(error, IngestCancelled):
+            _, partial = worker.progress.snapshot()
+            if partial is None:
+                self._reset_load_controls('Cancelled')
+                return
+            self._reset_load_controls(f'Cancelled - showing the first {partial.total:,} posts/comments')
+            self._apply_aggregate(partial)
+            self._update_views()
+            return
+        if error is not None:
+            self._reset_load_controls('Idle')
+            if isinstance(error, ValidationError):
+                label = 'File A (Posts)' if error.path == worker.sources[0][0] else 'File B (Comments)'
+                messagebox.showerror('Validation Error', f'{label} validation failed:\n{error}')
+            elif isinstance(error, OSError):
+                messagebox.showerror('Error', f'Failed to read {error.filename}: {error}')
+            else:
+                messagebox.showerror('Error', f'Failed to read JSONL files:\n{error}')
+            messagebox.showerror('Error', 'Failed to read JSONL files.')
+            return
+
+        self._reset_load_controls(worker.progress.describe())
+        self.load_progress.config(value=100)
+        self._apply_aggregate(ActivityAggregate.merged(worker.result))
+        self._update_views()
+        messagebox.showinfo('Analysis Complete', f'Analyzed {self.total_posts} posts/comments successfully.')
+
+    def _update_views(self):
+        """Update all views."""
         self._update_stats()
         self._update_username_view()
         self._update_contributors_view()
         self._populate_year_dropdown()
         self._update_activity_tracker()
         self._update_hour_heatmap()
-        
-        messagebox.showinfo('Analysis Complete', f'Analyzed {self.total_posts} posts/comments successfully.')
+
+    def _apply_aggregate(self, aggregate):
+        """Point the views' data at a (partial or final) aggregate."""
+        self.subreddit_counts = aggregate.subreddit_counts
+        self.user_contributions = aggregate.user_counts
+        self.activity_by_date = aggregate.date_counts
+        self.aggregate = aggregate
+        self.total_posts = aggregate.total
+        self.date_range = aggregate.date_range
 
     def _update_stats(self):
         """Calculate and display exploratory statistics."""
@@ -430,7 +325,12 @@ class SubredditAnalysisTab(ttk.Frame):
             sub_name = next(iter(self.subreddit_counts))
             stats_lines.append(f'Subreddit:\n{sub_name}\n')
         stats_lines.append(f'Total Posts/Comments:\n{self.total_posts:,}\n')
-        stats_lines.append(f'Unique Usernames:\n{len(self.usernames):,}\n')
+        unique_users = self.aggregate.unique_users()
+        if self.aggregate.sketch:
+            error = self.aggregate.user_sketch.relative_error
+            stats_lines.append(f'Unique Usernames:\n~{unique_users:,} (\u00b1{error:.1%})\n')
+        else:
+            stats_lines.append(f'Unique Usernames:\n{unique_users:,}\n')
         stats_lines.append(f'Unique Subreddits:\n{len(self.subreddit_counts):,}\n')
         
         # Posts per day (PPD)
@@ -448,167 +348,37 @@ class SubredditAnalysisTab(ttk.Frame):
             stats_lines.append(f'Posts per Hour (PPH):\n{pph:.2f}\n')
         
         # Average posts per user
-        if len(self.usernames) > 0:
-            avg_per_user = self.total_posts / len(self.usernames)
+        if unique_users > 0:
+            avg_per_user = self.total_posts / unique_users
             stats_lines.append(f'Avg Posts per User:\n{avg_per_user:.2f}\n')
+
+        if self.aggregate.sketch:
+            max_error = self.aggregate.user_top.max_error
+            stats_lines.append(f'Top Contributor Counts:\nmay be up to {max_error:,} too high\n')
                 
         self.stats_text.insert('1.0', '\n'.join(stats_lines))
         self.stats_text.config(state='disabled')
 
     def _update_username_view(self):
         """Update unique usernames list."""
-        for row in self.username_tree.get_children():
-            self.username_tree.delete(row)
-        
-        sorted_users = sorted(self.usernames)
-        for u in sorted_users:
-            self.username_tree.insert('', 'end', values=(u,))
+        self._username_table = ColumnTable(('Username',), {'Username': sorted(self.user_contributions)},
+                                           presorted=('Username',))
+        self.username_tree.set_rows(self._username_table.view())
+        self.username_tree.heading('Username', command=lambda: self._sort_username_tree(True))
 
     def _update_contributors_view(self):
-        """Update top 20 contributors list."""
-        for row in self.contributors_tree.get_children():
-            self.contributors_tree.delete(row)
-        
-        # Sort by contribution count (descending) and take top 20
-        sorted_contributors = sorted(self.user_contributions.items(), key=lambda x: x[1], reverse=True)[:20]
-        
-        for username, count in sorted_contributors:
-            self.contributors_tree.insert('', 'end', values=(username, count))
+        """Update top contributors list."""
+        # Maintained while ingesting, so this is O(TOP_CONTRIBUTORS) rather than a sort of every user
+        sorted_contributors = self.aggregate.top_contributors() if self.aggregate is not None else []
+        self._contributors_table = ColumnTable(
+            ('Username', 'Posts/Comments'),
+            {'Username': [u for u, _ in sorted_contributors], 'Posts/Comments': [c for _, c in sorted_contributors]},
+        )
+        self.contributors_tree.set_rows(self._contributors_table.view(), keep_position=True)
 
     def _update_activity_tracker(self):
         """Update activity tracker (GitHub-style calendar)."""
-        self.activity_canvas.delete('all')
-        
-        if not self.activity_by_date:
-            self.activity_canvas.create_text(400, 100, text='No activity data available', fill='gray')
-            return
-
-        # Filter by year if selected
-        selected_year = self.activity_year_var.get()
-        filtered_dates = {}
-        if selected_year == 'All':
-            filtered_dates = self.activity_by_date
-        else:
-            try:
-                year = int(selected_year)
-                filtered_dates = {date: count for date, count in self.activity_by_date.items() if date.year == year}
-            except (ValueError, TypeError):
-                filtered_dates = self.activity_by_date
-
-        if not filtered_dates:
-            self.activity_canvas.create_text(400, 100, text=f'No activity data for year {selected_year}', fill='gray')
-            return
-
-        # Determine the year to display
-        if selected_year == 'All':
-            all_years = sorted(set(date.year for date in self.activity_by_date.keys()))
-            if not all_years:
-                return
-            display_year = all_years[-1]
-        else:
-            try:
-                display_year = int(selected_year)
-            except (ValueError, TypeError):
-                return
-
-        # Generate all days for the selected year
-        year_start = datetime.date(display_year, 1, 1)
-        year_end = datetime.date(display_year, 12, 31)
-        is_leap = (display_year % 4 == 0 and display_year % 100 != 0) or (display_year % 400 == 0)
-        days_in_year = 366 if is_leap else 365
-        
-        dates_list = []
-        current_date = year_start
-        while current_date <= year_end:
-            dates_list.append(current_date)
-            current_date += datetime.timedelta(days=1)
-        
-        year_filtered = {date: count for date, count in filtered_dates.items() if date.year == display_year}
-        max_activity = max(year_filtered.values()) if year_filtered else 1
-        
-        # Draw grid
-        square_size = 12
-        spacing = 2
-        start_x = 50
-        start_y = 30
-        days_per_row = 7
-        row_height = square_size + spacing
-        col_width = square_size + spacing
-
-        # Draw day labels
-        day_labels = ['Mon', '', 'Wed', '', 'Fri', '', 'Sun']
-        for day_idx in range(7):
-            if day_labels[day_idx]:
-                self.activity_canvas.create_text(start_x - 25, start_y + day_idx * row_height + square_size // 2, 
-                                                text=day_labels[day_idx], anchor='e', font=('Arial', 8))
-
-        # Track months for labels
-        current_month = None
-        month_start_col = 0
-        
-        # Draw all squares
-        for day_idx, date in enumerate(dates_list):
-            row = day_idx % days_per_row
-            col = day_idx // days_per_row
-            
-            if current_month is None or date.month != current_month:
-                if current_month is not None:
-                    month_cols = col - month_start_col
-                    x_pos = start_x + month_start_col * col_width + (month_cols * col_width) // 2
-                    month_label = datetime.date(display_year, current_month, 1).strftime('%b')
-                    self.activity_canvas.create_text(x_pos, start_y - 15, text=month_label, anchor='n', font=('Arial', 8))
-                current_month = date.month
-                month_start_col = col
-            
-            activity = year_filtered.get(date, 0)
-            
-            # Color intensity
-            if activity == 0:
-                color = '#ebedf0'
-            elif activity < max_activity * 0.25:
-                color = '#c6e48b'
-            elif activity < max_activity * 0.5:
-                color = '#7bc96f'
-            elif activity < max_activity * 0.75:
-                color = '#239a3b'
-            else:
-                color = '#196127'
-
-            x = start_x + col * col_width
-            y = start_y + row * row_height
-            
-            rect_id = self.activity_canvas.create_rectangle(
-                x, y, x + square_size, y + square_size,
-                fill=color, outline='#ffffff', width=1
-            )
-            
-            if activity > 0:
-                def make_callback(d, a):
-                    return lambda e: self._show_date_info(d, a)
-                self.activity_canvas.tag_bind(rect_id, '<Button-1>', make_callback(date, activity))
-        
-        # Draw last month label
-        if current_month is not None:
-            month_cols = (len(dates_list) // days_per_row) - month_start_col
-            x_pos = start_x + month_start_col * col_width + (month_cols * col_width) // 2
-            month_label = datetime.date(display_year, current_month, 1).strftime('%b')
-            self.activity_canvas.create_text(x_pos, start_y - 15, text=month_label, anchor='n', font=('Arial', 8))
-
-        # Update scroll region
-        num_cols = (days_in_year + days_per_row - 1) // days_per_row
-        total_width = num_cols * col_width + start_x + 20
-        total_height = 7 * row_height + start_y + 20
-        self.activity_canvas.configure(scrollregion=(0, 0, total_width, total_height))
-
-        # Add legend
-        legend_y = start_y + 7 * row_height + 10
-        self.activity_canvas.create_text(start_x, legend_y, text='Less', anchor='w', font=('Arial', 8))
-        colors = ['#ebedf0', '#c6e48b', '#7bc96f', '#239a3b', '#196127']
-        labels = ['No activity', 'Low', 'Medium', 'High', 'Very High']
-        for i, (color, label) in enumerate(zip(colors, labels)):
-            x = start_x + 100 + i * 80
-            self.activity_canvas.create_rectangle(x, legend_y - 5, x + 12, legend_y + 7, fill=color, outline='white')
-            self.activity_canvas.create_text(x + 18, legend_y + 1, text=label, anchor='w', font=('Arial', 7))
+        self.activity_canvas.show(self.activity_by_date, self.activity_year_var.get())
 
     def _on_timezone_changed(self):
         """Handle timezone change."""
@@ -622,90 +392,11 @@ class SubredditAnalysisTab(ttk.Frame):
 
     def _update_hour_heatmap(self):
         """Update hour heatmap."""
-        self.hour_canvas.delete('all')
-        
-        if not self.raw_timestamps:
-            self.hour_canvas.create_text(400, 125, text='No activity data available', fill='gray')
+        if self.aggregate is None or not self.aggregate.hour_counts:
+            self.hour_canvas.show(None)
             return
-
         # Recalculate hour/day data with current timezone
-        hour_day_data = collections.defaultdict(lambda: collections.defaultdict(int))
-        for dt_utc in self.raw_timestamps:
-            dt_local = dt_utc.astimezone(self.selected_timezone)
-            hour = dt_local.hour
-            day_of_week = dt_local.weekday()
-            hour_day_data[day_of_week][hour] += 1
-
-        max_count = 0
-        for day_data in hour_day_data.values():
-            if day_data:
-                max_count = max(max_count, max(day_data.values()))
-        
-        if max_count == 0:
-            self.hour_canvas.create_text(400, 125, text='No activity data available', fill='gray')
-            return
-
-        # Draw heatmap
-        cell_size = 18
-        spacing = 2
-        start_x = 60
-        start_y = 30
-        num_hours = 24
-        num_days = 7
-        
-        day_labels = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-        
-        for day_idx in range(num_days):
-            y_pos = start_y + day_idx * (cell_size + spacing) + cell_size // 2
-            self.hour_canvas.create_text(start_x - 5, y_pos, text=day_labels[day_idx], anchor='e', font=('Arial', 9))
-
-        for hour in range(num_hours):
-            if hour % 2 == 0:
-                x_pos = start_x + hour * (cell_size + spacing) + cell_size // 2
-                self.hour_canvas.create_text(x_pos, start_y - 15, text=str(hour), anchor='n', font=('Arial', 8))
-
-        for day_idx in range(num_days):
-            day_data = hour_day_data.get(day_idx, {})
-            for hour in range(num_hours):
-                count = day_data.get(hour, 0)
-                intensity = count / max_count if max_count > 0 else 0
-                
-                if intensity == 0:
-                    color = '#ebedf0'
-                elif intensity < 0.25:
-                    color = '#c6e48b'
-                elif intensity < 0.5:
-                    color = '#7bc96f'
-                elif intensity < 0.75:
-                    color = '#239a3b'
-                else:
-                    color = '#196127'
-
-                x = start_x + hour * (cell_size + spacing)
-                y = start_y + day_idx * (cell_size + spacing)
-
-                rect_id = self.hour_canvas.create_rectangle(
-                    x, y, x + cell_size, y + cell_size,
-                    fill=color, outline='#ffffff', width=1
-                )
-
-                if count > 0:
-                    def make_callback(d, h, c):
-                        return lambda e: self._show_hour_day_info(d, h, c)
-                    self.hour_canvas.tag_bind(rect_id, '<Button-1>', make_callback(day_labels[day_idx], hour, count))
-
-        # Add legend
-        legend_y = start_y + num_days * (cell_size + spacing) + 15
-        self.hour_canvas.create_text(start_x, legend_y, text='Less', anchor='w', font=('Arial', 8))
-        colors = ['#ebedf0', '#c6e48b', '#7bc96f', '#239a3b', '#196127']
-        labels = ['No activity', 'Low', 'Medium', 'High', 'Very High']
-        for i, (color, label) in enumerate(zip(colors, labels)):
-            x = start_x + 50 + i * 70
-            self.hour_canvas.create_rectangle(x, legend_y - 5, x + 12, legend_y + 7, fill=color, outline='white')
-            self.hour_canvas.create_text(x + 18, legend_y + 1, text=label, anchor='w', font=('Arial', 7))
-        
-        self.hour_canvas.create_text(start_x + (num_hours * (cell_size + spacing)) // 2, legend_y + 20, 
-                                    text='Hour of Day (0-23)', anchor='n', font=('Arial', 9))
+        self.hour_canvas.show(self.aggregate.hour_day_counts(self.selected_timezone))
 
     def _populate_year_dropdown(self):
         """Populate year dropdown."""
@@ -725,25 +416,24 @@ class SubredditAnalysisTab(ttk.Frame):
         """Show hour and day info."""
         messagebox.showinfo('Activity Info', f'Day: {day_name}\nHour: {hour:02d}:00\nActivity: {count} posts/comments')
 
-    def _sort_username_tree(self):
-        data = [(self.username_tree.set(k, 'Username'), k) for k in self.username_tree.get_children('')]
-        data.sort()
-        for index, (_, k) in enumerate(data):
-            self.username_tree.move(k, '', index)
+    def _sort_username_tree(self, reverse):
+        self.username_tree.set_rows(self._username_table.view('Username', reverse))
+        self.username_tree.heading('Username', command=lambda: self._sort_username_tree(not reverse))
+
+    def _on_double_click_user(self, row):
+        webbrowser.open(f'https://www.reddit.com/user/{row[0]}')
 
     def _sort_contributors_tree(self, col, reverse):
-        data = [(self.contributors_tree.set(k, col), k) for k in self.contributors_tree.get_children('')]
-        if col == 'Posts/Comments':
-            data.sort(key=lambda x: int(x[0]) if x[0].isdigit() else 0, reverse=reverse)
-        else:
-            data.sort(key=lambda x: x[0].lower(), reverse=reverse)
-        for index, (_, k) in enumerate(data):
-            self.contributors_tree.move(k, '', index)
+        self.contributors_tree.set_rows(self._contributors_table.view(col, reverse))
         self.contributors_tree.heading(col, command=lambda: self._sort_contributors_tree(col, not reverse))
 
     def _export_usernames(self):
         """Export usernames to TXT file."""
-        if not self.username_tree.get_children():
+        rows = self.username_tree.rows
+        if not rows and self.aggregate is not None and self.aggregate.sketch:
+            messagebox.showerror('Error', 'Usernames are not kept in sketch mode.\nAnalyze again without it to export them.')
+            return
+        if not rows:
             messagebox.showerror('Error', 'No data to export.')
             return
         path = filedialog.asksaveasfilename(defaultextension='.txt', filetypes=[('Text files', '*.txt')])
@@ -751,8 +441,8 @@ class SubredditAnalysisTab(ttk.Frame):
             return
         try:
             with open(path, 'w', encoding='utf-8') as f:
-                for r in self.username_tree.get_children():
-                    f.write(self.username_tree.set(r, 'Username') + '\n')
-            messagebox.showinfo('Exported', f'Exported {len(self.username_tree.get_children())} usernames to {path}')
+                for (username,) in rows:
+                    f.write(username + '\n')
+            messagebox.showinfo('Exported', f'Exported {len(rows)} usernames to {path}')
         except Exception as e:
             messagebox.showerror('Error', f'Failed to export: {e}')
@@ -0,0 +1,13 @@
+"""Reusable widgets for the GUI tabs."""
+
+from .activity_grid import ActivityCalendar, HourHeatmap
+from .table_data import ColumnTable, TableView
+from .virtual_tree import VirtualTreeview
+
+__all__ = [
+    'ActivityCalendar',
+    'HourHeatmap',
+    'ColumnTable',
+    'TableView',
+    'VirtualTreeview',
+]
@@ -0,0 +1,225 @@
+"""Activity calendar and hour-of-week heatmap painted into a single image.
+
+Cells are not canvas items: each row of cells is written into one
+PhotoImage with a single `put` (one pixel line, tiled down the row's
+height), and one canvas-level click handler maps the pointer position back
+to a cell. Redrawing a multi-year calendar therefore costs a few Tcl calls
+per week row instead of a rectangle and a binding per day.
+"""
+
+import datetime
+import tkinter as tk
+
+LEVEL_COLORS = ['#ebedf0', '#c6e48b', '#7bc96f', '#239a3b', '#196127']
+LEVEL_LABELS = ['No activity', 'Low', 'Medium', 'High', 'Very High']
+
+
+def activity_level(count, max_count) -> int:
+    """Map a count to a color level 0-4 relative to the largest count shown."""
+    if count <= 0 or max_count <= 0:
+        return 0
+    intensity = count / max_count
+    if intensity < 0.25:
+        return 1
+    if intensity < 0.5:
+        return 2
+    if intensity < 0.75:
+        return 3
+    return 4
+
+
+class CellGridCanvas(tk.Canvas):
+    """Canvas showing grids of square cells painted into one PhotoImage.
+
+    Subclasses call `begin` and then `paint_grid` for each block of cells;
+    `on_click(*payload)` is called when a cell that has a payload is clicked.
+    Labels and legends are ordinary canvas text items.
+    """
+
+    def __init__(self, parent, on_click=None, **kwargs):
+        super().__init__(parent, **kwargs)
+        self._on_click = on_click
+        self._image = None
+        self._grids = []
+        self.bind('<Button-1>', self._handle_click)
+
+    def begin(self, width: int, height: int):
+        """Clear the canvas and start a transparent width x height image at (0, 0)."""
+        self.delete('all')
+        self._grids = []
+        if self._image is None:
+            self._image = tk.PhotoImage(master=self, width=width, height=height)
+        else:
+            self._image.blank()
+            self._image.configure(width=width, height=height)
+        self.create_image(0, 0, image=self._image, anchor='nw')
+
+    def clear(self):
+        self.delete('all')
+        self._grids = []
+
+    def paint_grid(self, x0: int, y0: int, colors, cell_size: int, spacing: int, payloads: dict):
+        """Paint rows of cell colors (None = no cell) with their top-left cell at (x0, y0).
+
+        payloads maps (row, column) to the arguments passed to on_click.
+        """
+        background = self.cget('bg')
+        gap = [background] * spacing
+        for row, row_colors in enumerate(colors):
+            pixels = []
+            for color in row_colors:
+                pixels.extend([color or background] * cell_size)
+                pixels.extend(gap)
+            if not pixels:
+                continue
+            y = y0 + row * (cell_size + spacing)
+            self._image.put('{' + ' '.join(pixels) + '}', to=(x0, y, x0 + len(pixels), y + cell_size))
+        self._grids.append((x0, y0, cell_size, spacing, payloads))
+
+    def _handle_click(self, event):
+        x = self.canvasx(event.x)
+        y = self.canvasy(event.y)
+        for x0, y0, cell_size, spacing, payloads in self._grids:
+            pitch = cell_size + spacing
+            dx, dy = int(x - x0), int(y - y0)
+            if dx < 0 or dy < 0 or dx % pitch >= cell_size or dy % pitch >= cell_size:
+                continue
+            payload = payloads.get((dy // pitch, dx // pitch))
+            if payload is not None and self._on_click:
+                self._on_click(*payload)
+                return
+
+    def draw_legend(self, x: int, y: int, indent: int, step: int):
+        self.create_text(x, y, text='Less', anchor='w', font=('Arial', 8))
+        for i, (color, label) in enumerate(zip(LEVEL_COLORS, LEVEL_LABELS)):
+            lx = x + indent + i * step
+            self.create_rectangle(lx, y - 5, lx + 12, y + 7, fill=color, outline='white')
+            self.create_text(lx + 18, y + 1, text=label, anchor='w', font=('Arial', 7))
+
+
+class ActivityCalendar(CellGridCanvas):
+    """GitHub-style calendar of daily activity: one column per week, one row per weekday.
+
+    show(activity_by_date, 'All') stacks every year, most recent first, on a
+    common color scale; on_click(date, count) is called for active days.
+    """
+
+    SQUARE = 12
+    SPACING = 2
+    START_X = 50
+    START_Y = 30
+    MONTH_LABEL_HEIGHT = 15
+    BLOCK_GAP = 20
+
+    def show(self, activity_by_date: dict, selection: str = 'All'):
+        if not activity_by_date:
+            self.clear()
+            self.create_text(400, 100, text='No activity data available', fill='gray')
+            return
+
+        by_year = {}
+        for date, count in activity_by_date.items():
+            by_year.setdefault(date.year, {})[date] = count
+        if selection == 'All':
+            years = sorted(by_year, reverse=True)
+        else:
+            try:
+                years = [int(selection)]
+            except (ValueError, TypeError):
+                self.clear()
+                self.create_text(400, 100, text='Invalid year selection', fill='gray')
+                return
+            if years[0] not in by_year:
+                self.clear()
+                self.create_text(400, 100, text=f'No activity data for year {selection}', fill='gray')
+                return
+        max_activity = max(max(by_year[year].values()) for year in years)
+
+        pitch = self.SQUARE + self.SPACING
+        block_height = self.MONTH_LABEL_HEIGHT + 7 * pitch + self.BLOCK_GAP
+        width = self.START_X + 54 * pitch + 20
+        cells_bottom = self.START_Y + (len(years) - 1) * block_height + 7 * pitch
+        self.begin(width, cells_bottom)
+
+        for block, year in enumerate(years):
+            y0 = self.START_Y + block * block_height
+            self._draw_year(year, by_year[year], max_activity, y0, stacked=len(years) > 1)
+
+        legend_y = cells_bottom + 10
+        self.draw_legend(self.START_X, legend_y, 100, 80)
+        self.configure(scrollregion=(0, 0, width, legend_y + 20))
+
+    def _draw_year(self, year: int, counts: dict, max_activity, y0: int, stacked: bool):
+        pitch = self.SQUARE + self.SPACING
+        first = datetime.date(year, 1, 1)
+        days = (datetime.date(year, 12, 31) - first).days + 1
+        # Row = weekday (Mon=0), column = week, counting from the week of Jan 1
+        offset = first.weekday()
+        num_cols = (offset + days + 6) // 7
+        colors = [[None] * num_cols for _ in range(7)]
+        payloads = {}
+        month_cols = {}
+        for day in range(days):
+            date = first + datetime.timedelta(days=day)
+            col, row = divmod(offset + day, 7)
+            activity = counts.get(date, 0)
+            colors[row][col] = LEVEL_COLORS[activity_level(activity, max_activity)]
+            if activity > 0:
+                payloads[(row, col)] = (date, activity)
+            month_cols.setdefault(date.month, [col, col])[1] = col
+        self.paint_grid(self.START_X, y0, colors, self.SQUARE, self.SPACING, payloads)
+
+        for row, label in ((0, 'Mon'), (2, 'Wed'), (4, 'Fri'), (6, 'Sun')):
+            self.create_text(self.START_X - 25, y0 + row * pitch + self.SQUARE // 2,
+                             text=label, anchor='e', font=('Arial', 8))
+        for month, (start_col, end_col) in month_cols.items():
+            x = self.START_X + (start_col + end_col + 1) * pitch // 2
+            self.create_text(x, y0 - 15, text=datetime.date(year, month, 1).strftime('%b'),
+                             anchor='n', font=('Arial', 8))
+        if stacked:
+            self.create_text(self.START_X - 45, y0 - 15, text=str(year), anchor='nw', font=('Arial', 8, 'bold'))
+
+
+class HourHeatmap(CellGridCanvas):
+    """Activity by weekday (rows, Mon-Sun) and hour (columns, 0-23).
+
+    on_click(day_name, hour, count) is called for cells with activity.
+    """
+
+    CELL = 18
+    SPACING = 2
+    START_X = 60
+    START_Y = 30
+    DAY_LABELS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+    def show(self, hour_day_data):
+        """Draw a 7x24 grid of counts (as returned by ActivityAggregate.hour_day_counts), or None."""
+        max_count = max(max(day_data) for day_data in hour_day_data) if hour_day_data else 0
+        if max_count == 0:
+            self.clear()
+            self.create_text(400, 125, text='No activity data available', fill='gray')
+            return
+
+        pitch = self.CELL + self.SPACING
+        num_hours = 24
+        self.begin(self.START_X + num_hours * pitch, self.START_Y + 7 * pitch)
+        colors = []
+        payloads = {}
+        for day_idx, day_data in enumerate(hour_day_data):
+            colors.append([LEVEL_COLORS[activity_level(count, max_count)] for count in day_data])
+            for hour, count in enumerate(day_data):
+                if count > 0:
+                    payloads[(day_idx, hour)] = (self.DAY_LABELS[day_idx], hour, count)
+        self.paint_grid(self.START_X, self.START_Y, colors, self.CELL, self.SPACING, payloads)
+
+        for day_idx, label in enumerate(self.DAY_LABELS):
+            y_pos = self.START_Y + day_idx * pitch + self.CELL // 2
+            self.create_text(self.START_X - 5, y_pos, text=label, anchor='e', font=('Arial', 9))
+        for hour in range(0, num_hours, 2):
+            x_pos = self.START_X + hour * pitch + self.CELL // 2
+            self.create_text(x_pos, self.START_Y - 15, text=str(hour), anchor='n', font=('Arial', 8))
+
+        legend_y = self.START_Y + 7 * pitch + 15
+        self.draw_legend(self.START_X, legend_y, 50, 70)
+        self.create_text(self.START_X + (num_hours * pitch) // 2, legend_y + 20,
+                         text='Hour of Day (0-23)', anchor='n', font=('Arial', 9))
@@ -0,0 +1,91 @@
+"""Columnar table data with cached sort orders and filters, for VirtualTreeview."""
+
+from collections.abc import Sequence
+
+
+class ColumnTable:
+    """Rows stored as one list per column, plus typed sort keys.
+
+    `columns` names the displayed columns (the order of each row tuple);
+    `values` maps every column name to its list of values and may hold
+    extra columns used only for filtering. `sort_keys` maps a column to a
+    list of comparable keys (ints, ISO dates, lowercase text) and defaults
+    to the values themselves. The sort permutation of a column is computed
+    on first use and cached, as is the index of rows matching a filter, so
+    re-sorting or re-filtering only builds a new list of row indices.
+    """
+
+    def __init__(self, columns, values: dict, sort_keys: dict | None = None, presorted=()):
+        self.columns = tuple(columns)
+        self._values = values
+        self._display = [values[c] for c in self.columns]
+        self._sort_keys = sort_keys or {}
+        lengths = {len(v) for v in values.values()}
+        if len(lengths) > 1:
+            raise ValueError('all columns must have the same length')
+        self._length = lengths.pop() if lengths else 0
+        # Columns whose rows are already in ascending key order need no sort
+        self._orders = {column: range(self._length) for column in presorted}
+        self._masks = {}
+
+    def __len__(self):
+        return self._length
+
+    def row(self, index: int) -> tuple:
+        return tuple(column[index] for column in self._display)
+
+    def column_values(self, column):
+        return self._values[column]
+
+    def _order(self, column):
+        order = self._orders.get(column)
+        if order is None:
+            keys = self._sort_keys.get(column) or self._values[column]
+            order = sorted(range(self._length), key=keys.__getitem__)
+            self._orders[column] = order
+        return order
+
+    def _mask(self, column, value):
+        mask = self._masks.get((column, value))
+        if mask is None:
+            mask = bytearray(self._length)
+            for i, v in enumerate(self._values[column]):
+                if v == value:
+                    mask[i] = 1
+            self._masks[(column, value)] = mask
+        return mask
+
+    def view(self, sort=None, reverse=False, where=None) -> 'TableView':
+        """Return the rows ordered by column `sort` and restricted to `where` = (column, value).
+
+        Without `sort` rows keep their original order; descending order is
+        the ascending order reversed.
+        """
+        order = self._order(sort) if sort is not None else range(self._length)
+        if reverse:
+            order = order[::-1]
+        if where is not None:
+            mask = self._mask(*where)
+            order = [i for i in order if mask[i]]
+        return TableView(self, order)
+
+
+class TableView(Sequence):
+    """Read-only sequence of row tuples of a ColumnTable in a given order."""
+
+    def __init__(self, table: ColumnTable, order):
+        self.table = table
+        self.order = order
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.table.row(i) for i in self.order[index]]
+        return self.table.row(self.order[index])
+
+    def __iter__(self):
+        row = self.table.row
+        for i in self.order:
+            yield row(i)
@@ -0,0 +1,188 @@
+"""Treeview that displays a large backing sequence of rows without one item per row."""
+
+from tkinter import ttk
+
+# Used until the first item has been laid out and can be measured
+_DEFAULT_ROW_HEIGHT = 20
+_DEFAULT_HEADER_HEIGHT = 24
+
+
+class VirtualTreeview(ttk.Frame):
+    """A headings-only Treeview plus scrollbar, backed by a sequence of row tuples.
+
+    Only as many Treeview items exist as fit in the window; scrolling
+    rebinds their values from the backing rows, so showing millions of rows
+    costs the same as showing a screenful. Selection (single row), the
+    scrollbar, mouse wheel and arrow/page keys all work on row indices in
+    the backing sequence; `bind_rows` hands callbacks the row itself.
+    """
+
+    def __init__(self, parent, columns, height: int = 10, **kwargs):
+        super().__init__(parent)
+        self.tree = ttk.Treeview(self, columns=columns, show='headings', height=height,
+                                 selectmode='browse', **kwargs)
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self._on_scrollbar)
+        self.tree.pack(side='left', fill='both', expand=True)
+        self.scrollbar.pack(side='right', fill='y')
+
+        self._rows = []
+        self._offset = 0
+        self._visible = height
+        self._selected = None
+        self._items = []  # Treeview items showing rows offset, offset + 1, ...
+
+        self.tree.bind('<Configure>', self._on_configure)
+        self.tree.bind('<<TreeviewSelect>>', self._on_select)
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda e: self._scroll_by(-3))
+        self.tree.bind('<Button-5>', lambda e: self._scroll_by(3))
+        for key, delta in (('<Up>', -1), ('<Down>', 1), ('<Prior>', 'page-up'), ('<Next>', 'page-down'),
+                           ('<Home>', 'home'), ('<End>', 'end')):
+            self.tree.bind(key, lambda e, d=delta: self._move_selection(d))
+
+    # Backing data
+
+    @property
+    def rows(self):
+        return self._rows
+
+    def set_rows(self, rows, keep_position: bool = False):
+        """Show `rows` (a sequence of value tuples), from the top unless keep_position."""
+        self._rows = rows
+        if not keep_position:
+            self._offset = 0
+            self._selected = None
+        elif self._selected is not None and self._selected >= len(rows):
+            self._selected = None
+        self._render()
+
+    def heading(self, column, **kwargs):
+        return self.tree.heading(column, **kwargs)
+
+    def column(self, column, **kwargs):
+        return self.tree.column(column, **kwargs)
+
+    # Selection and lookup
+
+    def selected_index(self):
+        return self._selected
+
+    def selected_row(self):
+        return self._rows[self._selected] if self._selected is not None else None
+
+    def row_at(self, y: int):
+        """Return the index of the row displayed at widget y coordinate `y`, or None."""
+        item = self.tree.identify_row(y)
+        if not item or item not in self._items:
+            return None
+        index = self._offset + self._items.index(item)
+        return index if index < len(self._rows) else None
+
+    def bind_rows(self, sequence: str, callback):
+        """Call callback(row) when `sequence` (e.g. '<Double-1>') happens on a row."""
+        def handler(event):
+            index = self.row_at(event.y)
+            if index is not None:
+                callback(self._rows[index])
+        self.tree.bind(sequence, handler, add='+')
+
+    def see(self, index: int):
+        """Scroll so that row `index` is visible."""
+        if index < self._offset:
+            self._offset = index
+        elif index >= self._offset + self._visible:
+            self._offset = index - self._visible + 1
+        self._render()
+
+    # Rendering
+
+    def _clamp_offset(self):
+        self._offset = max(0, min(self._offset, len(self._rows) - self._visible))
+
+    def _render(self):
+        self._clamp_offset()
+        shown = max(0, min(self._visible, len(self._rows) - self._offset))
+        while len(self._items) < shown:
+            self._items.append(self.tree.insert('', 'end'))
+        if len(self._items) > shown:
+            self.tree.delete(*self._items[shown:])
+            del self._items[shown:]
+        for i, item in enumerate(self._items):
+            self.tree.item(item, values=self._rows[self._offset + i])
+
+        selected = self._selected
+        if selected is not None and self._offset <= selected < self._offset + shown:
+            item = self._items[selected - self._offset]
+            if self.tree.selection() != (item,):
+                self.tree.selection_set(item)
+            self.tree.focus(item)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+
+        total = len(self._rows)
+        if total:
+            self.scrollbar.set(self._offset / total, min(1.0, (self._offset + self._visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _measure(self):
+        """Return (header height, row height) in pixels."""
+        if self._items:
+            bbox = self.tree.bbox(self._items[0])
+            if bbox:
+                return bbox[1], bbox[3]
+        rowheight = ttk.Style().lookup('Treeview', 'rowheight')
+        return _DEFAULT_HEADER_HEIGHT, int(rowheight) if rowheight else _DEFAULT_ROW_HEIGHT
+
+    # Event handlers
+
+    def _on_configure(self, event):
+        header, row_height = self._measure()
+        visible = max(1, (event.height - header) // max(1, row_height))
+        if visible != self._visible:
+            self._visible = visible
+            self._render()
+
+    def _on_select(self, event):
+        selection = self.tree.selection()
+        # Selection cleared by scrolling the row out of view keeps the backing selection
+        if selection and selection[0] in self._items:
+            self._selected = self._offset + self._items.index(selection[0])
+
+    def _on_scrollbar(self, *args):
+        if args[0] == 'moveto':
+            self._offset = int(float(args[1]) * len(self._rows))
+            self._render()
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            self._scroll_by(amount * self._visible if args[2] == 'pages' else amount)
+
+    def _on_mousewheel(self, event):
+        # Windows reports multiples of 120 per notch, macOS small deltas
+        steps = -int(event.delta / 120) * 3 if abs(event.delta) >= 120 else -event.delta
+        self._scroll_by(steps)
+        return 'break'
+
+    def _scroll_by(self, rows: int):
+        self._offset += rows
+        self._render()
+        return 'break'
+
+    def _move_selection(self, delta):
+        if not self._rows:
+            return 'break'
+        current = self._selected if self._selected is not None else self._offset
+        if delta == 'page-up':
+            target = current - self._visible
+        elif delta == 'page-down':
+            target = current + self._visible
+        elif delta == 'home':
+            target = 0
+        elif delta == 'end':
+            target = len(self._rows) - 1
+        else:
+            target = current + delta if self._selected is not None else current
+        self._selected = max(0, min(target, len(self._rows) - 1))
+        self.see(self._selected)
+        self.tree.event_generate('<<TreeviewSelect>>')
+        return 'break'
@@ -0,0 +1,46 @@
+"""JSONL ingestion (plain or compressed) shared by the Subreddit and User Analysis tabs."""
+
+from .aggregate import (
+    ActivityAggregate, DEFAULT_TOP_K, IGNORED_AUTHORS, epoch_day_to_date, record_epoch, record_subreddit,
+    utc_offset_table,
+)
+from .decoder import available_decoders, get_decoder
+from .engine import ValidationError, VALIDATION_SAMPLE, ingest_files, iter_records, validate_head
+from .parallel import PARALLEL_MIN_BYTES, ingest_file_parallel, split_ranges
+from .progress import IngestCancelled, IngestProgress
+from .sketches import HyperLogLog, SpaceSaving, TopK
+from .store import AggregateStore, file_signature
+from .readers import COMPRESSED_SUFFIXES, is_compressed, iter_lines, open_decompressed
+from .worker import IngestWorker
+
+__all__ = [
+    'ActivityAggregate',
+    'DEFAULT_TOP_K',
+    'IGNORED_AUTHORS',
+    'epoch_day_to_date',
+    'record_epoch',
+    'record_subreddit',
+    'utc_offset_table',
+    'available_decoders',
+    'get_decoder',
+    'ValidationError',
+    'VALIDATION_SAMPLE',
+    'ingest_files',
+    'iter_records',
+    'validate_head',
+    'PARALLEL_MIN_BYTES',
+    'ingest_file_parallel',
+    'split_ranges',
+    'IngestCancelled',
+    'IngestProgress',
+    'HyperLogLog',
+    'SpaceSaving',
+    'TopK',
+    'AggregateStore',
+    'file_signature',
+    'COMPRESSED_SUFFIXES',
+    'is_compressed',
+    'iter_lines',
+    'open_decompressed',
+    'IngestWorker',
+]
@@ -0,0 +1,324 @@
+"""Aggregated activity counts built from Reddit posts/comments JSONL records."""
+
+import datetime
+import collections
+
+from .sketches import HyperLogLog, SpaceSaving, TopK
+
+# Authors excluded from per-user counts
+IGNORED_AUTHORS = ('[deleted]', 'automoderator')
+# Top contributors kept up to date while counting
+DEFAULT_TOP_K = 20
+# Space-saving counters per requested top contributor
+APPROXIMATE_COUNTERS_PER_KEY = 50
+
+# Range of epoch seconds representable as datetimes (years 1-9999)
+MIN_EPOCH = -62135596800
+MAX_EPOCH = 253402300799
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+# 1970-01-01 was a Thursday; shifts epoch hours so hour-of-week 0 is Monday 00:00
+_EPOCH_HOUR_OF_WEEK = 3 * 24
+
+
+def record_subreddit(obj: dict):
+    """Return the subreddit name of a record (without the 'r/' prefix), or None."""
+    subreddit = obj.get('subreddit')
+    if not subreddit:
+        subreddit_prefixed = obj.get('subreddit_name_prefixed') or ''
+        if subreddit_prefixed.startswith('r/'):
+            subreddit = subreddit_prefixed[2:]
+        else:
+            subreddit = subreddit_prefixed
+    return subreddit or None
+
+
+def record_epoch(obj: dict) -> int | None:
+    """Return the record's creation time as Unix epoch seconds, or None.
+
+    Prefers created_utc, then created, then timestamp. Accepts Unix
+    timestamps (numbers or numeric strings) and ISO 8601 strings; naive ISO
+    values are assumed to be UTC.
+    """
+    ts = obj.get('created_utc') or obj.get('created') or obj.get('timestamp')
+    if ts is None:
+        return None
+    if isinstance(ts, str):
+        try:
+            ts = float(ts)
+        except ValueError:
+            try:
+                dt = datetime.datetime.fromisoformat(ts.rstrip('Z'))
+            except ValueError:
+                return None
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=datetime.timezone.utc)
+            return int(dt.timestamp())
+    if isinstance(ts, (int, float)):
+        try:
+            ts = int(ts)
+        except (OverflowError, ValueError):
+            return None
+        if MIN_EPOCH <= ts <= MAX_EPOCH:
+            return ts
+    return None
+
+
+def epoch_day_to_date(day: int) -> datetime.date:
+    """Convert a day number since 1970-01-01 (UTC) to a date."""
+    return datetime.date.fromordinal(_EPOCH_ORDINAL + day)
+
+
+def utc_offset_table(tz, first_hour: int, last_hour: int):
+    """Return [(start_epoch_hour, utc_offset_seconds), ...] for `tz` over an hour range.
+
+    The offset is sampled once per week and a change is located to the hour
+    by bisection, so a multi-year range costs a few hundred tz lookups.
+    Assumes at most one transition per week, which holds for real zones.
+    """
+    def offset_at(hour):
+        # A day inside the datetime range, so local times of years 1 and 9999 don't overflow
+        hour = min(max(hour, MIN_EPOCH // 3600 + 24), MAX_EPOCH // 3600 - 24)
+        return int(datetime.datetime.fromtimestamp(hour * 3600, tz).utcoffset().total_seconds())
+
+    current = offset_at(first_hour)
+    table = [(first_hour, current)]
+    start = first_hour
+    while start < last_hour:
+        end = min(start + 168, last_hour)
+        if offset_at(end) == current:
+            start = end
+            continue
+        lo, hi = start, end
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if offset_at(mid) == current:
+                lo = mid
+            else:
+                hi = mid
+        current = offset_at(hi)
+        table.append((hi, current))
+        start = hi
+    return table
+
+
+class ActivityAggregate:
+    """Counts accumulated from posts/comments records of one or more files.
+
+    Attributes:
+        identity: subreddit or author name detected while validating the file
+        total: number of records counted
+        kind_counts: {'post': n, 'comment': n}
+        subreddit_counts: {subreddit: count}
+        user_counts: {author: count}, excluding IGNORED_AUTHORS; left
+            empty in sketch mode
+        user_top: the top_k authors by count, maintained as records are
+            added (exact TopK, or SpaceSaving in sketch mode); read it with
+            top_contributors()
+        user_sketch: HyperLogLog of the authors in sketch mode, else None;
+            read with unique_users()
+        hour_counts: {hours since 1970-01-01 00:00 UTC: count}; the calendar,
+            date range and (timezone-dependent) hour heatmap are all derived
+            from these bins, so no per-record timestamps are kept
+
+    Sketch mode bounds memory for dumps with millions of authors: no
+    per-author counts are kept, unique_users() is a HyperLogLog estimate
+    (relative standard error 0.81%) and the top contributors always come
+    from SpaceSaving (counts overestimated by at most user_top.max_error).
+    All other counts stay exact.
+    """
+
+    def __init__(self, top_k: int = DEFAULT_TOP_K, sketch: bool = False):
+        self.identity = None
+        self.total = 0
+        self.kind_counts = collections.defaultdict(int)
+        self.subreddit_counts = collections.defaultdict(int)
+        self.user_counts = collections.defaultdict(int)
+        self.hour_counts = collections.defaultdict(int)
+        self.top_k = top_k
+        self.sketch = sketch
+        if sketch:
+            self.user_sketch = HyperLogLog()
+            self.user_top = SpaceSaving(top_k * APPROXIMATE_COUNTERS_PER_KEY)
+        else:
+            self.user_sketch = None
+            self.user_top = TopK(top_k)
+        self._week_prefix = None
+
+    @property
+    def options(self) -> dict:
+        """Constructor arguments giving an empty aggregate that counts the same way."""
+        return {'top_k': self.top_k, 'sketch': self.sketch}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_week_prefix'] = None
+        return state
+
+    def add(self, obj: dict, kind: str):
+        """Count one decoded record of the given kind ('post' or 'comment')."""
+        self.total += 1
+        self.kind_counts[kind] += 1
+
+        subreddit = record_subreddit(obj)
+        if subreddit:
+            self.subreddit_counts[subreddit] += 1
+
+        author = obj.get('author')
+        if author and author.lower() not in IGNORED_AUTHORS:
+            user_top = self.user_top
+            if self.sketch:
+                self.user_sketch.add(author)
+                user_top.add(author)
+            else:
+                count = self.user_counts[author] + 1
+                self.user_counts[author] = count
+                if count > user_top.threshold:
+                    user_top.offer(author, count)
+
+        ts = record_epoch(obj)
+        if ts is not None:
+            self.hour_counts[ts // 3600] += 1
+
+    def merge(self, other: 'ActivityAggregate'):
+        """Fold another aggregate's counts into this one.
+
+        Raises:
+            ValueError: if the aggregates count authors differently (top_k, sketch)
+        """
+        if other.options != self.options:
+            raise ValueError('Cannot merge aggregates that count authors differently')
+        if self.identity is None:
+            self.identity = other.identity
+        self.total += other.total
+        for counts, other_counts in (
+            (self.kind_counts, other.kind_counts),
+            (self.subreddit_counts, other.subreddit_counts),
+            (self.hour_counts, other.hour_counts),
+        ):
+            for key, count in other_counts.items():
+                counts[key] += count
+
+        user_counts = self.user_counts
+        if self.sketch:
+            self.user_sketch.merge(other.user_sketch)
+            self.user_top.merge(other.user_top)
+        else:
+            # Counts only grow, so offering each merged count keeps TopK exact
+            offer = self.user_top.offer
+            for author, count in other.user_counts.items():
+                count += user_counts[author]
+                user_counts[author] = count
+                offer(author, count)
+        return self
+
+    @classmethod
+    def merged(cls, aggregates, **options) -> 'ActivityAggregate':
+        """Merge aggregates into a new one, counting like the first aggregate unless options are given."""
+        aggregates = list(aggregates)
+        if not options and aggregates:
+            options = aggregates[0].options
+        result = cls(**options)
+        for agg in aggregates:
+            result.merge(agg)
+        return result
+
+    def unique_users(self) -> int:
+        """Number of distinct authors; an estimate in sketch mode."""
+        if self.sketch:
+            return self.user_sketch.count()
+        return len(self.user_counts)
+
+    def top_contributors(self, n: int | None = None) -> list:
+        """Return the top n (default top_k) authors as (author, count), most active first.
+
+        In sketch mode counts may be overestimated by up to
+        user_top.max_error (see SpaceSaving).
+        """
+        return self.user_top.top(self.top_k if n is None else min(n, self.top_k))
+
+    @property
+    def date_counts(self) -> dict:
+        """{datetime.date (UTC): count}, as used by the activity calendar."""
+        day_counts = collections.defaultdict(int)
+        for hour, count in self.hour_counts.items():
+            day_counts[hour // 24] += count
+        return {epoch_day_to_date(day): count for day, count in day_counts.items()}
+
+    @property
+    def date_range(self):
+        """(first_date, last_date) in UTC, or None if no record had a timestamp."""
+        if not self.hour_counts:
+            return None
+        return epoch_day_to_date(min(self.hour_counts) // 24), epoch_day_to_date(max(self.hour_counts) // 24)
+
+    def _hour_of_week_prefix(self):
+        """Cumulative counts over the occupied 168-hour blocks: (blocks, rows).
+
+        blocks lists the blocks (hour // 168) holding any records in order,
+        and rows[k][i] is the number of records in hour-of-week i of
+        blocks[:k]. Empty blocks take no row, so a stray timestamp centuries
+        away from the rest costs one row. Rebuilt only when the aggregate
+        changed.
+        """
+        cached = self._week_prefix
+        if cached is not None and cached[0] == self.total:
+            return cached[1], cached[2]
+        blocks = sorted({hour // 168 for hour in self.hour_counts})
+        index = {block: k for k, block in enumerate(blocks)}
+        rows = [[0] * 168 for _ in range(len(blocks) + 1)]
+        for hour, count in self.hour_counts.items():
+            rows[index[hour // 168] + 1][hour % 168] += count
+        for k in range(1, len(rows)):
+            prev, row = rows[k - 1], rows[k]
+            for i in range(168):
+                row[i] += prev[i]
+        self._week_prefix = (self.total, blocks, rows)
+        return blocks, rows
+
+    def hour_day_counts(self, tz) -> list:
+        """Return a 7x24 grid [weekday][hour] of record counts in timezone `tz`.
+
+        UTC hour counts are pre-summed per hour-of-week over the occupied
+        168-hour blocks, so re-binning for a timezone only touches each DST
+        segment's two partial weeks plus 168 prefix differences, independent
+        of the number of records. Offsets are only looked up over runs of
+        consecutive occupied blocks, so gaps in the data cost nothing.
+        Offsets are applied in whole hours (sub-hour offsets such as +05:30
+        are rounded down).
+        """
+        week = [0] * 168
+        if not self.hour_counts:
+            return [week[day * 24:(day + 1) * 24] for day in range(7)]
+        blocks, rows = self._hour_of_week_prefix()
+        counts = self.hour_counts
+        first_hour, last_hour = min(counts), max(counts)
+
+        def add_hours(start, stop, shift):
+            for hour in range(start, stop):
+                count = counts.get(hour)
+                if count:
+                    week[(hour + shift) % 168] += count
+
+        run_start = 0
+        for k in range(1, len(blocks) + 1):
+            if k < len(blocks) and blocks[k] == blocks[k - 1] + 1:
+                continue
+            # blocks[run_start:k] are consecutive
+            run_first = max(blocks[run_start] * 168, first_hour)
+            run_last = min(blocks[k - 1] * 168 + 167, last_hour)
+            table = utc_offset_table(tz, run_first, run_last)
+            for i, (start, offset) in enumerate(table):
+                stop = table[i + 1][0] if i + 1 < len(table) else run_last + 1
+                shift = _EPOCH_HOUR_OF_WEEK + offset // 3600
+                start_block, stop_block = -(-start // 168), stop // 168
+                if start_block >= stop_block:
+                    add_hours(start, stop, shift)
+                    continue
+                add_hours(start, start_block * 168, shift)
+                offset_in_run = run_start - blocks[run_start]
+                hi, lo = rows[stop_block + offset_in_run], rows[start_block + offset_in_run]
+                for j in range(168):
+                    week[(j + shift) % 168] += hi[j] - lo[j]
+                add_hours(stop_block * 168, stop, shift)
+            run_start = k
+        return [week[day * 24:(day + 1) * 24] for day in range(7)]
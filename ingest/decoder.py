@@ -0,0 +1,67 @@
+"""JSON line decoders: msgspec, orjson or stdlib json, whichever is installed.
+
+msgspec can decode straight into a Struct holding only the fields the
+aggregation reads (author, subreddit, timestamps), skipping comment bodies
+and selftext without building Python objects for them. orjson decodes the
+full object but is several times faster than the stdlib. Both are optional.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+if msgspec is not None:
+    class ProjectedRecord(msgspec.Struct):
+        """A record reduced to the fields ActivityAggregate.add reads."""
+
+        author: object = None
+        subreddit: object = None
+        subreddit_name_prefixed: object = None
+        created_utc: object = None
+        created: object = None
+        timestamp: object = None
+
+        def get(self, key, default=None):
+            return getattr(self, key, default)
+
+    RECORD_TYPES = (dict, ProjectedRecord)
+else:
+    RECORD_TYPES = (dict,)
+
+
+def available_decoders():
+    """Names of the usable decoders, fastest first."""
+    names = []
+    if msgspec is not None:
+        names.append('msgspec')
+    if orjson is not None:
+        names.append('orjson')
+    names.append('json')
+    return names
+
+
+def get_decoder(name: str = 'auto', projected: bool = False):
+    """Return a function decoding one JSON line (bytes) into a record.
+
+    Records support .get() like a dict; with projected=True and msgspec
+    available they only carry the aggregation fields. Decoding errors raise
+    ValueError (or a subclass). An unavailable backend falls back to 'auto'.
+    """
+    if name == 'auto' or name not in available_decoders():
+        name = available_decoders()[0]
+    if name == 'msgspec':
+        if projected:
+            return msgspec.json.Decoder(ProjectedRecord).decode
+        return msgspec.json.Decoder().decode
+    if name == 'orjson':
+        return orjson.loads
+    return json.loads
@@ -0,0 +1,237 @@
+"""Single-pass JSONL ingestion: validation and aggregation in one streaming read."""
+
+import os
+import itertools
+
+from .aggregate import ActivityAggregate, DEFAULT_TOP_K, IGNORED_AUTHORS, record_subreddit
+from .decoder import RECORD_TYPES, get_decoder
+from .parallel import PARALLEL_MIN_BYTES, ingest_file_parallel
+from .progress import IngestProgress
+from .store import AggregateStore, file_signature
+from .readers import is_compressed, iter_lines, missing_codec
+
+# Number of leading records checked for structure and identity
+VALIDATION_SAMPLE = 10
+# Records aggregated between progress checkpoints (cancellation, partial results)
+CHECKPOINT_RECORDS = 20000
+
+
+class ValidationError(Exception):
+    """A JSONL file does not have the structure expected for its role."""
+
+    def __init__(self, path: str, message: str):
+        super().__init__(message)
+        self.path = path
+
+
+def iter_records(path: str, decoder: str = 'auto', full_records: int = VALIDATION_SAMPLE, on_block=None,
+                 start: int = 0, end: int | None = None):
+    """Yield decoded records from a (possibly compressed) JSONL file, skipping blank and malformed lines.
+
+    The first `full_records` records are decoded in full (for validation);
+    the rest are decoded with the projected decoder, which may only carry
+    the fields needed for aggregation. on_block, start and end are passed
+    to iter_lines.
+    """
+    full = get_decoder(decoder)
+    projected = get_decoder(decoder, projected=True)
+    decode = full if full_records > 0 else projected
+    decoded = 0
+    lines = iter_lines(path, on_block, start, end)
+    try:
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = decode(line)
+            except ValueError:
+                continue
+            if isinstance(obj, RECORD_TYPES):
+                decoded += 1
+                if decoded == full_records:
+                    decode = projected
+                yield obj
+    finally:
+        lines.close()
+
+
+def _record_identity(obj: dict, identity_field: str):
+    if identity_field == 'subreddit':
+        return record_subreddit(obj)
+    author = obj.get('author')
+    if author and author.lower() not in IGNORED_AUTHORS:
+        return author
+    return None
+
+
+def validate_head(head, path: str, kind: str, identity_field: str):
+    """Check the leading records of a file and return its subreddit/author identity.
+
+    Args:
+        head: first decoded records of the file
+        kind: 'post' or 'comment'
+        identity_field: 'subreddit' (all records from one subreddit) or
+            'author' (all records from one user)
+
+    Raises:
+        ValidationError: if the records don't match the expected structure
+    """
+    identity = None
+    for obj in head:
+        value = _record_identity(obj, identity_field)
+        if value:
+            if identity is None:
+                identity = value
+            elif identity.lower() != value.lower():
+                label = 'subreddit' if identity_field == 'subreddit' else 'user'
+                raise ValidationError(path, f'File is not a valid {label} JSONL file')
+
+        if not obj.get('subreddit') and not obj.get('subreddit_name_prefixed'):
+            raise ValidationError(path, f'Missing subreddit field in {path}')
+
+        if not obj.get('created_utc') and not obj.get('created'):
+            raise ValidationError(path, f'Missing timestamp field in {path}')
+
+        if kind == 'post':
+            # Posts should have 'title' or 'is_self'
+            if 'title' not in obj and 'is_self' not in obj:
+                raise ValidationError(path, f'File {path} does not appear to be a posts file (missing post-specific fields)')
+        elif kind == 'comment':
+            # Comments should have 'body' and 'link_id'
+            if 'body' not in obj or 'link_id' not in obj:
+                raise ValidationError(path, f'File {path} does not appear to be a comments file (missing comment-specific fields)')
+
+    if not head:
+        raise ValidationError(path, f'No valid JSON lines found in {path}')
+
+    if identity is None:
+        if identity_field == 'subreddit':
+            raise ValidationError(path, f'Could not determine subreddit from {path}')
+        raise ValidationError(path, f'Could not determine author from {path}. File may contain only deleted posts/comments.')
+
+    return identity
+
+
+def ingest_files(sources, identity_field: str, workers: int = 1, decoder: str = 'auto',
+                 progress: IngestProgress | None = None, store: AggregateStore | None = None,
+                 top_k: int = DEFAULT_TOP_K, sketch: bool = False):
+    """Validate and aggregate JSONL files in a single streaming pass each.
+
+    The leading records of every file are validated before any file is
+    aggregated, so a bad second file is reported without first reading the
+    whole first file. The validated records are kept and counted, so no line
+    is read twice.
+
+    Files ending in .zst, .gz or .bz2 are decompressed on the fly.
+
+    With workers > 1, uncompressed files of at least PARALLEL_MIN_BYTES are
+    instead split into newline-aligned byte ranges that are parsed in a
+    process pool and merged (only the validated head is read twice).
+
+    Args:
+        sources: iterable of (path, kind) with kind 'post' or 'comment'
+        identity_field: 'subreddit' or 'author', see validate_head
+        workers: number of processes to use for large files
+        decoder: JSON backend ('auto', 'msgspec', 'orjson' or 'json')
+        progress: optional IngestProgress receiving bytes/lines read,
+            the validated identities and periodic partial aggregates
+        store: optional AggregateStore; files it holds an up-to-date
+            aggregate for are not read at all, uncompressed files that were
+            only appended to are read from the previous end onwards, and
+            new results are saved
+        top_k, sketch: how each ActivityAggregate counts
+            authors (see ActivityAggregate); cached aggregates counted
+            differently are not reused
+
+    Returns:
+        One ActivityAggregate per source, in order.
+
+    Raises:
+        ValidationError: if a file is missing or malformed
+        OSError: if a file cannot be read
+        IngestCancelled: if progress.cancel() was called
+    """
+    sources = list(sources)
+    options = {'top_k': top_k, 'sketch': sketch}
+    opened = []
+    try:
+        # (path, kind, identity, signature, base aggregate, start offset, head, records)
+        streams = []
+        for path, kind in sources:
+            if not os.path.isfile(path):
+                raise ValidationError(path, f'File not found: {path}')
+            signature = base = None
+            start = 0
+            # With a store, plain files are read only up to the size they were signed at
+            end = None
+            if store is not None:
+                signature = file_signature(path)
+                cached = store.load(path, kind, identity_field, signature)
+                if cached is not None and cached.options == options:
+                    streams.append((path, kind, cached.identity, signature, cached, signature['size'], [], None))
+                    continue
+                if not is_compressed(path):
+                    end = signature['size']
+                    appended = store.load_appended(path, kind, identity_field, signature)
+                    if appended is not None and appended[0].options == options:
+                        base, start = appended
+            package = missing_codec(path)
+            if package:
+                raise ValidationError(path, f'Reading {path} requires the {package} package (pip install {package})')
+            on_block = progress.advance if progress is not None else None
+            if base is not None:
+                # Already validated when it was first analyzed
+                records = iter_records(path, decoder, 0, on_block, start, end)
+                opened.append(records)
+                streams.append((path, kind, base.identity, signature, base, start, [], records))
+                continue
+            records = iter_records(path, decoder, on_block=on_block, end=end)
+            opened.append(records)
+            head = list(itertools.islice(records, VALIDATION_SAMPLE))
+            identity = validate_head(head, path, kind, identity_field)
+            streams.append((path, kind, identity, signature, None, 0, head, records))
+
+        if progress is not None:
+            progress.identities = [stream[2] for stream in streams]
+
+        aggregates = []
+        base_bytes = 0
+        for path, kind, identity, signature, base, start, head, records in streams:
+            size = signature['size'] if signature is not None else os.path.getsize(path)
+            if progress is not None:
+                progress.start_file(base_bytes)
+                progress.advance(start, 0)
+            agg = base if base is not None else ActivityAggregate(**options)
+            if records is None:
+                pass
+            elif workers > 1 and not is_compressed(path) and size - start >= PARALLEL_MIN_BYTES:
+                records.close()
+                on_range = None
+                if progress is not None:
+                    def on_range(result, end, count):
+                        progress.advance(end, count)
+                        progress.checkpoint(aggregates + [agg, result])
+                agg.merge(ingest_file_parallel(path, kind, workers, decoder, on_range, start, size, options))
+            else:
+                stream = itertools.chain(head, records)
+                if progress is None:
+                    for obj in stream:
+                        agg.add(obj, kind)
+                else:
+                    while True:
+                        before = agg.total
+                        for obj in itertools.islice(stream, CHECKPOINT_RECORDS):
+                            agg.add(obj, kind)
+                        if agg.total == before:
+                            break
+                        progress.checkpoint(aggregates + [agg])
+            agg.identity = identity
+            if records is not None and store is not None:
+                store.save(path, kind, identity_field, agg, signature)
+            aggregates.append(agg)
+            base_bytes += size
+        return aggregates
+    finally:
+        for records in opened:
+            records.close()
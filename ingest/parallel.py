@@ -0,0 +1,101 @@
+"""Multi-process ingestion of a single JSONL file split into byte ranges."""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .aggregate import ActivityAggregate
+from .decoder import RECORD_TYPES, get_decoder
+
+# Files smaller than this are not worth the process start-up cost
+PARALLEL_MIN_BYTES = 64 * 1024 * 1024
+# Ranges per worker, so faster workers pick up the slack of slower ones
+CHUNKS_PER_WORKER = 4
+READ_BLOCK = 8 * 1024 * 1024
+
+
+def split_ranges(path: str, n_chunks: int, start: int = 0, end: int | None = None):
+    """Split a file (or its [start, end) byte range) into at most n_chunks ranges that begin at line starts."""
+    size = os.path.getsize(path) if end is None else end
+    if size <= start:
+        return []
+    bounds = [start]
+    with open(path, 'rb') as f:
+        for i in range(1, n_chunks):
+            pos = start + (size - start) * i // n_chunks
+            if pos <= bounds[-1]:
+                continue
+            f.seek(pos - 1)
+            f.readline()  # advance to the first line starting at or after pos
+            boundary = f.tell()
+            if bounds[-1] < boundary < size:
+                bounds.append(boundary)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def iter_range_lines(path: str, start: int, end: int):
+    """Yield the raw lines of a file within [start, end)."""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start
+        tail = b''
+        while remaining > 0:
+            block = f.read(min(READ_BLOCK, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            lines = (tail + block).split(b'\n')
+            tail = lines.pop()
+            yield from lines
+        if tail:
+            yield tail
+
+
+def ingest_range(path: str, start: int, end: int, kind: str, decoder: str = 'auto',
+                 options: dict | None = None) -> ActivityAggregate:
+    """Aggregate the records in one byte range (runs in a worker process).
+
+    options are passed to ActivityAggregate.
+    """
+    decode = get_decoder(decoder, projected=True)
+    agg = ActivityAggregate(**(options or {}))
+    for line in iter_range_lines(path, start, end):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            obj = decode(line)
+        except ValueError:
+            continue
+        if isinstance(obj, RECORD_TYPES):
+            agg.add(obj, kind)
+    return agg
+
+
+def ingest_file_parallel(path: str, kind: str, workers: int, decoder: str = 'auto', on_range=None,
+                         start: int = 0, end: int | None = None, options: dict | None = None) -> ActivityAggregate:
+    """Aggregate a file (or its [start, end) byte range) by parsing newline-aligned ranges in a process pool.
+
+    If given, on_range(result, end, records) is called after each range is
+    merged, with the partial result, the byte offset reached and the number
+    of records in the range. An exception raised by on_range cancels the
+    ranges that have not started and is propagated. options are passed to
+    ActivityAggregate.
+    """
+    ranges = split_ranges(path, workers * CHUNKS_PER_WORKER, start, end)
+    result = ActivityAggregate(**(options or {}))
+    if not ranges:
+        return result
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        futures = [pool.submit(ingest_range, path, start, end, kind, decoder, options) for start, end in ranges]
+        try:
+            # Merge in file order as partial results arrive
+            for fut, (_, end) in zip(futures, ranges):
+                part = fut.result()
+                result.merge(part)
+                if on_range is not None:
+                    on_range(result, end, part.total)
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+    return result
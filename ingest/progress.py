@@ -0,0 +1,104 @@
+"""Progress reporting, cancellation and partial results for a running ingestion."""
+
+import time
+import threading
+
+from .aggregate import ActivityAggregate
+
+
+class IngestCancelled(Exception):
+    """Raised inside the ingesting thread when the user cancelled the load."""
+
+
+class IngestProgress:
+    """Shared state between an ingesting thread and the thread displaying it.
+
+    The ingesting side calls `advance` as blocks are read and `checkpoint`
+    every few thousand records; either raises IngestCancelled once `cancel`
+    has been called. The display side reads `stats()` and `snapshot()`,
+    which never expose an aggregate that is still being written to: a
+    snapshot is a merged copy taken at most every `snapshot_interval`
+    seconds (stretched if copying becomes a noticeable share of the work).
+    """
+
+    def __init__(self, total_bytes: int = 0, snapshot_interval: float = 1.0):
+        self.total_bytes = total_bytes
+        self.snapshot_interval = snapshot_interval
+        self.identities = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._file_base = 0
+        self._file_position = 0
+        self._lines = 0
+        self._snapshot = None
+        self._snapshot_version = 0
+        self._next_snapshot = self._started + snapshot_interval
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def _check_cancelled(self):
+        if self._cancel.is_set():
+            raise IngestCancelled()
+
+    def start_file(self, base_bytes: int):
+        """Begin counting a new file whose first byte is `base_bytes` into the total."""
+        with self._lock:
+            self._file_base = base_bytes
+            self._file_position = 0
+
+    def advance(self, position: int | None, lines: int):
+        """Record that the current file was read up to `position` bytes, adding `lines`."""
+        with self._lock:
+            if position is not None:
+                self._file_position = position
+            self._lines += lines
+        self._check_cancelled()
+
+    def checkpoint(self, aggregates):
+        """Publish a merged copy of the partial aggregates if one is due."""
+        self._check_cancelled()
+        now = time.monotonic()
+        if now < self._next_snapshot:
+            return
+        snapshot = ActivityAggregate.merged(aggregates)
+        copy_seconds = time.monotonic() - now
+        with self._lock:
+            self._snapshot = snapshot
+            self._snapshot_version += 1
+        # Never spend more than ~10% of the time copying
+        self._next_snapshot = now + max(self.snapshot_interval, copy_seconds * 10)
+
+    def snapshot(self):
+        """Return (version, aggregate) of the latest partial result; aggregate may be None."""
+        with self._lock:
+            return self._snapshot_version, self._snapshot
+
+    def stats(self) -> dict:
+        """Return bytes/lines done so far and their per-second rates."""
+        with self._lock:
+            bytes_done = self._file_base + self._file_position
+            lines = self._lines
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        return {
+            'bytes': bytes_done,
+            'total_bytes': self.total_bytes,
+            'lines': lines,
+            'elapsed': elapsed,
+            'bytes_per_second': bytes_done / elapsed,
+            'lines_per_second': lines / elapsed,
+        }
+
+    def describe(self) -> str:
+        """Human-readable progress line, e.g. '120.5 of 800.0 MB (15%) - 40.2 MB/s, 85,000 lines/s'."""
+        stats = self.stats()
+        mb = 1024 * 1024
+        text = f"{stats['bytes'] / mb:.1f} of {stats['total_bytes'] / mb:.1f} MB"
+        if stats['total_bytes']:
+            text += f" ({min(100, stats['bytes'] * 100 // stats['total_bytes'])}%)"
+        return f"{text} - {stats['bytes_per_second'] / mb:.1f} MB/s, {stats['lines_per_second']:,.0f} lines/s"
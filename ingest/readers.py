@@ -0,0 +1,164 @@
+"""Line readers for plain and compressed (.zst/.gz/.bz2) JSONL files.
+
+Compressed files are decompressed as a stream, never to disk. A reader
+thread decompresses ahead into a bounded queue while the caller parses, so
+decompression and JSON decoding overlap (zlib, bz2 and zstandard release
+the GIL while working).
+"""
+
+import bz2
+import gzip
+import queue
+import threading
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Pushshift/Arctic Shift dumps are written with --long=31
+ZSTD_MAX_WINDOW = 2 ** 31
+READ_BLOCK = 1024 * 1024
+READAHEAD_BLOCKS = 8
+
+COMPRESSED_SUFFIXES = ('.zst', '.gz', '.bz2')
+
+
+def is_compressed(path: str) -> bool:
+    return path.lower().endswith(COMPRESSED_SUFFIXES)
+
+
+def missing_codec(path: str) -> str | None:
+    """Return the name of the package needed to read `path` if it isn't installed."""
+    if path.lower().endswith('.zst') and zstandard is None:
+        return 'zstandard'
+    return None
+
+
+def _open_layers(path: str):
+    """Open `path` and return (raw_file, stream); stream decompresses raw_file by extension."""
+    lower = path.lower()
+    if lower.endswith('.zst') and zstandard is None:
+        raise OSError(f'Reading {path} requires the zstandard package (pip install zstandard)')
+    raw = open(path, 'rb')
+    try:
+        if lower.endswith('.gz'):
+            return raw, gzip.GzipFile(fileobj=raw, mode='rb')
+        if lower.endswith('.bz2'):
+            return raw, bz2.BZ2File(raw, 'rb')
+        if lower.endswith('.zst'):
+            dctx = zstandard.ZstdDecompressor(max_window_size=ZSTD_MAX_WINDOW)
+            return raw, dctx.stream_reader(raw, read_size=READ_BLOCK, closefd=False)
+    except Exception:
+        raw.close()
+        raise
+    return raw, raw
+
+
+def open_decompressed(path: str):
+    """Open a file for binary reading, transparently decompressing by extension."""
+    lower = path.lower()
+    if lower.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    if lower.endswith('.bz2'):
+        return bz2.open(path, 'rb')
+    if lower.endswith('.zst'):
+        if zstandard is None:
+            raise OSError(f'Reading {path} requires the zstandard package (pip install zstandard)')
+        dctx = zstandard.ZstdDecompressor(max_window_size=ZSTD_MAX_WINDOW)
+        return dctx.stream_reader(open(path, 'rb'), read_size=READ_BLOCK, closefd=True)
+    return open(path, 'rb')
+
+
+def _read_ahead(raw, stream, blocks: queue.Queue, stop: threading.Event):
+    """Producer: queue (decompressed block, compressed bytes consumed) until EOF, error or stop."""
+    def put(item):
+        while not stop.is_set():
+            try:
+                blocks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        while True:
+            block = stream.read(READ_BLOCK)
+            if not put((block, raw.tell())) or not block:
+                return
+    except Exception as e:
+        put((e, None))
+
+
+def _split_blocks(blocks, on_block):
+    """Yield lines from an iterable of (block, position) pairs; b'' marks the end."""
+    tail = b''
+    for block, position in blocks:
+        if not block:
+            break
+        lines = (tail + block).split(b'\n')
+        tail = lines.pop()
+        if on_block is not None:
+            on_block(position, len(lines))
+        yield from lines
+    if tail:
+        if on_block is not None:
+            on_block(None, 1)
+        yield tail
+
+
+def iter_lines(path: str, on_block=None, start: int = 0, end: int | None = None):
+    """Yield the raw lines (bytes) of a plain or compressed file.
+
+    If given, on_block(position, lines) is called once per block read, with
+    the offset reached in the file on disk (compressed bytes for compressed
+    files) and the number of complete lines in the block; position is None
+    for the final unterminated line.
+
+    For plain files, reading can be limited to the byte range [start, end);
+    start should be the beginning of a line.
+    """
+    if not is_compressed(path):
+        with open(path, 'rb') as f:
+            f.seek(start)
+            if on_block is None and end is None:
+                yield from f
+                return
+            remaining = float('inf') if end is None else end - start
+
+            def blocks():
+                nonlocal remaining
+                while remaining > 0:
+                    block = f.read(int(min(READ_BLOCK, remaining)))
+                    if not block:
+                        return
+                    remaining -= len(block)
+                    yield block, f.tell()
+
+            yield from _split_blocks(blocks(), on_block)
+        return
+    if start or end is not None:
+        raise ValueError('Byte ranges are only supported for uncompressed files')
+
+    raw, stream = _open_layers(path)
+    blocks = queue.Queue(maxsize=READAHEAD_BLOCKS)
+    stop = threading.Event()
+    reader = threading.Thread(target=_read_ahead, args=(raw, stream, blocks, stop), name='jsonl-readahead', daemon=True)
+    reader.start()
+
+    def drain():
+        while True:
+            block, position = blocks.get()
+            if isinstance(block, Exception):
+                raise block
+            yield block, position
+            if not block:
+                return
+
+    try:
+        yield from _split_blocks(drain(), on_block)
+    finally:
+        stop.set()
+        reader.join()
+        stream.close()
+        raw.close()
@@ -0,0 +1,199 @@
+"""Streaming summaries of per-author counts: top-K (exact or space-saving) and distinct counts."""
+
+import math
+import heapq
+import hashlib
+import collections
+from operator import itemgetter
+
+_by_count = itemgetter(1)
+
+
+class TopK:
+    """Exact top-k of counts that only grow, maintained as they are incremented.
+
+    A candidate set holds every key whose count exceeds `threshold`. When
+    the set reaches 2k keys it is pruned back to the k largest and the
+    threshold raised to the k-th largest count. A pruned key has a count no
+    greater than the threshold and can only re-enter the set by exceeding
+    it, so the set always contains the exact top k. Callers therefore only
+    need to offer counts above `threshold`. Updates cost O(1) amortized, and
+    reading the top k costs O(k log k) at any point during ingestion.
+    """
+
+    def __init__(self, k: int):
+        if k < 1:
+            raise ValueError('k must be at least 1')
+        self.k = k
+        self.threshold = 0
+        self._candidates = {}
+
+    def offer(self, key, count: int):
+        """Record that `key`'s count is now `count` (ignored unless above threshold)."""
+        if count <= self.threshold:
+            return
+        candidates = self._candidates
+        candidates[key] = count
+        if len(candidates) >= 2 * self.k:
+            top = heapq.nlargest(self.k, candidates.items(), key=_by_count)
+            self._candidates = dict(top)
+            self.threshold = top[-1][1]
+
+    def top(self, n: int | None = None) -> list:
+        """Return up to n (default k) (key, count) pairs, largest count first."""
+        n = self.k if n is None else min(n, self.k)
+        return heapq.nlargest(n, self._candidates.items(), key=_by_count)
+
+
+class SpaceSaving:
+    """Approximate top-k in a fixed number of counters (the space-saving algorithm).
+
+    At most `capacity` keys are monitored. A key seen while all counters are
+    in use takes over the counter with the smallest count. It inherits that
+    count, and the inherited part is recorded as the key's error. Counts are
+    kept in buckets by value, so each update is O(1) however many keys the
+    stream has.
+
+    Guarantees, with N = total increments counted:
+      - a reported count is never below the key's true count and exceeds
+        it by at most the key's error, which is at most `max_error`;
+      - for a single stream `max_error` is at most N / capacity, so every
+        key whose true count exceeds N / capacity is monitored.
+    Merging summaries (parallel ingestion) keeps the first guarantee, but
+    `max_error` may grow to the sum of the merged summaries' bounds.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError('capacity must be at least 1')
+        self.capacity = capacity
+        self.total = 0
+        # Upper bound on the true count of any key that is not monitored
+        self.max_error = 0
+        self._counts = {}
+        self._errors = {}
+        self._buckets = {}  # count: set of keys with that count
+        self._min = 0
+
+    def __len__(self):
+        return len(self._counts)
+
+    def add(self, key):
+        """Count one occurrence of `key`."""
+        self.total += 1
+        counts = self._counts
+        buckets = self._buckets
+        count = counts.get(key)
+        if count is not None:
+            bucket = buckets[count]
+            bucket.discard(key)
+            if not bucket:
+                del buckets[count]
+                if count == self._min:
+                    self._min = count + 1
+        elif len(counts) < self.capacity:
+            count = self.max_error
+            self._errors[key] = count
+            if not counts or count + 1 < self._min:
+                self._min = count + 1
+        else:
+            count = self._min
+            bucket = buckets[count]
+            evicted = bucket.pop()
+            del counts[evicted]
+            del self._errors[evicted]
+            self._errors[key] = count
+            self.max_error = count
+            if not bucket:
+                del buckets[count]
+                self._min = count + 1
+        counts[key] = count + 1
+        bucket = buckets.get(count + 1)
+        if bucket is None:
+            buckets[count + 1] = {key}
+        else:
+            bucket.add(key)
+
+    def merge(self, other: 'SpaceSaving'):
+        """Fold in another summary; keys missing from one side are bounded by its max_error."""
+        merged = []
+        for key in self._counts.keys() | other._counts.keys():
+            count = self._counts.get(key, self.max_error) + other._counts.get(key, other.max_error)
+            error = self._errors.get(key, self.max_error) + other._errors.get(key, other.max_error)
+            merged.append((key, count, error))
+        merged.sort(key=_by_count, reverse=True)
+        kept, dropped = merged[:self.capacity], merged[self.capacity:]
+        max_error = self.max_error + other.max_error
+        if dropped:
+            max_error = max(max_error, dropped[0][1])
+        self.total += other.total
+        self.max_error = max_error
+        self._counts = {key: count for key, count, _ in kept}
+        self._errors = {key: error for key, _, error in kept}
+        self._buckets = {}
+        for key, count, _ in kept:
+            self._buckets.setdefault(count, set()).add(key)
+        self._min = kept[-1][1] if kept else 0
+        return self
+
+    def error(self, key) -> int:
+        """Return how much `key`'s reported count may exceed its true count."""
+        return self._errors.get(key, self.max_error)
+
+    def top(self, n: int | None = None) -> list:
+        """Return up to n (default all monitored) (key, count) pairs, largest count first."""
+        if n is None:
+            return sorted(self._counts.items(), key=_by_count, reverse=True)
+        return heapq.nlargest(n, self._counts.items(), key=_by_count)
+
+
+class HyperLogLog:
+    """Approximate count of distinct keys in 2**precision one-byte registers.
+
+    Keys are hashed with a 64-bit BLAKE2b digest. Python's hash() is salted
+    per process, so it would break merging sketches built in worker
+    processes. The low `precision` bits pick a register, and the register
+    keeps the largest position of the first set bit seen in the remaining
+    bits. Merging takes the register-wise maximum, so a merged sketch is
+    exactly the sketch of the combined stream.
+
+    The relative standard error of the estimate is 1.04 / sqrt(2**precision)
+    (`relative_error`): 0.81% at the default precision of 14 (16 KiB), so
+    about 95% of estimates fall within 1.6% of the true count and 99.7%
+    within 2.4%. Small counts use linear counting and are close to exact.
+    """
+
+    def __init__(self, precision: int = 14):
+        if not 4 <= precision <= 18:
+            raise ValueError('precision must be between 4 and 18')
+        self.precision = precision
+        self._registers = bytearray(1 << precision)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(len(self._registers))
+
+    def add(self, key: str):
+        x = int.from_bytes(hashlib.blake2b(key.encode('utf-8', 'surrogateescape'), digest_size=8).digest(),
+                           'little')
+        index = x & (len(self._registers) - 1)
+        rank = 65 - self.precision - (x >> self.precision).bit_length()
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+
+    def merge(self, other: 'HyperLogLog'):
+        if other.precision != self.precision:
+            raise ValueError('Cannot merge HyperLogLog sketches of different precision')
+        self._registers = bytearray(map(max, self._registers, other._registers))
+        return self
+
+    def count(self) -> int:
+        """Return the estimated number of distinct keys added."""
+        m = len(self._registers)
+        histogram = collections.Counter(self._registers)
+        harmonic = sum(count * 2.0 ** -rank for rank, count in histogram.items())
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / harmonic
+        zeros = histogram.get(0, 0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
@@ -0,0 +1,124 @@
+"""On-disk cache of per-file aggregates, so unchanged files are not parsed again.
+
+Each analyzed file gets one entry in the cache directory, named after a
+hash of its absolute path, role and identity field. An entry is a small
+header (file size, mtime and content fingerprint) followed by the
+zlib-compressed, pickled ActivityAggregate; the header alone decides
+whether the entry still describes the file, so stale entries are rejected
+without decompressing them.
+"""
+
+import os
+import zlib
+import pickle
+import struct
+import hashlib
+
+# Bump when ActivityAggregate's fields change, so old entries are ignored
+STORE_VERSION = 5
+# Bytes hashed at each end of a file for its fingerprint
+FINGERPRINT_BYTES = 64 * 1024
+
+_MAGIC = b'RAGG'
+_HEADER_LEN = struct.Struct('<I')
+
+
+def _hash_range(f, start: int, end: int) -> str:
+    f.seek(start)
+    return hashlib.blake2b(f.read(end - start), digest_size=16).hexdigest()
+
+
+def file_signature(path: str) -> dict:
+    """Return the size, mtime and head/tail content hashes identifying a file's current contents."""
+    st = os.stat(path)
+    size = st.st_size
+    with open(path, 'rb') as f:
+        head = _hash_range(f, 0, min(size, FINGERPRINT_BYTES))
+        tail = _hash_range(f, max(0, size - FINGERPRINT_BYTES), size)
+        f.seek(max(0, size - 1))
+        ends_with_newline = f.read(1) == b'\n'
+    return {'size': size, 'mtime_ns': st.st_mtime_ns, 'head': head, 'tail': tail,
+            'ends_with_newline': ends_with_newline}
+
+
+class AggregateStore:
+    """Directory of cached aggregates keyed by file path, size, mtime and fingerprint."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _entry_path(self, path: str, kind: str, identity_field: str) -> str:
+        key = f'{os.path.abspath(path)}\0{kind}\0{identity_field}'.encode('utf-8', 'surrogateescape')
+        return os.path.join(self.directory, hashlib.sha1(key).hexdigest() + '.agg')
+
+    def _read_header(self, f):
+        if f.read(len(_MAGIC)) != _MAGIC:
+            return None
+        (length,) = _HEADER_LEN.unpack(f.read(_HEADER_LEN.size))
+        header = pickle.loads(f.read(length))
+        if not isinstance(header, dict) or header.get('version') != STORE_VERSION:
+            return None
+        return header
+
+    def _load_entry(self, path: str, kind: str, identity_field: str, accept):
+        """Return (header, aggregate) for the file's entry if accept(header) is true, else None."""
+        try:
+            with open(self._entry_path(path, kind, identity_field), 'rb') as f:
+                header = self._read_header(f)
+                if header is None or not accept(header):
+                    return None
+                return header, pickle.loads(zlib.decompress(f.read()))
+        except (OSError, EOFError, ValueError, zlib.error, pickle.UnpicklingError, struct.error):
+            return None
+
+    def load(self, path: str, kind: str, identity_field: str, signature: dict | None = None):
+        """Return the cached ActivityAggregate for an unchanged file, or None."""
+        signature = signature or file_signature(path)
+        entry = self._load_entry(path, kind, identity_field, lambda header: header.get('signature') == signature)
+        return entry[1] if entry else None
+
+    def load_appended(self, path: str, kind: str, identity_field: str, signature: dict | None = None):
+        """Return (aggregate, offset) if lines were only appended to the file since it was cached.
+
+        The aggregate covers bytes [0, offset) of the file; the caller parses
+        the rest. Returns None if the file is unchanged, shrank, was
+        rewritten, or its cached version did not end with a line break.
+        """
+        signature = signature or file_signature(path)
+
+        def appended(header):
+            old = header.get('signature') or {}
+            old_size = old.get('size', 0)
+            if not old.get('ends_with_newline') or old_size >= signature['size']:
+                return False
+            with open(path, 'rb') as f:
+                return (_hash_range(f, 0, min(old_size, FINGERPRINT_BYTES)) == old.get('head')
+                        and _hash_range(f, max(0, old_size - FINGERPRINT_BYTES), old_size) == old.get('tail'))
+
+        entry = self._load_entry(path, kind, identity_field, appended)
+        if entry is None:
+            return None
+        header, aggregate = entry
+        return aggregate, header['signature']['size']
+
+    def save(self, path: str, kind: str, identity_field: str, aggregate, signature: dict):
+        """Store an aggregate computed from the file contents described by `signature`.
+
+        Failures (read-only directory, disk full) are ignored: the cache only
+        saves time.
+        """
+        entry_path = self._entry_path(path, kind, identity_field)
+        header = pickle.dumps({'version': STORE_VERSION, 'path': os.path.abspath(path), 'signature': signature})
+        body = zlib.compress(pickle.dumps(aggregate, protocol=pickle.HIGHEST_PROTOCOL), 1)
+        tmp_path = f'{entry_path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(_MAGIC + _HEADER_LEN.pack(len(header)) + header)
+                f.write(body)
+            os.replace(tmp_path, entry_path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
@@ -0,0 +1,53 @@
+"""Background thread running ingest_files for the GUI."""
+
+import os
+import threading
+
+from .aggregate import DEFAULT_TOP_K
+from .engine import ingest_files
+from .progress import IngestProgress
+
+
+class IngestWorker:
+    """Run ingest_files on a daemon thread.
+
+    The GUI starts the worker, then polls it from Tk's event loop (with
+    `after`): `progress` exposes bytes/lines per second and partial
+    aggregates while `done` is False; afterwards `result` holds the list
+    of aggregates or `error` the exception that ended the run
+    (ValidationError, OSError, IngestCancelled, ...).
+    """
+
+    def __init__(self, sources, identity_field: str, workers: int = 1, decoder: str = 'auto',
+                 snapshot_interval: float = 1.0, store=None, top_k: int = DEFAULT_TOP_K,
+                 sketch: bool = False):
+        self.sources = list(sources)
+        self.identity_field = identity_field
+        self.workers = workers
+        self.decoder = decoder
+        self.store = store
+        self.top_k = top_k
+        self.sketch = sketch
+        total_bytes = sum(os.path.getsize(path) for path, _ in self.sources if os.path.isfile(path))
+        self.progress = IngestProgress(total_bytes, snapshot_interval)
+        self.result = None
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name='jsonl-ingest', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self.progress.cancel()
+
+    @property
+    def done(self) -> bool:
+        return not self._thread.is_alive() and (self.result is not None or self.error is not None)
+
+    def _run(self):
+        try:
+            self.result = ingest_files(self.sources, self.identity_field, self.workers, self.decoder,
+                                       self.progress, self.store, self.top_k, self.sketch)
+        except BaseException as e:
+            self.error = e
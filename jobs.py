@@ -0,0 +1,197 @@
+"""Persistent, resumable account lookup jobs.
+
+A job is one lookup run over an ordered list of usernames (a Creation Year
+file, the overlap of several files). It is identified by a fingerprint of
+that list plus the fields looked up, and checkpointed to a small JSON file
+holding a completion bitmap (one bit per user) and a summary of counters
+updated with it, e.g. the running year histogram. Running the same input
+again resumes the job: finished users are skipped without touching the
+network or the cache.
+"""
+
+import os
+import json
+import time
+import zlib
+import base64
+import hashlib
+import threading
+
+JOB_VERSION = 1
+
+# Job states
+RUNNING = 'running'
+PAUSED = 'paused'
+DONE = 'done'
+
+
+def fingerprint_usernames(usernames) -> tuple[str, int]:
+    """Return (hex digest, count) of an ordered sequence of usernames."""
+    digest = hashlib.sha1()
+    count = 0
+    for u in usernames:
+        digest.update(u.encode('utf-8', 'surrogateescape'))
+        digest.update(b'\n')
+        count += 1
+    return digest.hexdigest(), count
+
+
+def _encode_bitmap(bits: bytearray) -> str:
+    return base64.b64encode(zlib.compress(bytes(bits))).decode('ascii')
+
+
+def _decode_bitmap(text: str) -> bytearray:
+    return bytearray(zlib.decompress(base64.b64decode(text)))
+
+
+class LookupJob:
+    """Completion state of one lookup run, checkpointed to `path`.
+
+    mark_done may be called from any thread; it updates the bitmap and the
+    summary counters together, so a checkpoint never counts a user twice.
+    checkpoint() writes at most every `checkpoint_interval` seconds unless
+    forced; the file is replaced atomically, so a crash leaves the previous
+    checkpoint intact.
+    """
+
+    def __init__(self, path: str, data: dict, checkpoint_interval: float = 5.0):
+        self.path = path
+        self.checkpoint_interval = checkpoint_interval
+        self._data = data
+        self._bits = _decode_bitmap(data['bitmap']) if data.get('bitmap') else bytearray((data['total'] + 7) // 8)
+        self._done = sum(bin(b).count('1') for b in self._bits)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._last_checkpoint = time.monotonic()
+
+    @classmethod
+    def open(cls, directory: str, kind: str, source: str, fingerprint: str, total: int, fields,
+             checkpoint_interval: float = 5.0):
+        """Resume the unfinished job for this input, or start a new one.
+
+        `kind` names the tab running the job, `source` is shown when
+        inspecting it (e.g. the input file).
+        """
+        fields = sorted(fields)
+        key = f'{kind}\0{fingerprint}\0{",".join(fields)}'.encode('utf-8')
+        path = os.path.join(directory, f'{kind}-{hashlib.sha1(key).hexdigest()[:16]}.json')
+        data = _load(path)
+        if (data is None or data.get('version') != JOB_VERSION or data.get('fingerprint') != fingerprint
+                or data.get('total') != total or data.get('state') == DONE):
+            now = time.time()
+            data = {'version': JOB_VERSION, 'kind': kind, 'source': source, 'fingerprint': fingerprint,
+                    'fields': fields, 'total': total, 'state': RUNNING, 'created': now, 'updated': now,
+                    'summary': {}, 'bitmap': None}
+        job = cls(path, data, checkpoint_interval)
+        job._data['state'] = RUNNING
+        return job
+
+    @property
+    def total(self) -> int:
+        return self._data['total']
+
+    @property
+    def done_count(self) -> int:
+        return self._done
+
+    @property
+    def state(self) -> str:
+        return self._data['state']
+
+    def summary(self) -> dict:
+        """Return a copy of the summary counters ({key: count} of finished users)."""
+        with self._lock:
+            return dict(self._data['summary'])
+
+    def is_done(self, index: int) -> bool:
+        return bool(self._bits[index >> 3] & (1 << (index & 7)))
+
+    def mark_done(self, index: int, count_key: str | None = None) -> bool:
+        """Mark user `index` finished, counting it under summary[count_key]; False if it already was."""
+        mask = 1 << (index & 7)
+        with self._lock:
+            if self._bits[index >> 3] & mask:
+                return False
+            self._bits[index >> 3] |= mask
+            self._done += 1
+            if count_key is not None:
+                summary = self._data['summary']
+                summary[count_key] = summary.get(count_key, 0) + 1
+        return True
+
+    def checkpoint(self, force: bool = False):
+        """Save the job if checkpoint_interval has passed since the last save (or if forced)."""
+        now = time.monotonic()
+        if not force and now - self._last_checkpoint < self.checkpoint_interval:
+            return
+        with self._write_lock:
+            with self._lock:
+                self._data['bitmap'] = _encode_bitmap(self._bits)
+                self._data['done'] = self._done
+                self._data['updated'] = time.time()
+                payload = json.dumps(self._data)
+            self._last_checkpoint = now
+            tmp_path = f'{self.path}.{os.getpid()}.tmp'
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(payload)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                # Losing a checkpoint only costs re-checking some users on resume
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def pause(self):
+        self._data['state'] = PAUSED
+        self.checkpoint(force=True)
+
+    def finish(self):
+        self._data['state'] = DONE
+        self.checkpoint(force=True)
+
+    def describe(self) -> str:
+        return describe_job(self._data | {'done': self._done})
+
+
+def _load(path: str):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else None
+    except (OSError, ValueError):
+        return None
+
+
+def list_jobs(directory: str, kind: str | None = None) -> list[dict]:
+    """Return the saved jobs (optionally of one kind), most recently updated first.
+
+    Each dict holds kind, source, fields, total, done, state, created and
+    updated (epoch seconds) and summary.
+    """
+    jobs = []
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return jobs
+    for name in names:
+        if not name.endswith('.json') or (kind and not name.startswith(kind + '-')):
+            continue
+        data = _load(os.path.join(directory, name))
+        if data is None or data.get('version') != JOB_VERSION:
+            continue
+        data.pop('bitmap', None)
+        jobs.append(data)
+    jobs.sort(key=lambda d: d.get('updated', 0), reverse=True)
+    return jobs
+
+
+def describe_job(job: dict) -> str:
+    """One-line description, e.g. 'users.txt: 25,000 / 200,000 (12%) paused, updated 2024-05-01 13:05'."""
+    total = job.get('total') or 0
+    done = job.get('done', 0)
+    percent = f' ({done * 100 // total}%)' if total else ''
+    updated = time.strftime('%Y-%m-%d %H:%M', time.localtime(job.get('updated', 0)))
+    return f"{os.path.basename(job.get('source', '?'))}: {done:,} / {total:,}{percent} {job.get('state')}, updated {updated}"
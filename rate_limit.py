@@ -0,0 +1,185 @@
+"""Per-host request pacing for the Reddit and Photon APIs.
+
+Every outgoing request goes through the HostLimiter for its host, which
+combines a token bucket (sustained rate + burst) with an AIMD concurrency
+window: each successful request grows the window additively, each throttle
+(429 / Retry-After) halves it and pauses the host for the requested delay.
+All worker threads share the same limiters. Low-priority requests (cache
+revalidation, prefetching) only take a token while the bucket is at least
+half full, wait for it before claiming a concurrency slot, never claim a
+slot while an interactive request is waiting for one and hold at most half
+of the window, so they use spare capacity without delaying interactive
+lookups.
+"""
+
+import time
+import threading
+import contextlib
+import email.utils
+from urllib.parse import urlsplit
+
+from config import RATE_LIMITS, DEFAULT_RATE_LIMIT
+
+
+def parse_retry_after(value, now=None) -> float | None:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds to wait."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    now = time.time() if now is None else now
+    return max(0.0, when.timestamp() - now)
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at `rate` tokens/second up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def pause(self, seconds: float):
+        """Withhold all tokens for `seconds` (e.g. after a Retry-After)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+    def acquire(self, reserve: float = 0.0) -> float:
+        """Block until a token is available beyond `reserve`; return the time spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                else:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1 + reserve:
+                        self._tokens -= 1
+                        return waited
+                    delay = (1 + reserve - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class HostLimiter:
+    """Token bucket plus AIMD concurrency window and counters for one host."""
+
+    def __init__(self, rate: float, burst: float, max_concurrency: int, min_concurrency: int = 1):
+        self.bucket = TokenBucket(rate, burst)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self._limit = float(max(min_concurrency, max_concurrency // 2))
+        self._in_flight = 0
+        self._low_in_flight = 0
+        self._interactive_waiting = 0
+        self._cond = threading.Condition()
+        self.stats = {'requests': 0, 'throttles': 0, 'backoffs': 0, 'backoff_seconds': 0.0, 'wait_seconds': 0.0}
+
+    @property
+    def concurrency_limit(self) -> int:
+        return int(self._limit)
+
+    def _low_priority_blocked(self) -> bool:
+        limit = int(self._limit)
+        return (self._interactive_waiting > 0 or self._in_flight >= limit
+                or self._low_in_flight >= max(1, limit // 2))
+
+    @contextlib.contextmanager
+    def slot(self, low_priority: bool = False):
+        """Hold one concurrency slot and one rate token for the duration of a request."""
+        waited = 0.0
+        if low_priority:
+            # Sleep for the reserved token without holding a slot interactive requests could use
+            waited = self.bucket.acquire(self.bucket.capacity / 2)
+            with self._cond:
+                while self._low_priority_blocked():
+                    self._cond.wait()
+                self._in_flight += 1
+                self._low_in_flight += 1
+        else:
+            with self._cond:
+                self._interactive_waiting += 1
+                try:
+                    while self._in_flight >= int(self._limit):
+                        self._cond.wait()
+                finally:
+                    self._interactive_waiting -= 1
+                self._in_flight += 1
+                if not self._interactive_waiting:
+                    # Low-priority waiters were held back while this request queued
+                    self._cond.notify_all()
+        try:
+            if not low_priority:
+                waited = self.bucket.acquire()
+            with self._cond:
+                self.stats['requests'] += 1
+                self.stats['wait_seconds'] += waited
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                if low_priority:
+                    self._low_in_flight -= 1
+                self._cond.notify_all()
+
+    def on_success(self):
+        """Additive increase: grow the window by one slot per window's worth of successes."""
+        with self._cond:
+            if self._limit < self.max_concurrency:
+                self._limit = min(self.max_concurrency, self._limit + 1.0 / self._limit)
+                self._cond.notify_all()
+
+    def on_throttle(self, retry_after: float | None, default_delay: float):
+        """Multiplicative decrease and pause the host for Retry-After (or a default delay)."""
+        delay = retry_after if retry_after is not None else default_delay
+        with self._cond:
+            self.stats['throttles'] += 1
+            self.stats['backoffs'] += 1
+            self.stats['backoff_seconds'] += delay
+            self._limit = max(float(self.min_concurrency), self._limit / 2)
+        self.bucket.pause(delay)
+
+    def on_quota_exhausted(self, reset_after: float):
+        """Pause ahead of time when the server reports no remaining quota."""
+        with self._cond:
+            self.stats['backoffs'] += 1
+            self.stats['backoff_seconds'] += reset_after
+        self.bucket.pause(reset_after)
+
+
+_LIMITERS = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_limiter(url: str) -> HostLimiter:
+    """Return the shared limiter for the URL's host."""
+    host = (urlsplit(url).hostname or '').lower()
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(host)
+        if limiter is None:
+            rate, burst, max_concurrency = RATE_LIMITS.get(host, DEFAULT_RATE_LIMIT)
+            limiter = HostLimiter(rate, burst, max_concurrency)
+            _LIMITERS[host] = limiter
+        return limiter
+
+
+def limiter_stats() -> dict:
+    """Return {host: counters} for every host contacted so far."""
+    with _LIMITERS_LOCK:
+        limiters = dict(_LIMITERS)
+    return {host: {**lim.stats, 'concurrency_limit': lim.concurrency_limit} for host, lim in limiters.items()}
@@ -12,6 +12,7 @@ Requires Python 3.8+ and dependencies listed in requirements.txt
 """
 
 import sys
+import multiprocessing
 
 # Check Python version
 if sys.version_info < (3, 8):
@@ -22,5 +23,7 @@ if sys.version_info < (3, 8):
 from gui.main_app import MainApp
 
 if __name__ == '__main__':
+    # Needed for the ingestion process pool in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     app = MainApp()
     app.mainloop()
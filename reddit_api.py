@@ -1,9 +1,16 @@
 """Reddit API functions for fetching account information."""
 
+import time
 import datetime
+import threading
 import requests
-from config import SESSION, REQUEST_TIMEOUT, STATUS_CODES
-from cache import CACHE, CACHE_LOCK, save_persistent_cache
+from config import (
+    SESSION, REQUEST_TIMEOUT, STATUS_CODES, REDDIT_BASE_URL, PHOTON_BASE_URL,
+    MAX_RETRIES, THROTTLE_BACKOFF, CACHE_TTL_POSITIVE, CACHE_TTL_NEGATIVE, CACHE_TTL_TRANSIENT,
+)
+from cache import CACHE
+from rate_limit import get_limiter, parse_retry_after
+from singleflight import SingleFlight
 
 
 def _try_parse_timestamp_to_date(ts) -> datetime.date | None:
@@ -23,64 +30,181 @@ def _try_parse_timestamp_to_date(ts) -> datetime.date | None:
     return None
 
 
-def _fetch_about_json(author: str):
-    """Fetch user about.json from Reddit API."""
+class RequestCancelled(Exception):
+    """A request of a session whose `cancel` event was set was abandoned before being sent."""
+
+
+_LOOKUP_STATS = {'users': 0, 'requests': 0}
+_LOOKUP_STATS_LOCK = threading.Lock()
+
+# Concurrent lookups of the same lowercase username (from any thread, tab or
+# event loop) share one fetch
+ACCOUNT_FLIGHTS = SingleFlight()
+
+
+def _count_lookup(users=0, requests_made=0, session=None):
+    """Count lookups globally and, if the session keeps its own `lookup_stats`, for that session."""
+    with _LOOKUP_STATS_LOCK:
+        _LOOKUP_STATS['users'] += users
+        _LOOKUP_STATS['requests'] += requests_made
+        session_stats = getattr(session, 'lookup_stats', None)
+        if session_stats is not None:
+            session_stats['users'] += users
+            session_stats['requests'] += requests_made
+
+
+def lookup_stats() -> dict:
+    """Return {'users', 'requests', 'requests_per_user', 'coalesced'} for account lookups so far.
+
+    coalesced counts lookups that waited for an identical in-flight lookup
+    instead of making their own requests.
+    """
+    with _LOOKUP_STATS_LOCK:
+        stats = dict(_LOOKUP_STATS)
+    stats['coalesced'] = ACCOUNT_FLIGHTS.stats['suppressed']
+    stats['requests_per_user'] = stats['requests'] / stats['users'] if stats['users'] else 0.0
+    return stats
+
+
+def _is_transient(status_code) -> bool:
+    """True if a response status says nothing about the account (network error, throttled, server error)."""
+    return status_code is None or status_code == 429 or status_code >= 500
+
+
+def _reddit_base_url(session) -> str:
+    """Reddit API root for a session; sessions may override it (e.g. a local stub server)."""
+    return getattr(session, 'reddit_base_url', None) or REDDIT_BASE_URL
+
+
+def _photon_base_url(session) -> str:
+    return getattr(session, 'photon_base_url', None) or PHOTON_BASE_URL
+
+
+def _request(url: str, session=SESSION):
+    """GET `url` through the host's shared rate limiter.
+
+    Sessions with a true `low_priority` attribute (see
+    async_fetcher.create_pooled_session) yield to interactive requests.
+    Throttled responses (429, or 503 with Retry-After) pause the host for the
+    advertised delay and are retried up to MAX_RETRIES times. Returns the
+    final response; raises requests.RequestException on network errors and
+    RequestCancelled once the session's `cancel` event (if any) is set.
+    """
+    limiter = get_limiter(url)
+    low_priority = getattr(session, 'low_priority', False)
+    cancel = getattr(session, 'cancel', None)
+    resp = None
+    for _ in range(MAX_RETRIES + 1):
+        with limiter.slot(low_priority):
+            # Checked after waiting for the slot, so a cancelled request gives it back at once
+            if cancel is not None and cancel.is_set():
+                raise RequestCancelled()
+            _count_lookup(requests_made=1, session=session)
+            resp = session.get(url, timeout=REQUEST_TIMEOUT)
+        if resp.status_code == 429 or (resp.status_code == 503 and 'Retry-After' in resp.headers):
+            limiter.on_throttle(parse_retry_after(resp.headers.get('Retry-After')), THROTTLE_BACKOFF)
+            continue
+        if resp.status_code < 500:
+            limiter.on_success()
+        # Reddit reports its remaining quota; stop before it starts returning 429s
+        remaining = resp.headers.get('X-Ratelimit-Remaining')
+        reset = resp.headers.get('X-Ratelimit-Reset')
+        if remaining is not None and reset is not None:
+            try:
+                if float(remaining) < 1:
+                    limiter.on_quota_exhausted(float(reset))
+            except ValueError:
+                pass
+        return resp
+    return resp
+
+
+def _fetch_about_json(author: str, session=SESSION):
+    """Fetch user about.json from Reddit API.
+
+    Returns (data, status_code); status_code is None on network errors.
+    """
     try:
-        resp = SESSION.get(f'https://www.reddit.com/user/{author}/about.json', timeout=REQUEST_TIMEOUT)
+        resp = _request(f'{_reddit_base_url(session)}/user/{author}/about.json', session)
         if resp.status_code == 200:
             return resp.json().get('data', {}), 200
         return None, resp.status_code
-    except requests.RequestException:
+    except (requests.RequestException, ValueError):
         return None, None
 
 
-def _fetch_photon_earliest(author: str):
-    """Fetch earliest post/comment timestamp from Photon API."""
-    timestamps = []
-    for endpoint in (
-        f'https://arctic-shift.photon-reddit.com/api/posts/search?author={author}&sort=asc',
-        f'https://arctic-shift.photon-reddit.com/api/comments/search?author={author}&sort=asc',
-    ):
-        try:
-            resp = SESSION.get(endpoint, timeout=REQUEST_TIMEOUT)
-            if not resp.ok:
-                continue
-            payload = resp.json()
-            items = payload.get('data', payload) if isinstance(payload, dict) else payload
-            if isinstance(items, list) and items:
-                ts = items[0].get('created_utc') or items[0].get('created') or items[0].get('timestamp')
-                dt = _try_parse_timestamp_to_date(ts)
-                if dt:
-                    timestamps.append(dt)
-        except requests.RequestException:
-            continue
-    if timestamps:
-        return min(timestamps)
-    return None
+def _fetch_user_data_by_ids(account_ids, session=SESSION):
+    """Fetch basic account data for up to ACCOUNT_BATCH_SIZE 't2_' ids in one request.
 
+    Returns ({account_id: data}, complete). Ids of deleted accounts are
+    missing from the result; complete is False if the request failed
+    transiently, in which case nothing can be concluded about any id.
+    """
+    try:
+        resp = _request(f'{_reddit_base_url(session)}/api/user_data_by_account_ids.json?ids={",".join(account_ids)}', session)
+        if resp.status_code == 404:
+            return {}, True  # none of the ids exist any more
+        if not resp.ok:
+            return {}, not _is_transient(resp.status_code)
+        payload = resp.json()
+    except (requests.RequestException, ValueError):
+        return {}, False
+    if not isinstance(payload, dict):
+        return {}, False
+    return {k: v for k, v in payload.items() if isinstance(v, dict)}, True
 
-def get_account_info(author: str):
-    """Return (status_code:int, birth_date_str, last_activity_str, source)
-    
-    source: 'True' if created_utc used, 'Estimated' if fallback used, 'Unknown' otherwise.
-    Persistent global CACHE used.
+
+def _fetch_photon_date(author: str, kind: str, sort: str, session=SESSION):
+    """Fetch the date of a user's first ('asc') or latest ('desc') post or comment from Photon.
+
+    kind: 'posts' or 'comments'.
+    Returns (date or None, complete); complete is False if the request failed
+    transiently, in which case a None date does not mean "no activity".
+    """
+    endpoint = f'{_photon_base_url(session)}/api/{kind}/search?author={author}&sort={sort}&limit=1&fields=created_utc'
+    try:
+        resp = _request(endpoint, session)
+        if not resp.ok:
+            return None, not _is_transient(resp.status_code)
+        payload = resp.json()
+    except (requests.RequestException, ValueError):
+        return None, False
+    items = payload.get('data', payload) if isinstance(payload, dict) else payload
+    if isinstance(items, list) and items:
+        ts = items[0].get('created_utc') or items[0].get('created') or items[0].get('timestamp')
+        return _try_parse_timestamp_to_date(ts), True
+    return None, True
+
+
+PHOTON_KINDS = ('posts', 'comments')
+
+
+def _fetch_photon_extreme(author: str, sort: str, session=SESSION, kinds=PHOTON_KINDS):
+    """Fetch the earliest ('asc') or latest ('desc') post/comment date; returns (date or None, complete)."""
+    results = [_fetch_photon_date(author, kind, sort, session) for kind in kinds]
+    return _combine_photon_dates(results, sort)
+
+
+def _combine_photon_dates(results, sort: str):
+    """Combine (date, complete) results from the posts and comments searches."""
+    dates = [d for d, _ in results if d]
+    complete = all(ok for _, ok in results)
+    if not dates:
+        return None, complete
+    return (min(dates) if sort == 'asc' else max(dates)), complete
+
+
+def _kinds_with_activity(latest_results):
+    """Kinds worth an ascending search, given the descending (date, complete) result per PHOTON_KINDS.
+
+    A kind whose latest-item search completed and found nothing has no
+    earliest item either.
     """
-    lower = author.lower()
-    with CACHE_LOCK:
-        if lower in CACHE:
-            e = CACHE[lower]
-            return (
-                e.get('status_code', STATUS_CODES['active']),
-                e.get('birth_date', 'Unknown'),
-                e.get('last_activity', 'Unknown'),
-                e.get('source', 'Unknown')
-            )
-
-    birth_date = 'Unknown'
-    last_activity = 'Unknown'
-    source = 'Unknown'
-
-    data, status_code_raw = _fetch_about_json(author)
+    return tuple(kind for kind, (date, ok) in zip(PHOTON_KINDS, latest_results) if date or not ok)
+
+
+def _resolve_about(data, status_code_raw):
+    """Map an about.json response to (status_code, birth_date_str, source)."""
     if status_code_raw == 200 and isinstance(data, dict):
         status_code = STATUS_CODES['suspended'] if data.get('is_suspended') else STATUS_CODES['active']
     elif status_code_raw == 404:
@@ -89,50 +213,233 @@ def get_account_info(author: str):
         status_code = STATUS_CODES['active']
 
     if status_code_raw == 200 and isinstance(data, dict):
-        ts = data.get('created_utc')
-        dt = _try_parse_timestamp_to_date(ts)
+        dt = _try_parse_timestamp_to_date(data.get('created_utc'))
         if dt:
-            birth_date = dt.strftime('%Y-%m-%d')
-            source = 'True'
-
-    if birth_date == 'Unknown':
-        earliest = _fetch_photon_earliest(author)
-        if earliest:
-            birth_date = earliest.strftime('%Y-%m-%d')
-            source = 'Estimated'
-
-    last_ts = []
-    for endpoint in (
-        f'https://arctic-shift.photon-reddit.com/api/posts/search?author={author}&sort=desc',
-        f'https://arctic-shift.photon-reddit.com/api/comments/search?author={author}&sort=desc',
-    ):
-        try:
-            resp = SESSION.get(endpoint, timeout=REQUEST_TIMEOUT)
-            if not resp.ok:
-                continue
-            payload = resp.json()
-            items = payload.get('data', payload) if isinstance(payload, dict) else payload
-            if isinstance(items, list) and items:
-                ts = items[0].get('created_utc') or items[0].get('created') or items[0].get('timestamp')
-                dt = _try_parse_timestamp_to_date(ts)
-                if dt:
-                    last_ts.append(dt)
-        except requests.RequestException:
+            return status_code, dt.strftime('%Y-%m-%d'), 'True'
+    return status_code, 'Unknown', 'Unknown'
+
+
+def _resolve_user_data(data):
+    """Map one /api/user_data_by_account_ids entry (None if absent) to (status_code, birth_date_str, source)."""
+    if data is None:
+        return STATUS_CODES['deleted'], 'Unknown', 'Unknown'
+    if data.get('is_suspended'):
+        return STATUS_CODES['suspended'], 'Unknown', 'Unknown'
+    dt = _try_parse_timestamp_to_date(data.get('created_utc'))
+    if dt:
+        return STATUS_CODES['active'], dt.strftime('%Y-%m-%d'), 'True'
+    return STATUS_CODES['active'], 'Unknown', 'Unknown'
+
+
+def _account_id(data):
+    """Return the 't2_' fullname from an about.json payload, or None."""
+    if isinstance(data, dict) and data.get('id'):
+        return f"t2_{data['id']}"
+    return None
+
+
+def _entry_to_info(e: dict):
+    """Convert a cache entry to the (status_code, birth_date, last_activity, source) tuple."""
+    return (
+        e.get('status_code', STATUS_CODES['active']),
+        e.get('birth_date', 'Unknown'),
+        e.get('last_activity', 'Unknown'),
+        e.get('source', 'Unknown')
+    )
+
+
+ACCOUNT_FIELDS = ('status', 'birth', 'last_activity')
+# Cache entry keys holding each field; a field is cached once all its keys are present
+_FIELD_KEYS = {
+    'status': ('status_code',),
+    'birth': ('birth_date', 'source'),
+    'last_activity': ('last_activity',),
+}
+
+
+def _recently_failed(entry, field, now) -> bool:
+    failed_at = (entry.get('failed_at') or {}).get(field)
+    return failed_at is not None and now - failed_at < CACHE_TTL_TRANSIENT
+
+
+def _field_ttl(entry, field):
+    """Seconds a cached field stays fresh (None: forever)."""
+    if field == 'status':
+        negative = entry.get('status_code') in (STATUS_CODES['deleted'], STATUS_CODES['suspended'])
+    elif field == 'birth':
+        if entry.get('source') == 'True':
+            return None  # an account's creation date never changes
+        negative = entry.get('birth_date') == 'Unknown'
+    else:
+        negative = entry.get('last_activity') == 'Unknown'
+    return CACHE_TTL_NEGATIVE if negative else CACHE_TTL_POSITIVE
+
+
+def has_account_fields(entry, fields=ACCOUNT_FIELDS, now=None) -> bool:
+    """True if a cache entry can answer every requested field without a request.
+
+    A field qualifies if it is cached (fresh or stale) or its last lookup
+    failed less than CACHE_TTL_TRANSIENT ago, in which case it reads as
+    'Unknown' instead of being retried immediately.
+    """
+    if entry is None:
+        return False
+    now = time.time() if now is None else now
+    return all(
+        all(key in entry for key in _FIELD_KEYS[field]) or _recently_failed(entry, field, now)
+        for field in fields
+    )
+
+
+def fetched_account_fields(entry, fields=ACCOUNT_FIELDS) -> bool:
+    """True if a cache entry holds a fetched value for every requested field.
+
+    Unlike has_account_fields, a field whose lookup just failed does not
+    count, so lookup jobs can leave such users pending and retry them.
+    """
+    return entry is not None and all(all(key in entry for key in _FIELD_KEYS[field]) for field in fields)
+
+
+def stale_fields(entry, fields=ACCOUNT_FIELDS, now=None) -> set:
+    """Return the cached fields among `fields` whose TTL has expired.
+
+    Entries written before fetch times were recorded count as stale. Fields
+    whose revalidation just failed are left alone for CACHE_TTL_TRANSIENT.
+    """
+    if entry is None:
+        return set()
+    now = time.time() if now is None else now
+    fetched_at = entry.get('fetched_at') or {}
+    stale = set()
+    for field in fields:
+        if not all(key in entry for key in _FIELD_KEYS[field]) or _recently_failed(entry, field, now):
             continue
-    if last_ts:
-        last_activity = max(last_ts).strftime('%Y-%m-%d')
-
-    with CACHE_LOCK:
-        CACHE[lower] = {
-            'status_code': status_code,
-            'birth_date': birth_date,
-            'last_activity': last_activity,
-            'source': source
-        }
+        ttl = _field_ttl(entry, field)
+        if ttl is not None and now - fetched_at.get(field, 0) >= ttl:
+            stale.add(field)
+    return stale
+
+
+def _missing_fields(entry, fields) -> set:
+    now = time.time()
+    return {field for field in fields if not has_account_fields(entry, (field,), now)}
+
+
+def _store_account_info(author: str, about=None, earliest=None, latest=None, account_id=None):
+    """Cache the fields a lookup determined and return the account info tuple.
+
+    Args:
+        about: (status_code, birth_date, source, complete) from about.json or
+            the batched account data, or None if not looked up
+        earliest, latest: combined (date, complete) Photon searches, or None
+            if not looked up
+
+    Fields are merged into the user's cache entry independently, each with
+    its fetch time. A field whose requests were throttled or failed is
+    returned as looked up but not cached; the failure is recorded so the
+    field is not retried for CACHE_TTL_TRANSIENT. Cached fields that were
+    not looked up are kept, and the account id, when known, lets later
+    refreshes use the batched account endpoint.
+    """
+    shown, values = {}, {}
+    attempted, fetched = set(), set()
+    if about is not None:
+        status_code, birth_date, source, complete = about
+        attempted.add('status')
+        birth_complete = source == 'True'
+        if birth_complete or earliest is not None:
+            attempted.add('birth')
+        if birth_date == 'Unknown' and earliest is not None:
+            date, birth_complete = earliest
+            if date:
+                birth_date, source = date.strftime('%Y-%m-%d'), 'Estimated'
+        shown.update(status_code=status_code, birth_date=birth_date, source=source)
+        if complete:
+            values['status_code'] = status_code
+            fetched.add('status')
+            if birth_complete:
+                values.update(birth_date=birth_date, source=source)
+                fetched.add('birth')
+    if latest is not None:
+        date, complete = latest
+        attempted.add('last_activity')
+        shown['last_activity'] = date.strftime('%Y-%m-%d') if date else 'Unknown'
+        if complete:
+            values['last_activity'] = shown['last_activity']
+            fetched.add('last_activity')
+    if account_id:
+        values['account_id'] = account_id
+
+    if not (values or attempted):
+        return _entry_to_info({**shown, **(CACHE.get(author.lower()) or {})})
+
+    def merge(entry):
+        entry = dict(entry or {})
+        now = time.time()
+        entry.update(values)
+        entry['fetched_at'] = {**(entry.get('fetched_at') or {}), **{field: now for field in fetched}}
+        failed_at = {f: t for f, t in (entry.get('failed_at') or {}).items() if f not in fetched}
+        failed_at.update((field, now) for field in attempted - fetched)
+        if failed_at:
+            entry['failed_at'] = failed_at
+        else:
+            entry.pop('failed_at', None)
+        return entry
+
+    # Merged under the cache's update lock: a concurrent lookup of other
+    # fields of the same user may be storing its own
+    entry = CACHE.update(author.lower(), merge)
+    return _entry_to_info({**shown, **entry})
+
+
+def get_account_info(author: str, fields=ACCOUNT_FIELDS):
+    """Return (status_code:int, birth_date_str, last_activity_str, source)
+
+    source: 'True' if created_utc used, 'Estimated' if fallback used, 'Unknown' otherwise.
+    fields: the subset of ACCOUNT_FIELDS the caller needs; only requests
+    for fields missing from the cache are made (status and birth date cost
+    one about.json request, last activity two Photon searches), and the
+    other tuple members may be 'Unknown'.
+    Persistent global CACHE used; concurrent calls for the same user share
+    one fetch (see ACCOUNT_FLIGHTS).
+    """
+    key = author.lower()
+    e = CACHE.get(key)
+    need = _missing_fields(e, fields)
+    if not need:
+        return _entry_to_info(e)
+
+    future, leader = ACCOUNT_FLIGHTS.claim(key, need)
+    if not leader:
         try:
-            save_persistent_cache(CACHE)
-        except Exception:
-            pass
+            return future.result()
+        except RequestCancelled:
+            # The lookup we joined was a cancelled prefetch; do our own
+            return get_account_info(author, fields)
+    try:
+        info = _lookup_account_info(author, need)
+    except BaseException as exc:
+        ACCOUNT_FLIGHTS.finish(key, future, error=exc)
+        raise
+    ACCOUNT_FLIGHTS.finish(key, future, info)
+    return info
+
+
+def _lookup_account_info(author: str, need):
+    """Fetch the `need` fields for one user, cache them and return the info tuple."""
+    _count_lookup(users=1)
+    about = earliest = latest = latest_results = account_id = None
+    if need & {'status', 'birth'}:
+        data, status_code_raw = _fetch_about_json(author)
+        about = (*_resolve_about(data, status_code_raw), not _is_transient(status_code_raw))
+        account_id = _account_id(data)
+
+    if 'last_activity' in need:
+        latest_results = [_fetch_photon_date(author, kind, 'desc') for kind in PHOTON_KINDS]
+        latest = _combine_photon_dates(latest_results, 'desc')
 
-    return status_code, birth_date, last_activity, source
+    if 'birth' in need and about[1] == 'Unknown':
+        kinds = _kinds_with_activity(latest_results) if latest_results is not None else PHOTON_KINDS
+        earliest = _fetch_photon_extreme(author, 'asc', kinds=kinds)
 
+    return _store_account_info(author, about, earliest, latest, account_id)
@@ -0,0 +1,59 @@
+"""Coalescing of concurrent lookups for the same key ("single flight").
+
+The first caller for a key becomes the leader and performs the work; callers
+arriving while it is in flight wait for the leader's result instead of
+repeating the requests. Results are delivered through a
+concurrent.futures.Future, so both threads and asyncio tasks on any event
+loop (via asyncio.wrap_future) can wait on them.
+"""
+
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Registry of in-flight lookups keyed by e.g. lowercase username.
+
+    Each flight covers the set of fields its leader fetches; a caller only
+    joins a flight whose fields include everything it needs, otherwise it
+    starts its own, so one key can have several flights at once.
+    """
+
+    def __init__(self):
+        self._flights = {}  # key: [(fields, future), ...]
+        self._lock = threading.Lock()
+        self.stats = {'leaders': 0, 'suppressed': 0}
+
+    def claim(self, key, fields=()):
+        """Return (future, leader). A leader must call finish(); others wait on the future."""
+        fields = frozenset(fields)
+        with self._lock:
+            flights = self._flights.setdefault(key, [])
+            for flight_fields, future in flights:
+                if fields <= flight_fields:
+                    self.stats['suppressed'] += 1
+                    return future, False
+            future = Future()
+            flights.append((fields, future))
+            self.stats['leaders'] += 1
+            return future, True
+
+    def finish(self, key, future, result=None, error=None):
+        """Publish the leader's result (or exception) and retire its flight."""
+        with self._lock:
+            flights = self._flights.get(key, [])
+            flights[:] = [flight for flight in flights if flight[1] is not future]
+            if not flights:
+                self._flights.pop(key, None)
+        if error is not None and not isinstance(error, Exception):
+            # Don't propagate the leader's cancellation (KeyboardInterrupt,
+            # asyncio.CancelledError) into unrelated waiting callers
+            error = RuntimeError(f'lookup of {key!r} was interrupted')
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return sum(map(len, self._flights.values()))
@@ -0,0 +1,134 @@
+"""ActivityAggregate counts and the timezone-dependent hour heatmap."""
+
+import os
+import sys
+import random
+import datetime
+import unittest
+
+import pytz
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from ingest.aggregate import MAX_EPOCH, MIN_EPOCH, ActivityAggregate, record_epoch
+
+ZONES = ('UTC', 'America/New_York', 'Europe/London', 'Australia/Sydney', 'America/Sao_Paulo', 'Pacific/Apia',
+         'Asia/Kolkata')
+
+
+def record(ts, author='someone', subreddit='test'):
+    return {'author': author, 'subreddit': subreddit, 'created_utc': ts}
+
+
+def astimezone_grid(timestamps, tz):
+    """The 7x24 grid binned record by record with datetime.astimezone (offsets rounded down to whole hours).
+
+    Local times beyond years 1 and 9999 can't be represented; such records
+    take the offset of the last representable day.
+    """
+    grid = [[0] * 24 for _ in range(7)]
+    for ts in timestamps:
+        lookup = min(max(ts, MIN_EPOCH + 86400), MAX_EPOCH - 86400)
+        utc = datetime.datetime.fromtimestamp(lookup, datetime.timezone.utc)
+        offset = utc.astimezone(tz).utcoffset() // datetime.timedelta(hours=1)
+        if lookup == ts:
+            local = utc + datetime.timedelta(hours=offset)
+            grid[local.weekday()][local.hour] += 1
+        else:
+            # 1970-01-01 was a Thursday (weekday 3)
+            local_hour = ts // 3600 + offset
+            grid[(local_hour // 24 + 3) % 7][local_hour % 24] += 1
+    return grid
+
+
+class HourDayCountsTest(unittest.TestCase):
+
+    def aggregate(self, timestamps):
+        agg = ActivityAggregate()
+        for ts in timestamps:
+            agg.add(record(ts), 'comment')
+        return agg
+
+    def assert_matches_astimezone(self, timestamps, zones=ZONES):
+        agg = self.aggregate(timestamps)
+        for name in zones:
+            tz = pytz.timezone(name)
+            with self.subTest(zone=name):
+                self.assertEqual(agg.hour_day_counts(tz), astimezone_grid(timestamps, tz))
+
+    def test_years_of_records_across_dst_changes(self):
+        rng = random.Random(7)
+        start, end = 1_200_000_000, 1_700_000_000
+        self.assert_matches_astimezone([rng.randint(start, end) for _ in range(20000)])
+
+    def test_records_around_transitions(self):
+        # Every hour of the weeks around 2021's European and US changes
+        timestamps = []
+        for day in (datetime.datetime(2021, 3, 14), datetime.datetime(2021, 3, 28), datetime.datetime(2021, 10, 31),
+                    datetime.datetime(2021, 11, 7)):
+            first = int(day.replace(tzinfo=datetime.timezone.utc).timestamp()) - 3 * 86400
+            timestamps.extend(range(first, first + 6 * 86400, 1800))
+        self.assert_matches_astimezone(timestamps)
+
+    def test_single_record_and_single_week(self):
+        self.assert_matches_astimezone([1_600_000_000])
+        self.assert_matches_astimezone(range(1_600_000_000, 1_600_000_000 + 5 * 86400, 4000))
+
+    def test_outlying_timestamps(self):
+        # A stray record at either end of the datetime range must not make re-binning slow
+        rng = random.Random(8)
+        timestamps = [rng.randint(1_500_000_000, 1_600_000_000) for _ in range(5000)]
+        timestamps += [MAX_EPOCH, MIN_EPOCH + 3600, 3 * 86400]
+        agg = self.aggregate(timestamps)
+        blocks, rows = agg._hour_of_week_prefix()
+        self.assertEqual(len(rows), len(blocks) + 1)
+        self.assertLess(len(rows), 1000)
+        self.assert_matches_astimezone(timestamps, ('UTC', 'America/New_York', 'Asia/Tokyo', 'Pacific/Kiritimati'))
+
+    def test_grid_follows_later_records(self):
+        agg = self.aggregate([1_600_000_000])
+        agg.hour_day_counts(pytz.UTC)
+        agg.add(record(1_600_000_000 + 86400), 'comment')
+        self.assertEqual(sum(map(sum, agg.hour_day_counts(pytz.UTC))), 2)
+
+    def test_empty(self):
+        self.assertEqual(ActivityAggregate().hour_day_counts(pytz.UTC), [[0] * 24 for _ in range(7)])
+
+
+class ActivityAggregateTest(unittest.TestCase):
+
+    def test_record_epoch_range(self):
+        self.assertEqual(record_epoch({'created_utc': '1600000000'}), 1600000000)
+        self.assertEqual(record_epoch({'created': '2020-09-13T12:26:40Z'}), 1600000000)
+        self.assertIsNone(record_epoch({'created_utc': MAX_EPOCH + 1}))
+        self.assertIsNone(record_epoch({'created_utc': float('inf')}))
+
+    def test_merge_equals_single_aggregate(self):
+        rng = random.Random(9)
+        records = [record(rng.randint(1_500_000_000, 1_600_000_000), f'user{rng.randint(0, 300)}',
+                          f'sub{rng.randint(0, 5)}') for _ in range(6000)]
+        whole = ActivityAggregate()
+        parts = [ActivityAggregate() for _ in range(3)]
+        for i, obj in enumerate(records):
+            whole.add(obj, 'comment')
+            parts[i % 3].add(obj, 'comment')
+        merged = ActivityAggregate.merged(parts)
+        self.assertEqual(merged.total, whole.total)
+        self.assertEqual(merged.user_counts, whole.user_counts)
+        self.assertEqual(merged.subreddit_counts, whole.subreddit_counts)
+        self.assertEqual(merged.hour_counts, whole.hour_counts)
+        # Authors tied at the cut-off may differ, their counts may not
+        top = merged.top_contributors()
+        self.assertEqual([count for _, count in top], [count for _, count in whole.top_contributors()])
+        for author, count in top:
+            self.assertEqual(whole.user_counts[author], count)
+
+    def test_merge_rejects_different_options(self):
+        with self.assertRaises(ValueError):
+            ActivityAggregate().merge(ActivityAggregate(sketch=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
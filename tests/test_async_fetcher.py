@@ -0,0 +1,150 @@
+"""AsyncAccountFetcher against a local stub of the Reddit and Photon APIs.
+
+Run from the repository root: python -m pytest tests (or python -m unittest discover tests).
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+CREATED_UTC = 1300000000  # 2011-03-13
+CREATED_DATE = '2011-03-13'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves scripted responses per path prefix; unscripted Photon searches find nothing."""
+
+    # {path prefix: [(status, headers, body), ...]}, consumed in order
+    script = {}
+    requests_seen = []
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        with self.lock:
+            self.requests_seen.append(self.path)
+            responses = next((r for prefix, r in self.script.items() if self.path.startswith(prefix)), None)
+            response = responses.pop(0) if responses else None
+        if response is None:
+            response = (200, {}, {'data': []})
+        status, headers, body = response
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def setUpModule():
+    global server, base_url, fetcher_module, rate_limit, STATUS_CODES, CACHE, _tmpdir, _cwd
+    # The account cache lives in the working directory; keep the test's out of the repository
+    _cwd = os.getcwd()
+    _tmpdir = tempfile.TemporaryDirectory()
+    os.chdir(_tmpdir.name)
+    import async_fetcher as fetcher_module
+    import rate_limit
+    from cache import CACHE
+    from config import STATUS_CODES
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}'
+
+
+def tearDownModule():
+    server.shutdown()
+    server.server_close()
+    CACHE.flush()
+    os.chdir(_cwd)
+    _tmpdir.cleanup()
+
+
+class AsyncFetcherStubServerTest(unittest.TestCase):
+
+    def setUp(self):
+        StubHandler.script = {}
+        StubHandler.requests_seen = []
+
+    def fetch(self, usernames, fields=('status', 'birth')):
+        fetcher = fetcher_module.AsyncAccountFetcher(4, reddit_base_url=base_url, photon_base_url=base_url)
+        try:
+            return asyncio.run(fetcher.fetch_many(usernames, fields=fields))
+        finally:
+            fetcher.close()
+            self.stats = fetcher.stats
+
+    def about_requests(self, username):
+        return [p for p in StubHandler.requests_seen if p.startswith(f'/user/{username}/about.json')]
+
+    def test_batch_with_found_missing_and_throttled_users(self):
+        found, missing, throttled = 'stub_found', 'stub_missing', 'stub_throttled'
+        about = (200, {}, {'data': {'created_utc': CREATED_UTC, 'id': 'abc123'}})
+        StubHandler.script = {
+            f'/user/{found}/about.json': [about],
+            f'/user/{missing}/about.json': [(404, {}, {'error': 404})],
+            f'/user/{throttled}/about.json': [(429, {'Retry-After': '1'}, {'error': 429}), about],
+        }
+        throttles_before = rate_limit.get_limiter(base_url).stats['throttles']
+
+        started = time.monotonic()
+        results = self.fetch([found, missing, throttled])
+        elapsed = time.monotonic() - started
+
+        status, birth, _, source = results[found]
+        self.assertEqual((status, birth, source), (STATUS_CODES['active'], CREATED_DATE, 'True'))
+
+        status, birth, _, _ = results[missing]
+        self.assertEqual(status, STATUS_CODES['deleted'])
+        self.assertEqual(birth, 'Unknown')
+
+        # The 429 is retried after the advertised delay and the retry succeeds
+        status, birth, _, source = results[throttled]
+        self.assertEqual((status, birth, source), (STATUS_CODES['active'], CREATED_DATE, 'True'))
+        self.assertEqual(len(self.about_requests(throttled)), 2)
+        self.assertGreaterEqual(elapsed, 0.9)
+        self.assertGreater(rate_limit.get_limiter(base_url).stats['throttles'], throttles_before)
+
+        self.assertEqual(self.stats['users'], 3)
+        # about.json for each user, its retry, and the missing user's Photon searches
+        self.assertEqual(self.stats['requests'], len(StubHandler.requests_seen))
+
+        # Results are cached: a second lookup makes no requests
+        StubHandler.requests_seen = []
+        self.assertEqual(self.fetch([found])[found][1], CREATED_DATE)
+        self.assertEqual(StubHandler.requests_seen, [])
+        self.assertEqual(self.stats['requests'], 0)
+
+    def test_stats_only_count_the_fetchers_own_lookups(self):
+        user = 'stub_counted'
+        StubHandler.script = {
+            f'/user/{user}/about.json': [(200, {}, {'data': {'created_utc': CREATED_UTC, 'id': 'def456'}})],
+        }
+        fetcher = fetcher_module.AsyncAccountFetcher(4, reddit_base_url=base_url, photon_base_url=base_url)
+        try:
+            # Lookups elsewhere (e.g. the background refresher) while this fetcher runs
+            fetcher_module._count_lookup(users=7, requests_made=20)
+            asyncio.run(fetcher.fetch_many([user], fields=('status', 'birth')))
+        finally:
+            fetcher.close()
+        stats = fetcher.stats
+        self.assertEqual((stats['users'], stats['requests'], stats['coalesced']), (1, 1, 0))
+        self.assertEqual(stats['requests_per_user'], 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+"""AccountCache over an in-memory backend."""
+
+import os
+import sys
+import threading
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from cache import AccountCache, CacheBackend
+
+
+class MemoryBackend(CacheBackend):
+
+    def __init__(self):
+        self.data = {}
+
+    def get_many(self, keys) -> dict:
+        return {k: self.data[k] for k in keys if k in self.data}
+
+    def put_many(self, items):
+        self.data.update(items)
+
+
+class AccountCacheTest(unittest.TestCase):
+
+    def test_backends_must_implement_get_and_put(self):
+        class ReadOnly(CacheBackend):
+            def get_many(self, keys) -> dict:
+                return {}
+
+        with self.assertRaises(TypeError):
+            ReadOnly()
+
+    def test_concurrent_updates_of_one_entry_are_merged(self):
+        backend = MemoryBackend()
+        cache = AccountCache(backend)
+        start = threading.Barrier(8)
+
+        def store(field):
+            start.wait()
+            for i in range(200):
+                cache.update('u', lambda entry: {**(entry or {}), field: i})
+
+        threads = [threading.Thread(target=store, args=(f'field{n}',)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        cache.flush()
+        expected = {f'field{n}': 199 for n in range(8)}
+        self.assertEqual(cache.get('u'), expected)
+        self.assertEqual(backend.data['u'], expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
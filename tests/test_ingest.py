@@ -0,0 +1,173 @@
+"""File ingestion: byte-range splitting, parallel vs serial results and the aggregate store."""
+
+import os
+import sys
+import json
+import random
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from ingest import AggregateStore, file_signature, ingest_file_parallel, ingest_files, split_ranges
+from ingest.parallel import iter_range_lines
+
+
+def comment_lines(n, seed, subreddit='test'):
+    rng = random.Random(seed)
+    for i in range(n):
+        author = f'user{int(rng.paretovariate(1.2)) % 500}'
+        yield json.dumps({'author': author, 'subreddit': subreddit, 'created_utc': rng.randint(1_400_000_000, 1_700_000_000),
+                          'body': 'x' * rng.randint(0, 200), 'link_id': f't3_{i}'}) + '\n'
+
+
+def assert_same_aggregate(test, got, expected):
+    test.assertEqual(got.total, expected.total)
+    test.assertEqual(dict(got.kind_counts), dict(expected.kind_counts))
+    test.assertEqual(dict(got.subreddit_counts), dict(expected.subreddit_counts))
+    test.assertEqual(dict(got.hour_counts), dict(expected.hour_counts))
+    test.assertEqual(got.unique_users(), expected.unique_users())
+    if not got.sketch:
+        test.assertEqual(dict(got.user_counts), dict(expected.user_counts))
+        test.assertEqual([c for _, c in got.top_contributors()], [c for _, c in expected.top_contributors()])
+
+
+class IngestTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmpdir.cleanup)
+        self.dir = self._tmpdir.name
+
+    def write(self, name, lines, mode='w'):
+        path = os.path.join(self.dir, name)
+        with open(path, mode, encoding='utf-8', newline='') as f:
+            f.writelines(lines)
+        return path
+
+    def serial(self, path, **options):
+        return ingest_files([(path, 'comment')], 'subreddit', **options)[0]
+
+
+class SplitRangesTest(IngestTestCase):
+
+    def test_ranges_cover_the_file_at_line_starts(self):
+        path = self.write('c.jsonl', comment_lines(3000, seed=1))
+        with open(path, 'rb') as f:
+            data = f.read()
+        for n_chunks in (1, 2, 7, 64):
+            ranges = split_ranges(path, n_chunks)
+            self.assertLessEqual(len(ranges), n_chunks)
+            self.assertEqual(ranges[0][0], 0)
+            self.assertEqual(ranges[-1][1], len(data))
+            for (_, end), (start, _) in zip(ranges, ranges[1:]):
+                self.assertEqual(end, start)
+                self.assertEqual(data[start - 1:start], b'\n')
+            lines = [line for start, end in ranges for line in iter_range_lines(path, start, end)]
+            self.assertEqual([line for line in lines if line], data.splitlines())
+
+    def test_sub_range_and_tiny_files(self):
+        path = self.write('c.jsonl', comment_lines(1000, seed=2))
+        with open(path, 'rb') as f:
+            data = f.read()
+        size = len(data)
+        start = data.index(b'\n', size // 3) + 1
+        ranges = split_ranges(path, 8, start, size)
+        self.assertEqual((ranges[0][0], ranges[-1][1]), (start, size))
+        self.assertEqual(split_ranges(path, 4, size, size), [])
+        one_line = self.write('one.jsonl', ['{"a": 1}'])
+        self.assertEqual(split_ranges(one_line, 4), [(0, os.path.getsize(one_line))])
+
+
+class ParallelIngestTest(IngestTestCase):
+
+    def test_parallel_equals_serial(self):
+        path = self.write('c.jsonl', comment_lines(20000, seed=3))
+        for sketch in (False, True):
+            with self.subTest(sketch=sketch):
+                options = {'top_k': 20, 'sketch': sketch}
+                parallel = ingest_file_parallel(path, 'comment', workers=3, options=options)
+                assert_same_aggregate(self, parallel, self.serial(path, **options))
+
+    def test_parallel_range_continues_a_prefix(self):
+        lines = list(comment_lines(5000, seed=4))
+        path = self.write('c.jsonl', lines)
+        start = sum(len(line.encode('utf-8')) for line in lines[:1234])
+        head = self.serial(self.write('head.jsonl', lines[:1234]))
+        rest = ingest_file_parallel(path, 'comment', workers=2, start=start, options=head.options)
+        assert_same_aggregate(self, head.merge(rest), self.serial(path))
+
+
+class AggregateStoreTest(IngestTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.store = AggregateStore(os.path.join(self.dir, 'store'))
+        self.lines = list(comment_lines(3000, seed=5))
+        self.path = self.write('c.jsonl', self.lines)
+
+    def save(self):
+        signature = file_signature(self.path)
+        aggregate = self.serial(self.path)
+        self.store.save(self.path, 'comment', 'subreddit', aggregate, signature)
+        return aggregate
+
+    def test_unchanged_file_is_loaded(self):
+        aggregate = self.save()
+        assert_same_aggregate(self, self.store.load(self.path, 'comment', 'subreddit'), aggregate)
+        self.assertIsNone(self.store.load_appended(self.path, 'comment', 'subreddit'))
+        # Entries are keyed by role and identity field as well
+        self.assertIsNone(self.store.load(self.path, 'post', 'subreddit'))
+        self.assertIsNone(self.store.load(self.path, 'comment', 'author'))
+
+    def test_append_is_detected(self):
+        self.save()
+        old_size = os.path.getsize(self.path)
+        self.write('c.jsonl', comment_lines(500, seed=6), mode='a')
+        self.assertIsNone(self.store.load(self.path, 'comment', 'subreddit'))
+        appended = self.store.load_appended(self.path, 'comment', 'subreddit')
+        self.assertIsNotNone(appended)
+        aggregate, offset = appended
+        self.assertEqual(offset, old_size)
+        self.assertEqual(aggregate.total, len(self.lines))
+
+    def test_truncated_file_is_rejected(self):
+        self.save()
+        self.write('c.jsonl', self.lines[:-10])
+        self.assertIsNone(self.store.load(self.path, 'comment', 'subreddit'))
+        self.assertIsNone(self.store.load_appended(self.path, 'comment', 'subreddit'))
+
+    def test_rewritten_file_is_rejected(self):
+        self.save()
+        # Same lines plus an append, but the first record was edited in place
+        edited = [self.lines[0].replace('"author": "user', '"author": "USER')] + self.lines[1:]
+        self.write('c.jsonl', edited + list(comment_lines(10, seed=7)))
+        self.assertIsNone(self.store.load_appended(self.path, 'comment', 'subreddit'))
+        # An edit near the old end of the file
+        edited = self.lines[:-1] + [self.lines[-1].replace('"author": "user', '"author": "USER')]
+        self.write('c.jsonl', edited + list(comment_lines(10, seed=7)))
+        self.assertIsNone(self.store.load_appended(self.path, 'comment', 'subreddit'))
+
+    def test_partial_last_line_is_not_extended(self):
+        self.write('c.jsonl', self.lines + ['{"author": "late", "subr'])
+        self.save()
+        self.write('c.jsonl', ['eddit": "test", "created_utc": 1500000000}\n'], mode='a')
+        self.assertIsNone(self.store.load_appended(self.path, 'comment', 'subreddit'))
+
+    def test_ingest_counts_appended_records_once(self):
+        ingest_files([(self.path, 'comment')], 'subreddit', store=self.store)
+        self.write('c.jsonl', comment_lines(700, seed=8), mode='a')
+        incremental = ingest_files([(self.path, 'comment')], 'subreddit', store=self.store)[0]
+        fresh = self.serial(self.path)
+        self.assertEqual(fresh.total, len(self.lines) + 700)
+        assert_same_aggregate(self, incremental, fresh)
+        # A later truncation is parsed from scratch instead of keeping the removed records
+        self.write('c.jsonl', self.lines[:100])
+        truncated = ingest_files([(self.path, 'comment')], 'subreddit', store=self.store)[0]
+        self.assertEqual(truncated.total, 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
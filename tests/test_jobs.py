@@ -0,0 +1,102 @@
+"""Checkpointing and resuming LookupJob."""
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from jobs import DONE, PAUSED, RUNNING, LookupJob, fingerprint_usernames, list_jobs
+
+FIELDS = ('status', 'birth')
+
+
+class LookupJobTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmpdir.cleanup)
+        self.dir = self._tmpdir.name
+        self.usernames = [f'user{i}' for i in range(1000)]
+        self.fingerprint, self.total = fingerprint_usernames(self.usernames)
+
+    def open(self, fingerprint=None, total=None, fields=FIELDS):
+        return LookupJob.open(self.dir, 'creation_year', 'users.txt', fingerprint or self.fingerprint,
+                              self.total if total is None else total, fields)
+
+    def test_paused_job_resumes_where_it_stopped(self):
+        job = self.open()
+        for i in range(0, 1000, 3):
+            job.mark_done(i, str(2010 + i % 5))
+        summary = job.summary()
+        job.pause()
+
+        resumed = self.open()
+        self.assertEqual(resumed.state, RUNNING)
+        self.assertEqual(resumed.done_count, 334)
+        self.assertEqual(resumed.summary(), summary)
+        self.assertEqual([i for i in range(1000) if resumed.is_done(i)], list(range(0, 1000, 3)))
+        # Users finished before the pause are not counted again
+        self.assertFalse(resumed.mark_done(3, '2013'))
+        self.assertTrue(resumed.mark_done(1, '2011'))
+        self.assertEqual(resumed.summary()['2011'], summary.get('2011', 0) + 1)
+
+    def test_unsaved_progress_since_the_last_checkpoint_is_redone(self):
+        job = self.open()
+        job.mark_done(0)
+        job.checkpoint(force=True)
+        job.mark_done(1)
+        job.checkpoint()  # within checkpoint_interval: not written
+        resumed = self.open()
+        self.assertTrue(resumed.is_done(0))
+        self.assertFalse(resumed.is_done(1))
+
+    def test_other_input_or_fields_start_a_new_job(self):
+        job = self.open()
+        job.mark_done(5)
+        job.pause()
+        other, _ = fingerprint_usernames(self.usernames[::-1])
+        self.assertEqual(self.open(fingerprint=other).done_count, 0)
+        self.assertEqual(self.open(fields=('status',)).done_count, 0)
+        self.assertEqual(self.open().done_count, 1)
+
+    def test_finished_job_starts_over(self):
+        job = self.open()
+        for i in range(self.total):
+            job.mark_done(i)
+        job.finish()
+        self.assertEqual(list_jobs(self.dir)[0]['state'], DONE)
+        again = self.open()
+        self.assertEqual((again.done_count, again.summary()), (0, {}))
+
+    def test_concurrent_marks_count_each_user_once(self):
+        job = self.open()
+
+        def mark():
+            for i in range(self.total):
+                job.mark_done(i, 'found')
+
+        threads = [threading.Thread(target=mark) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(job.done_count, self.total)
+        self.assertEqual(job.summary(), {'found': self.total})
+
+    def test_list_jobs_describes_saved_jobs(self):
+        job = self.open()
+        job.mark_done(0)
+        job.pause()
+        [saved] = list_jobs(self.dir, 'creation_year')
+        self.assertEqual((saved['state'], saved['done'], saved['total']), (PAUSED, 1, 1000))
+        self.assertNotIn('bitmap', saved)
+        self.assertEqual(list_jobs(self.dir, 'overlap'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+"""SingleFlight coalescing of concurrent lookups."""
+
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from singleflight import SingleFlight
+
+
+class SingleFlightTest(unittest.TestCase):
+
+    def test_caller_joins_a_flight_covering_its_fields(self):
+        flights = SingleFlight()
+        future, leader = flights.claim('u', {'status', 'birth'})
+        joined, joined_leader = flights.claim('u', {'birth'})
+        self.assertTrue(leader)
+        self.assertFalse(joined_leader)
+        self.assertIs(joined, future)
+        flights.finish('u', future, 'info')
+        self.assertEqual(joined.result(), 'info')
+        self.assertEqual(flights.in_flight(), 0)
+
+    def test_caller_never_joins_a_flight_missing_its_fields(self):
+        flights = SingleFlight()
+        birth, birth_leader = flights.claim('u', {'birth'})
+        status, status_leader = flights.claim('u', {'status'})
+        self.assertTrue(birth_leader)
+        self.assertTrue(status_leader)
+        # The status flight does not fetch birth, so a birth lookup must join the birth flight
+        joined, joined_leader = flights.claim('u', {'birth'})
+        self.assertFalse(joined_leader)
+        self.assertIs(joined, birth)
+        # Nothing in flight fetches both fields
+        both, both_leader = flights.claim('u', {'status', 'birth'})
+        self.assertTrue(both_leader)
+        self.assertEqual(flights.in_flight(), 3)
+
+        flights.finish('u', birth, 'birth info')
+        joined, joined_leader = flights.claim('u', {'birth'})
+        self.assertIs(joined, both)
+        flights.finish('u', status, 'status info')
+        flights.finish('u', both, 'both info')
+        self.assertEqual(flights.in_flight(), 0)
+        # A new claim after every flight finished leads again
+        self.assertTrue(flights.claim('u', {'birth'})[1])
+
+    def test_interrupted_leader_does_not_cancel_waiters(self):
+        flights = SingleFlight()
+        future, _ = flights.claim('u', {'status'})
+        waiter, _ = flights.claim('u', {'status'})
+        flights.finish('u', future, error=KeyboardInterrupt())
+        with self.assertRaises(RuntimeError):
+            waiter.result()
+
+
+if __name__ == '__main__':
+    unittest.main()
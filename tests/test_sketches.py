@@ -0,0 +1,132 @@
+"""Accuracy guarantees of the streaming author summaries."""
+
+import os
+import sys
+import random
+import collections
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from ingest.sketches import HyperLogLog, SpaceSaving, TopK
+
+
+def zipf_stream(n, distinct, seed):
+    """n keys drawn from `distinct` keys with a skewed (Zipf-like) distribution."""
+    rng = random.Random(seed)
+    keys = [f'user{i}' for i in range(distinct)]
+    weights = [1 / (rank + 1) for rank in range(distinct)]
+    return rng.choices(keys, weights, k=n)
+
+
+class TopKTest(unittest.TestCase):
+
+    def test_matches_exact_top_k_at_every_point(self):
+        top = TopK(5)
+        counts = collections.Counter()
+        for i, key in enumerate(zipf_stream(20000, 2000, seed=1)):
+            counts[key] += 1
+            top.offer(key, counts[key])
+            if i % 997 == 0 or i == 19999:
+                expected = sorted(counts.values(), reverse=True)[:5]
+                got = top.top()
+                self.assertEqual([count for _, count in got], expected)
+                for key, count in got:
+                    self.assertEqual(counts[key], count)
+
+    def test_rejects_empty_k(self):
+        with self.assertRaises(ValueError):
+            TopK(0)
+
+
+class SpaceSavingTest(unittest.TestCase):
+
+    def check_bounds(self, summary, counts, n, single_stream=True):
+        for key, reported in summary.top():
+            true = counts[key]
+            self.assertGreaterEqual(reported, true)
+            self.assertLessEqual(reported - true, summary.error(key))
+            self.assertLessEqual(summary.error(key), summary.max_error)
+        for key, true in counts.items():
+            if true > summary.max_error:
+                self.assertIn(key, dict(summary.top()))
+        if single_stream:
+            self.assertLessEqual(summary.max_error, n / summary.capacity)
+
+    def test_single_stream_bounds(self):
+        stream = zipf_stream(50000, 5000, seed=2)
+        summary = SpaceSaving(200)
+        for key in stream:
+            summary.add(key)
+        counts = collections.Counter(stream)
+        self.assertEqual(summary.total, len(stream))
+        self.assertEqual(len(summary), 200)
+        self.check_bounds(summary, counts, len(stream))
+        # The heaviest keys are found with their exact rank
+        top = [key for key, _ in counts.most_common(10)]
+        self.assertEqual([key for key, _ in summary.top(10)], top)
+
+    def test_exact_while_under_capacity(self):
+        stream = zipf_stream(5000, 50, seed=3)
+        summary = SpaceSaving(100)
+        for key in stream:
+            summary.add(key)
+        self.assertEqual(dict(summary.top()), dict(collections.Counter(stream)))
+        self.assertEqual(summary.max_error, 0)
+
+    def test_merged_bounds(self):
+        parts = [zipf_stream(20000, 3000, seed=seed) for seed in (4, 5, 6)]
+        merged = SpaceSaving(150)
+        bound = 0
+        for part in parts:
+            summary = SpaceSaving(150)
+            for key in part:
+                summary.add(key)
+            bound += summary.max_error
+            merged.merge(summary)
+        counts = collections.Counter(key for part in parts for key in part)
+        self.assertEqual(merged.total, sum(map(len, parts)))
+        self.check_bounds(merged, counts, merged.total, single_stream=False)
+        # The merged bound is the larger of the summed bounds and the largest dropped count
+        self.assertGreaterEqual(merged.max_error, bound)
+
+
+class HyperLogLogTest(unittest.TestCase):
+
+    def test_estimate_within_three_standard_errors(self):
+        for distinct in (10, 1000, 50000, 200000):
+            sketch = HyperLogLog()
+            for i in range(distinct):
+                sketch.add(f'author{i}')
+                # Repeats don't change the estimate
+                if i % 3 == 0:
+                    sketch.add(f'author{i}')
+            error = abs(sketch.count() - distinct) / distinct
+            self.assertLessEqual(error, 3 * sketch.relative_error, distinct)
+
+    def test_small_counts_are_close_to_exact(self):
+        sketch = HyperLogLog()
+        for i in range(100):
+            sketch.add(f'u{i}')
+        self.assertAlmostEqual(sketch.count(), 100, delta=1)
+
+    def test_merge_equals_sketch_of_combined_stream(self):
+        left, right, combined = HyperLogLog(), HyperLogLog(), HyperLogLog()
+        for i in range(30000):
+            key = f'author{i}'
+            (left if i % 2 else right).add(key)
+            combined.add(key)
+        # Overlapping keys are counted once
+        for i in range(0, 30000, 5):
+            right.add(f'author{i}')
+        self.assertEqual(left.merge(right).count(), combined.count())
+
+    def test_rejects_mismatched_precision(self):
+        with self.assertRaises(ValueError):
+            HyperLogLog(12).merge(HyperLogLog(14))
+
+
+if __name__ == '__main__':
+    unittest.main()